@@ -0,0 +1,95 @@
+import functools
+import itertools
+import multiprocessing
+import time
+from collections import namedtuple
+import search_algorithms
+
+BatchResult = namedtuple("BatchResult", ["start", "goal", "algorithm", "path", "cost", "elapsed", "timed_out"])
+
+# What each batch's searches run on: batch key -> {"graph", "coordinates",
+# "max_time"}. Inline batches and thread pools read the parent's entry; pool
+# workers get theirs from _init_worker at startup (a forked worker inherits
+# the graph copy-on-write instead of receiving it pickled), including the
+# workers a pool starts later to replace ones that exited.
+_shared = {}
+_batch_keys = itertools.count()
+
+
+def run_batch(queries, graph, coordinates=None, processes=None, max_time=5.0, chunksize=64):
+    """
+    Runs every (start, goal, algorithm) query and returns a list of
+    BatchResult in query order. See iter_batch for the arguments.
+    """
+    return list(iter_batch(queries, graph, coordinates, processes, max_time, chunksize))
+
+
+def iter_batch(queries, graph, coordinates=None, processes=None, max_time=5.0, chunksize=64):
+    """
+    Fans (start, goal, algorithm) queries out over a process pool, yielding
+    a BatchResult per query, in query order, as results become available.
+
+    'queries' may be any iterable (including a generator streaming from a
+    file); 'algorithm' is a key of search_algorithms.ALGORITHMS. A query may
+    carry a fourth item, a dict of extra options for its search (e.g.
+    {"max_depth": 15} for id_dfs, or "max_time" to override the batch's
+    limit for that query). An "end_time" option (a time.time() value) caps
+    the search to what is left of it when a worker picks the query up, so
+    time spent queued counts; a query whose end_time has passed is answered
+    as timed out without searching. Each BatchResult carries the time the
+    search itself took, in seconds, and whether it ran out of max_time
+    (path is then None). processes=None uses every CPU;
+    processes=1 runs inline without a pool.
+
+    The graph is shared read-only: with the "fork" start method the workers
+    inherit it, otherwise each worker receives it once at startup.
+    """
+    state = {"graph": graph, "coordinates": coordinates, "max_time": max_time}
+    batch = _register(state)
+    try:
+        if processes == 1:
+            for query in queries:
+                yield _run_query(query, batch)
+            return
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        with context.Pool(processes, initializer=_init_worker, initargs=(batch, state)) as pool:
+            for result in pool.imap(functools.partial(_run_query, batch=batch), queries, chunksize):
+                yield result
+    finally:
+        _release(batch)
+
+
+def _register(state):
+    """Stores one batch's state in this process under a new key, and returns the key."""
+    batch = next(_batch_keys)
+    _shared[batch] = state
+    return batch
+
+
+def _release(batch):
+    _shared.pop(batch, None)
+
+
+def _init_worker(batch, state):
+    _shared[batch] = state
+
+
+def _run_query(query, batch):
+    start, goal, algorithm, *rest = query
+    state = _shared[batch]
+    options = dict(rest[0]) if rest else {}
+    start_time = time.perf_counter()
+    max_time = options.pop("max_time", state["max_time"])
+    end_time = options.pop("end_time", None)
+    if end_time is not None:
+        max_time = min(max_time, end_time - time.time())
+        if max_time <= 0 and algorithm in search_algorithms.ALGORITHMS:
+            return BatchResult(start, goal, algorithm, None, float('inf'), 0.0, True)
+    deadline = search_algorithms.Deadline(max_time)
+    path, cost = search_algorithms.run_search(algorithm, state["graph"], start, goal,
+                                              state["coordinates"], deadline=deadline, **options)
+    return BatchResult(start, goal, algorithm, path, cost, time.perf_counter() - start_time, deadline.timed_out)
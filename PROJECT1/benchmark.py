@@ -0,0 +1,283 @@
+import argparse
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from array import array
+import graph_setup
+import percentiles
+import search_algorithms
+
+FAMILIES = ("geometric", "grid", "road")
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+DEFAULT_ALGORITHMS = ("bfs", "dfs", "id_dfs", "best_first", "a_star")
+
+# Synthetic graphs cover a patch of the same size as Kansas, so edge lengths
+# and heuristic values stay in the range of the real data.
+_LAT_RANGE = (37.0, 40.0)
+_LON_RANGE = (-102.0, -94.6)
+
+
+def random_geometric_graph(n, seed=0, degree=6):
+    """
+    n points placed uniformly at random, each joined to every point within
+    the radius that gives about 'degree' neighbors on average. Returns a
+    CompactGraph; it may be disconnected, like a real sparse network.
+    """
+    rng = random.Random(seed)
+    xs = [rng.random() for _ in range(n)]
+    ys = [rng.random() for _ in range(n)]
+    radius = math.sqrt(degree / (math.pi * max(n, 1)))
+
+    # Bucket the points into radius-sized cells so only nearby cells are compared
+    cells = {}
+    for v in range(n):
+        cells.setdefault((int(xs[v] / radius), int(ys[v] / radius)), []).append(v)
+
+    edges = []
+    r2 = radius * radius
+    for (cx, cy), members in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = cells.get((cx + dx, cy + dy))
+            if others is None:
+                continue
+            for i, u in enumerate(members):
+                for w in (members[i + 1:] if others is members else others):
+                    if (xs[u] - xs[w]) ** 2 + (ys[u] - ys[w]) ** 2 <= r2:
+                        edges.append((u, w))
+    return _compact_graph(xs, ys, edges)
+
+
+def grid_graph(n, seed=0, jitter=0.3):
+    """
+    About n points on a square lattice, each nudged by up to 'jitter' of a
+    cell, joined to their four lattice neighbors. Returns a CompactGraph.
+    """
+    rng = random.Random(seed)
+    side = max(1, math.isqrt(n))
+    xs, ys = _lattice(side, rng, jitter)
+    edges = [edge for edge, _ in _lattice_edges(side)]
+    return _compact_graph(xs, ys, edges)
+
+
+def road_like_graph(n, seed=0, extra=0.3, highway_every=16):
+    """
+    Connected planar graph that looks like a road network: a random spanning
+    tree of a jittered lattice (so routes wind), plus a fraction 'extra' of
+    the remaining lattice edges, plus straight "highways" along every
+    highway_every-th row and column. Returns a CompactGraph.
+    """
+    rng = random.Random(seed)
+    side = max(1, math.isqrt(n))
+    xs, ys = _lattice(side, rng, 0.3)
+
+    candidates = list(_lattice_edges(side))
+    rng.shuffle(candidates)
+    parent = list(range(side * side))
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    edges = []
+    for (u, w), line in candidates:
+        root_u, root_w = find(u), find(w)
+        if root_u != root_w:
+            parent[root_u] = root_w
+            edges.append((u, w))
+        elif line % highway_every == 0 or rng.random() < extra:
+            edges.append((u, w))
+    return _compact_graph(xs, ys, edges)
+
+
+GENERATORS = {
+    "geometric": random_geometric_graph,
+    "grid": grid_graph,
+    "road": road_like_graph,
+}
+
+
+def _lattice(side, rng, jitter):
+    xs, ys = [], []
+    for row in range(side):
+        for col in range(side):
+            xs.append((col + 0.5 + jitter * (rng.random() - 0.5)) / side)
+            ys.append((row + 0.5 + jitter * (rng.random() - 0.5)) / side)
+    return xs, ys
+
+
+def _lattice_edges(side):
+    """Yields ((u, w), row or column the edge runs along) for every lattice edge."""
+    for row in range(side):
+        for col in range(side):
+            v = row * side + col
+            if col + 1 < side:
+                yield (v, v + 1), row
+            if row + 1 < side:
+                yield (v, v + side), col
+
+
+def _compact_graph(xs, ys, edges):
+    """
+    Builds a CompactGraph from unit-square points and undirected (u, w)
+    edges, mapping the square onto the Kansas-sized patch of coordinates.
+    """
+    n = len(xs)
+    degrees = [0] * n
+    for u, w in edges:
+        degrees[u] += 1
+        degrees[w] += 1
+
+    offsets = array('q', [0]) * (n + 1)
+    for v in range(n):
+        offsets[v + 1] = offsets[v] + degrees[v]
+    fill = array('q', offsets[:n])
+    targets = array('i', [0]) * offsets[n]
+    for u, w in edges:
+        targets[fill[u]] = w
+        fill[u] += 1
+        targets[fill[w]] = u
+        fill[w] += 1
+
+    lat = array('d', (_LAT_RANGE[0] + y * (_LAT_RANGE[1] - _LAT_RANGE[0]) for y in ys))
+    lon = array('d', (_LON_RANGE[0] + x * (_LON_RANGE[1] - _LON_RANGE[0]) for x in xs))
+    return graph_setup.CompactGraph([f"v{v}" for v in range(n)], offsets, targets, lat, lon)
+
+
+def make_queries(graph, count, seed=0):
+    """Returns 'count' (start, goal) city-name pairs drawn with a fixed seed."""
+    rng = random.Random(seed)
+    n = len(graph)
+    return [(graph.names[rng.randrange(n)], graph.names[rng.randrange(n)]) for _ in range(count)]
+
+
+def run_benchmark(graph, algorithm, queries, max_time=1.0, memory_queries=10, **options):
+    """
+    Runs one algorithm over every query and returns a dict of results:
+    latency percentiles and mean (ms), throughput (queries/s), how many
+    routes were found and how many searches timed out, and the peak memory
+    (KB) a single search allocated.
+
+    Latencies are measured without tracing; peak memory comes from a second
+    run of the first 'memory_queries' queries under tracemalloc, which slows
+    Python allocation down too much to time the searches at the same time.
+    """
+    latencies = []
+    found = timed_out = 0
+    total_start = time.perf_counter()
+    for start, goal in queries:
+        deadline = search_algorithms.Deadline(max_time)
+        query_start = time.perf_counter()
+        path, _ = search_algorithms.run_search(algorithm, graph, start, goal, None,
+                                               deadline=deadline, **options)
+        latencies.append(time.perf_counter() - query_start)
+        found += path is not None
+        timed_out += deadline.timed_out
+    total = time.perf_counter() - total_start
+
+    peak = 0
+    for start, goal in queries[:memory_queries]:
+        tracemalloc.start()
+        try:
+            search_algorithms.run_search(algorithm, graph, start, goal, None, max_time=max_time, **options)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    latencies.sort()
+    latency_ms = {f"p{p}": percentiles.percentile(latencies, p) * 1000
+                  for p in percentiles.PERCENTILES} if latencies else {}
+    if latencies:
+        latency_ms["max"] = latencies[-1] * 1000
+        latency_ms["mean"] = sum(latencies) / len(latencies) * 1000
+    return {
+        "algorithm": algorithm,
+        "queries": len(queries),
+        "found": found,
+        "timed_out": timed_out,
+        "latency_ms": latency_ms,
+        "throughput_qps": len(queries) / total if total > 0 else None,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def run_suite(families=FAMILIES, sizes=DEFAULT_SIZES, algorithms=DEFAULT_ALGORITHMS, queries=100,
+              seed=0, max_time=1.0, memory_queries=10, log=None):
+    """
+    Generates every family at every size and benchmarks every algorithm on
+    the same seeded queries. Returns a JSON-ready dict with the environment
+    (Python version, platform, git commit) and one result per
+    (family, size, algorithm). 'log', if given, is called with a progress line.
+    """
+    results = []
+    for family in families:
+        for size in sizes:
+            build_start = time.perf_counter()
+            graph = GENERATORS[family](size, seed)
+            graph.label_components()  # Up front, as the loaders do
+            build_seconds = time.perf_counter() - build_start
+            query_set = make_queries(graph, queries, seed)
+            for algorithm in algorithms:
+                result = run_benchmark(graph, algorithm, query_set, max_time, memory_queries)
+                result.update(family=family, nodes=len(graph), edges=len(graph.targets) // 2,
+                              build_seconds=build_seconds)
+                results.append(result)
+                if log is not None:
+                    log(f"{family:9} {len(graph):>8} {algorithm:12} "
+                        f"p50 {result['latency_ms'].get('p50', 0):9.3f} ms  "
+                        f"{result['throughput_qps'] or 0:9.1f} q/s  {result['timed_out']} timed out")
+    return {
+        "environment": _environment(),
+        "settings": {"seed": seed, "queries": queries, "max_time": max_time,
+                     "memory_queries": memory_queries},
+        "results": results,
+    }
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "numpy": graph_setup.np is not None,
+        "commit": commit,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the search algorithms on synthetic graphs.")
+    parser.add_argument("--families", nargs="+", choices=FAMILIES, default=list(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(search_algorithms.ALGORITHMS),
+                        default=list(DEFAULT_ALGORITHMS))
+    parser.add_argument("--queries", type=int, default=100, help="queries per graph")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-time", type=float, default=1.0, help="time limit per search, in seconds")
+    parser.add_argument("--memory-queries", type=int, default=10,
+                        help="queries re-run under tracemalloc for peak memory")
+    parser.add_argument("--output", help="write the JSON here instead of standard output")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.families, args.sizes, args.algorithms, args.queries, args.seed,
+                       args.max_time, args.memory_queries, log=lambda line: print(line, file=sys.stderr))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
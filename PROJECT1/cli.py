@@ -0,0 +1,178 @@
+import argparse
+import json
+import math
+import sys
+import time
+import tracemalloc
+import graph_setup
+import search_algorithms
+
+
+def parse_query_line(line, default_algorithms):
+    """
+    Parses one line of a query file: "start goal [algorithm ...]", separated
+    by whitespace or commas. Returns a list of (start, goal, algorithm), or
+    [] for a blank line or a "#" comment.
+    """
+    fields = line.replace(",", " ").split()
+    if not fields or fields[0].startswith("#"):
+        return []
+    if len(fields) < 2:
+        raise ValueError(f"Expected 'start goal [algorithm ...]', got: {line.strip()}")
+    start, goal, *algorithms = fields
+    return [(start, goal, algorithm) for algorithm in (algorithms or default_algorithms)]
+
+
+def read_queries(lines, default_algorithms):
+    """Yields (start, goal, algorithm) for every query in an iterable of lines."""
+    for line_number, line in enumerate(lines, 1):
+        try:
+            yield from parse_query_line(line, default_algorithms)
+        except ValueError as error:
+            raise ValueError(f"line {line_number}: {error}") from None
+
+
+def run_query(graph, coordinates, start, goal, algorithm, max_time=5.0, measure_memory=True, **options):
+    """
+    Runs one search and returns its result as a JSON-ready dict: path, cost,
+    distance (km), time (ms), peak memory (KB, or None without
+    measure_memory), nodes expanded, and whether the search timed out.
+    Unknown cities and algorithms give a dict with an "error" instead.
+    """
+    record = {"start": start, "goal": goal, "algorithm": algorithm}
+    if algorithm not in search_algorithms.ALGORITHMS:
+        record["error"] = f"Unknown search algorithm: {algorithm}"
+        return record
+    missing = [city for city in (start, goal) if city not in graph]
+    if missing:
+        record["error"] = "Unknown city: " + ", ".join(missing)
+        return record
+
+    deadline = search_algorithms.Deadline(max_time)
+    stats = search_algorithms.SearchStats()
+    if measure_memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start_time = time.perf_counter()
+    path, cost = search_algorithms.run_search(algorithm, graph, start, goal, coordinates,
+                                              stats=stats, deadline=deadline, **options)
+    elapsed = time.perf_counter() - start_time
+    memory_kb = (tracemalloc.get_traced_memory()[1] - baseline) / 1024 if measure_memory else None
+
+    record.update(
+        path=path,
+        cost=cost if path is not None and not math.isinf(cost) else None,
+        distance_km=graph_setup.path_distance(path, coordinates) if path is not None else None,
+        time_ms=elapsed * 1000,
+        memory_kb=memory_kb,
+        expanded=stats.expanded,
+        generated=stats.generated,
+        timed_out=deadline.timed_out,
+    )
+    return record
+
+
+def run_queries(graph, coordinates, queries, output, max_time=5.0, measure_memory=True, **options):
+    """
+    Runs every (start, goal, algorithm) query and writes one JSON object per
+    line to 'output'. Options that an algorithm does not take (e.g.
+    max_depth for anything but id_dfs) are only passed to those that do.
+    Returns the number of queries that ended in an error.
+    """
+    errors = 0
+    if measure_memory:
+        tracemalloc.start()
+    try:
+        for start, goal, algorithm in queries:
+            accepted = {key: value for key, value in options.items()
+                        if key in _ALGORITHM_OPTIONS.get(algorithm, ())}
+            record = run_query(graph, coordinates, start, goal, algorithm, max_time, measure_memory, **accepted)
+            errors += "error" in record
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if measure_memory:
+            tracemalloc.stop()
+    return errors
+
+
+# Per-algorithm options exposed on the command line
+_ALGORITHM_OPTIONS = {
+    "id_dfs": ("max_depth",),
+    "beam": ("width",),
+    "weighted_a_star": ("weight",),
+    "sma_star": ("max_nodes",),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Find routes without the interactive prompts, writing one JSON object per line.")
+    parser.add_argument("start", nargs="?", help="starting city (omit when using --queries)")
+    parser.add_argument("goal", nargs="?", help="goal city (omit when using --queries)")
+    parser.add_argument("-a", "--algorithm", nargs="+", dest="algorithms", default=["a_star"],
+                        metavar="NAME", help="one or more of: " + ", ".join(search_algorithms.ALGORITHMS))
+    parser.add_argument("-q", "--queries", metavar="FILE",
+                        help="file of 'start goal [algorithm ...]' lines ('-' reads standard input)")
+    parser.add_argument("--adjacencies", default="Adjacencies.txt")
+    parser.add_argument("--coordinates", default="coordinates.csv")
+    parser.add_argument("--compact", action="store_true",
+                        help="search a CompactGraph (now the default; kept for older scripts)")
+    parser.add_argument("--max-time", type=float, default=5.0, help="time limit per search, in seconds")
+    parser.add_argument("--max-depth", type=int, help="depth limit for id_dfs")
+    parser.add_argument("--width", type=int, help="beam width for beam")
+    parser.add_argument("--weight", type=float, help="heuristic weight for weighted_a_star")
+    parser.add_argument("--max-nodes", type=int, help="node budget for sma_star")
+    parser.add_argument("--no-memory", dest="measure_memory", action="store_false",
+                        help="skip tracemalloc (memory_kb is null, times are more accurate)")
+    parser.add_argument("-o", "--output", help="write to this file instead of standard output")
+    return parser
+
+
+def main(argv=None):
+    """
+    Command-line entry point (see build_parser). Returns the exit status:
+    0 when every query ran, 1 when any of them ended in an error.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.queries is None) == (args.start is None or args.goal is None):
+        parser.error("give a start and goal city, or --queries (but not both)")
+    unknown = [name for name in args.algorithms if name not in search_algorithms.ALGORITHMS]
+    if unknown:
+        parser.error("unknown algorithm: " + ", ".join(unknown))
+
+    coordinates = graph_setup.load_coordinates(args.coordinates)
+    # Labeled with its components, so unreachable goals are rejected without searching
+    graph = graph_setup.build_compact_graph(graph_setup.load_adjacencies(args.adjacencies), coordinates)
+    options = {key: value for key, value in (("max_depth", args.max_depth), ("width", args.width),
+                                             ("weight", args.weight), ("max_nodes", args.max_nodes))
+               if value is not None}
+
+    query_file = None
+    try:
+        if args.queries is None:
+            queries = [(args.start, args.goal, algorithm) for algorithm in args.algorithms]
+        elif args.queries == "-":
+            queries = read_queries(sys.stdin, args.algorithms)
+        else:
+            query_file = open(args.queries)
+            queries = read_queries(query_file, args.algorithms)
+
+        output = open(args.output, "w") if args.output else sys.stdout
+        try:
+            errors = run_queries(graph, coordinates, queries, output, args.max_time,
+                                 args.measure_memory, **options)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        if query_file is not None:
+            query_file.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+import heapq
+from array import array
+import graph_setup
+import distance_matrix
+import search_algorithms
+
+WITNESS_SETTLE_LIMIT = 500  # Nodes a witness search may settle before giving up (and adding the shortcut)
+_MAGIC = b"CHIER1\n"
+
+
+class ContractionHierarchy:
+    """
+    Preprocessed road graph for fast shortest-path queries.
+
+    rank[v] is the position of node v in the contraction order. The upward
+    graph is stored in CSR form like CompactGraph: the higher-ranked
+    neighbors of v are up_targets[up_offsets[v]:up_offsets[v + 1]], with edge
+    lengths in up_weights and, for shortcut edges, the contracted node they
+    bypass in up_middle (-1 for an original road).
+
+    'graph' is the CompactGraph the hierarchy was built from (None when it
+    is not known), and 'version' its graph version at the time.
+    """
+
+    def __init__(self, names, rank, up_offsets, up_targets, up_weights, up_middle, graph=None, version=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.rank = rank
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_weights = up_weights
+        self.up_middle = up_middle
+        self.graph = graph
+        self.version = graph_setup.graph_version(graph) if version is None else version
+
+    def __len__(self):
+        return len(self.names)
+
+    def check_current(self):
+        """
+        Raises ValueError if the graph has changed since the hierarchy was
+        built. Shortcut lengths are sums of road lengths, so any road
+        update can make them wrong; the hierarchy must be rebuilt.
+        """
+        if self.graph is not None and graph_setup.graph_version(self.graph) != self.version:
+            raise ValueError("The contraction hierarchy is out of date: the graph changed since it was built")
+
+    def upward_edges(self, node):
+        """Returns (neighbor id, edge length) pairs towards higher-ranked nodes."""
+        start, end = self.up_offsets[node], self.up_offsets[node + 1]
+        return zip(self.up_targets[start:end], self.up_weights[start:end])
+
+    def middle(self, node1, node2):
+        """Returns the node a shortcut between node1 and node2 bypasses, or -1 for a road."""
+        if self.rank[node1] > self.rank[node2]:
+            node1, node2 = node2, node1
+        for k in range(self.up_offsets[node1], self.up_offsets[node1 + 1]):
+            if self.up_targets[k] == node2:
+                return self.up_middle[k]
+        raise KeyError(f"No edge between {self.names[node1]} and {self.names[node2]}")
+
+
+def build_contraction_hierarchy(graph, coordinates=None):
+    """
+    Contracts every node of an undirected weighted graph, adding shortcut
+    edges wherever a contraction would otherwise lose a shortest path.
+
+    Accepts a CompactGraph, or a dict graph plus its coordinates (edge lengths
+    are then Haversine distances, as in a_star_search). Edges of length inf
+    (a city without coordinates) cannot be on a finite route and are dropped.
+    Nodes are ordered lazily by edge difference + deleted neighbors.
+    A CompactGraph is remembered, so queries can tell when it has changed.
+    """
+    source = graph if isinstance(graph, graph_setup.CompactGraph) else None
+    if source is None:
+        graph = graph_setup.build_compact_graph(graph, coordinates)
+
+    n = len(graph)
+    remaining = [{} for _ in range(n)]  # Uncontracted part of the graph: neighbor -> length
+    for u in range(n):
+        for v, weight in graph.edges(u):
+            if v != u and weight != float('inf') and weight < remaining[u].get(v, float('inf')):
+                remaining[u][v] = remaining[v][u] = weight
+
+    middle = {}  # (u, w) -> node a shortcut between u and w bypasses
+    deleted_neighbors = [0] * n
+    rank = array('i', [0]) * n
+    upward = [None] * n
+
+    def priority(node):
+        return len(_shortcuts(remaining, node)) - len(remaining[node]) + deleted_neighbors[node]
+
+    queue = [(priority(v), v) for v in range(n)]
+    heapq.heapify(queue)
+    order = 0
+    while queue:
+        _, v = heapq.heappop(queue)
+        # Lazy update: the priority may have changed since v was queued
+        current = priority(v)
+        if queue and current > queue[0][0]:
+            heapq.heappush(queue, (current, v))
+            continue
+
+        shortcuts = _shortcuts(remaining, v)
+        rank[v] = order
+        order += 1
+        upward[v] = remaining[v]
+        remaining[v] = {}
+        for u in upward[v]:
+            del remaining[u][v]
+            deleted_neighbors[u] += 1
+        for u, w, weight in shortcuts:
+            if weight < remaining[u].get(w, float('inf')):
+                remaining[u][w] = remaining[w][u] = weight
+                middle[(u, w)] = middle[(w, u)] = v
+
+    up_offsets = array('q', [0])
+    up_targets = array('i')
+    up_weights = array('d')
+    up_middle = array('i')
+    for v in range(n):
+        for u, weight in upward[v].items():
+            up_targets.append(u)
+            up_weights.append(weight)
+            up_middle.append(middle.get((v, u), -1))
+        up_offsets.append(len(up_targets))
+
+    return ContractionHierarchy(graph.names, rank, up_offsets, up_targets, up_weights, up_middle, source)
+
+
+def _shortcuts(remaining, node):
+    """
+    Shortcuts (u, w, length) needed if 'node' were contracted now:
+    one for every neighbor pair whose only shortest connection runs through it.
+    """
+    neighbors = list(remaining[node].items())
+    shortcuts = []
+    for i, (u, to_node) in enumerate(neighbors):
+        via = {w: to_node + from_node for w, from_node in neighbors[i + 1:]}
+        if not via:
+            continue
+        witness = _witness_search(remaining, u, node, via, max(via.values()))
+        for w, length in via.items():
+            if witness.get(w, float('inf')) > length:
+                shortcuts.append((u, w, length))
+    return shortcuts
+
+
+def _witness_search(remaining, source, excluded, targets, limit):
+    """
+    Dijkstra from 'source' that avoids 'excluded', stopping past 'limit',
+    once every target is settled, or after WITNESS_SETTLE_LIMIT nodes.
+    Unsettled distances are upper bounds, which at worst adds a spare shortcut.
+    """
+    dist = {source: 0.0}
+    queue = [(0.0, source)]
+    settled = 0
+    left = len(targets)
+    while queue and settled < WITNESS_SETTLE_LIMIT:
+        d, u = heapq.heappop(queue)
+        if d > dist[u]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        if u in targets:
+            left -= 1
+            if left == 0:
+                break
+        for v, weight in remaining[u].items():
+            if v == excluded:
+                continue
+            new_d = d + weight
+            if new_d < dist.get(v, float('inf')):
+                dist[v] = new_d
+                heapq.heappush(queue, (new_d, v))
+    return dist
+
+
+def ch_search(ch, start, goal, max_time=5.0, deadline=None):
+    """
+    Shortest route on a ContractionHierarchy,
+    returning (path, cost) like a_star_search, or (None, float('inf')).
+
+    Runs Dijkstra upwards from both ends and unpacks the shortcuts on the
+    best meeting path back into the full list of cities. Takes a
+    search_algorithms.Deadline as 'deadline', like the other searches.
+    Raises ValueError if the graph has changed since 'ch' was built.
+    """
+    ch.check_current()
+    if deadline is None:
+        deadline = search_algorithms.Deadline(max_time)
+    s, t = ch.index.get(start), ch.index.get(goal)
+    if s is None or t is None:
+        if start == goal:
+            return [start], 0
+        return None, float('inf')
+
+    expired = deadline.expired
+    dist = ({s: 0.0}, {t: 0.0})
+    parents = ({s: None}, {t: None})
+    queues = [[(0.0, s)], [(0.0, t)]]
+    best, meeting = float('inf'), None
+
+    while queues[0] or queues[1]:
+        if expired():
+            return None, float('inf')
+
+        # Advance whichever side has the smaller key
+        if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]):
+            side = 0
+        else:
+            side = 1
+        d, u = heapq.heappop(queues[side])
+        if d > dist[side][u]:
+            continue  # Stale entry
+        if d >= best:
+            queues[side].clear()  # Nothing left on this side can improve the route
+            continue
+
+        other = dist[1 - side].get(u)
+        if other is not None and d + other < best:
+            best, meeting = d + other, u
+
+        for v, weight in ch.upward_edges(u):
+            new_d = d + weight
+            if new_d < dist[side].get(v, float('inf')):
+                dist[side][v] = new_d
+                parents[side][v] = u
+                heapq.heappush(queues[side], (new_d, v))
+
+    if meeting is None:
+        return None, float('inf')
+
+    # Upward path s -> meeting, then meeting -> t
+    hops = _chain(parents[0], meeting)[::-1] + _chain(parents[1], meeting)[1:]
+    path = [hops[0]]
+    for a, b in zip(hops, hops[1:]):
+        _unpack_edge(ch, a, b, path)
+    return [ch.names[node] for node in path], best
+
+
+def _chain(parents, node):
+    chain = [node]
+    while parents[node] is not None:
+        node = parents[node]
+        chain.append(node)
+    return chain
+
+
+def _unpack_edge(ch, a, b, path):
+    """
+    Appends the original road nodes from a (exclusive) to b (inclusive) to path.
+    """
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        m = ch.middle(a, b)
+        if m < 0:
+            path.append(b)
+        else:
+            stack.append((m, b))
+            stack.append((a, m))
+
+
+def ch_many_to_many(ch, sources, targets):
+    """
+    Bucket-based many-to-many distance matrix on a ContractionHierarchy:
+    matrix[i][j] is the road distance from sources[i] to targets[j]
+    (inf when unreachable), as a distance_matrix.new_matrix.
+
+    One upward search per target leaves (target, distance) entries in a
+    bucket at every node it reaches; one upward search per source then scans
+    the buckets of the nodes it reaches. Every shortest path has a highest
+    node that both searches reach, so the minimum over buckets is exact.
+    Raises ValueError if the graph has changed since 'ch' was built.
+    """
+    ch.check_current()
+    sources, targets = list(sources), list(targets)
+    matrix = distance_matrix.new_matrix(len(sources), len(targets))
+
+    buckets = {}  # node -> [(target column, distance from the target)]
+    for j, target in enumerate(targets):
+        node = ch.index.get(target)
+        if node is not None:
+            for v, d in _upward_search(ch, node).items():
+                buckets.setdefault(v, []).append((j, d))
+
+    for i, source in enumerate(sources):
+        node = ch.index.get(source)
+        if node is None:
+            continue
+        row = matrix[i]
+        for v, d in _upward_search(ch, node).items():
+            for j, to_target in buckets.get(v, ()):
+                if d + to_target < row[j]:
+                    row[j] = d + to_target
+    return matrix
+
+
+def _upward_search(ch, source):
+    """Dijkstra over upward edges only; returns {node id: distance}."""
+    dist = {source: 0.0}
+    queue = [(0.0, source)]
+    while queue:
+        d, u = heapq.heappop(queue)
+        if d > dist[u]:
+            continue
+        for v, weight in ch.upward_edges(u):
+            new_d = d + weight
+            if new_d < dist.get(v, float('inf')):
+                dist[v] = new_d
+                heapq.heappush(queue, (new_d, v))
+    return dist
+
+
+def save_contraction_hierarchy(ch, file_path):
+    """
+    Writes the hierarchy to 'file_path' (see graph_setup.save_arrays).
+    """
+    arrays = [ch.rank, ch.up_offsets, ch.up_targets, ch.up_weights, ch.up_middle]
+    graph_setup.save_arrays(file_path, _MAGIC, {"names": ch.names, "version": ch.version}, arrays)
+
+
+def load_contraction_hierarchy(file_path, graph=None):
+    """
+    Reads a hierarchy written by save_contraction_hierarchy. Pass the graph
+    it was built for as 'graph' to have queries check that it is unchanged
+    (its version must match the one saved).
+    """
+    header, arrays = graph_setup.load_arrays(file_path, _MAGIC)
+    return ContractionHierarchy(header["names"], *arrays, graph=graph, version=header.get("version", 0))
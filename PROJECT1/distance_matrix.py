@@ -0,0 +1,48 @@
+import search_algorithms
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; matrices are then nested lists
+    np = None
+
+
+def new_matrix(rows, cols, fill=float('inf')):
+    """
+    rows x cols matrix filled with 'fill': a NumPy array when NumPy is
+    installed, a list of lists otherwise (both index as matrix[i][j]).
+    """
+    if np is not None:
+        return np.full((rows, cols), fill)
+    return [[fill] * cols for _ in range(rows)]
+
+
+def many_to_many(graph, sources, targets, coordinates=None, return_trees=False):
+    """
+    Shortest-path distance matrix between two city lists: matrix[i][j] is
+    the road distance from sources[i] to targets[j] (inf when unreachable).
+
+    Runs one dijkstra_one_to_many per source, each stopping as soon as every
+    target is settled. Since the road graph is undirected, the searches run
+    from whichever side is smaller. With return_trees=True the result is
+    (matrix, trees), where trees[i] is the ShortestPathTree (predecessor tree)
+    of sources[i]; the searches then always run from the sources.
+    """
+    sources, targets = list(sources), list(targets)
+    matrix = new_matrix(len(sources), len(targets))
+    transpose = not return_trees and len(targets) < len(sources)
+    origins, destinations = (targets, sources) if transpose else (sources, targets)
+
+    trees = []
+    for i, origin in enumerate(origins):
+        tree = search_algorithms.dijkstra_one_to_many(graph, origin, coordinates, destinations)
+        for j, destination in enumerate(destinations):
+            if transpose:
+                matrix[j][i] = tree.distance(destination)
+            else:
+                matrix[i][j] = tree.distance(destination)
+        if return_trees:
+            trees.append(tree)
+
+    if return_trees:
+        return matrix, trees
+    return matrix
@@ -1,5 +1,27 @@
 import csv
+import heapq
+import json
 import math
+import mmap
+import struct
+import sys
+import tempfile
+from array import array
+from collections import OrderedDict, deque, namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the batch helpers fall back to plain loops
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+HEURISTIC_CACHE_SIZE = 16  # Number of goals whose heuristic tables CompactGraph keeps
+CHANGE_LOG_SIZE = 4096  # Edge changes CompactGraph remembers for incremental repair (see changes_since)
+COMPACT_AFTER = 0.05  # Fold overridden rows back into the CSR arrays past this fraction of nodes
+SPILL_BLOCK = 65536  # Edges read back at a time from each run stream_compact_graph spilled to disk
+
+# One road change: node ids, and the length before and after (inf = no road)
+EdgeChange = namedtuple("EdgeChange", ["version", "node1", "node2", "old_weight", "new_weight"])
 
 def load_coordinates(file_path):
     coordinates = {}
@@ -43,16 +65,990 @@ def haversine_distance(city1, city2, coordinates):
     if city1 not in coordinates or city2 not in coordinates:
         return float('inf')  # Return large value if city not found
 
-    R = 6371.0  # Earth radius in km
     lat1, lon1 = coordinates[city1]
     lat2, lon2 = coordinates[city2]
 
     # Convert degrees to radians
     lat1, lon1 = math.radians(lat1), math.radians(lon1)
     lat2, lon2 = math.radians(lat2), math.radians(lon2)
+    return haversine_radians(lat1, lon1, lat2, lon2)
+
 
+def haversine_radians(lat1, lon1, lat2, lon2):
+    """
+    Haversine distance (in km) between two points already given in radians.
+    """
     dlat = lat2 - lat1
     dlon = lon2 - lon1
     a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+    return EARTH_RADIUS_KM * c
+
+
+# ---------------------------------------------------------------------------
+# Batch Haversine
+#
+# These return NumPy arrays when NumPy is installed, and nested lists of floats
+# otherwise. Cities missing from 'coordinates' get distance inf, like
+# haversine_distance.
+# ---------------------------------------------------------------------------
+
+def _radian_vectors(cities, coordinates):
+    lat = np.full(len(cities), np.nan)
+    lon = np.full(len(cities), np.nan)
+    for i, city in enumerate(cities):
+        if city in coordinates:
+            lat[i], lon[i] = coordinates[city]
+    return np.radians(lat), np.radians(lon)
+
+
+def _haversine_vectors(lat1, lon1, lat2, lon2):
+    """
+    Vectorized haversine_radians; the arguments broadcast like NumPy arrays.
+    """
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    distances = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    distances[np.isnan(distances)] = np.inf
+    return distances
+
+
+def haversine_one_to_many(city, cities, coordinates):
+    """
+    Distances (km) from 'city' to each city in 'cities', in order.
+    """
+    cities = list(cities)
+    if np is None:
+        return [haversine_distance(city, other, coordinates) for other in cities]
+
+    lat1, lon1 = _radian_vectors([city], coordinates)
+    lat2, lon2 = _radian_vectors(cities, coordinates)
+    return _haversine_vectors(lat1, lon1, lat2, lon2)
+
+
+def haversine_many_to_many(sources, targets, coordinates):
+    """
+    len(sources) x len(targets) matrix of distances (km), row i for sources[i].
+    """
+    sources, targets = list(sources), list(targets)
+    if np is None:
+        return [[haversine_distance(source, target, coordinates) for target in targets]
+                for source in sources]
+
+    lat1, lon1 = _radian_vectors(sources, coordinates)
+    lat2, lon2 = _radian_vectors(targets, coordinates)
+    return _haversine_vectors(lat1[:, None], lon1[:, None], lat2[None, :], lon2[None, :])
+
+
+def haversine_matrix(coordinates, cities=None):
+    """
+    Full N x N distance matrix (km) over 'cities'
+    (default: every city in 'coordinates', in file order).
+    """
+    if cities is None:
+        cities = list(coordinates.keys())
+    return haversine_many_to_many(cities, cities, coordinates)
+
+
+def path_distance(path, coordinates):
+    """
+    Total Haversine length (km) of a path given as a list of cities.
+    """
+    if len(path) < 2:
+        return 0.0
+    if np is None:
+        return sum(haversine_distance(a, b, coordinates) for a, b in zip(path, path[1:]))
+
+    lat, lon = _radian_vectors(path, coordinates)
+    return float(_haversine_vectors(lat[:-1], lon[:-1], lat[1:], lon[1:]).sum())
+
+
+class CompactGraph:
+    """
+    Integer-indexed graph in CSR (compressed sparse row) form.
+
+    City names are interned to ids 0..N-1. The neighbors of node i are
+    targets[offsets[i]:offsets[i + 1]], and coordinates live in the parallel
+    float arrays lat/lon (NaN when a city has no coordinates). The arrays are
+    plain array.array buffers, so numpy.frombuffer can view them without a copy.
+
+    The graph is weighted: weights[k] is the Haversine length (km) of the edge
+    stored at targets[k], computed once when the graph is built. Coordinates are
+    also kept in radians (lat_rad/lon_rad), and heuristic_table() caches the
+    straight-line distances to recently used goals, so the informed searches do
+    no redundant trig.
+
+    For convenience the graph also answers name-based lookups like the dict
+    returned by load_adjacencies (graph["Anthony"], "Anthony" in graph, keys()).
+
+    'version' starts at 0 and is bumped whenever the graph changes, so caches
+    built on top of it can tell when they are stale (see graph_version).
+    Roads can be added, removed and re-weighted at runtime (add_edge,
+    remove_edge, set_edge_weight). A re-weighted road is updated in place; a
+    node whose neighbor list changes gets its row overridden in a small
+    per-node table until compact() folds the overrides back into the CSR
+    arrays. The latest changes are logged so dependent structures can repair
+    themselves instead of being rebuilt (see changes_since).
+
+    Any of the arrays may also be a memoryview, e.g. over a memory-mapped
+    snapshot file (see load_snapshot).
+    """
+
+    def __init__(self, names, offsets, targets, lat=None, lon=None, weights=None,
+                 lat_rad=None, lon_rad=None):
+        self.names = names if isinstance(names, (list, StringTable)) else list(names)
+        self._index = None
+        self.offsets = offsets
+        self.targets = targets
+        n = len(self.names)
+        self.lat = lat if lat is not None else array('d', [math.nan]) * n
+        self.lon = lon if lon is not None else array('d', [math.nan]) * n
+        self.lat_rad = lat_rad if lat_rad is not None else array('d', map(math.radians, self.lat))
+        self.lon_rad = lon_rad if lon_rad is not None else array('d', map(math.radians, self.lon))
+        self.weights = weights if weights is not None else self._edge_lengths()
+        self._heuristic_cache = OrderedDict()
+        self._rows = {}  # node id -> (targets, weights) overriding its CSR row
+        self.components = None  # ComponentLabels, once label_components() has run
+        self.changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self.version = 0
+
+    @property
+    def index(self):
+        """City name -> id, built on first use."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index
+
+    def label_components(self):
+        """
+        Labels the connected components (see connected_components) and
+        returns the ComponentLabels, which the road updates then keep up to
+        date. The loaders call this, so searches can reject unreachable
+        goals up front.
+        """
+        self.components = connected_components(self)
+        return self.components
+
+    def _edge_lengths(self):
+        if np is not None:
+            degrees = np.diff(np.frombuffer(self.offsets, dtype=np.int64))
+            sources = np.repeat(np.arange(len(self.names)), degrees)
+            targets = np.frombuffer(self.targets, dtype=np.int32)
+            lat, lon = np.frombuffer(self.lat_rad), np.frombuffer(self.lon_rad)
+            return array('d', _haversine_vectors(lat[sources], lon[sources], lat[targets], lon[targets]))
+
+        weights = array('d', [0.0]) * len(self.targets)
+        for node in range(len(self.names)):
+            for k in range(self.offsets[node], self.offsets[node + 1]):
+                weights[k] = self.distance(node, self.targets[k])
+        return weights
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, city):
+        return city in self.index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __getitem__(self, city):
+        return [self.names[j] for j in self.neighbors(self.index[city])]
+
+    def get(self, city, default=None):
+        if city not in self.index:
+            return default
+        return self[city]
+
+    def keys(self):
+        return list(self.names)
+
+    def id_of(self, city):
+        """Returns the integer id of a city, or None if it is not in the graph."""
+        return self.index.get(city)
+
+    def neighbors(self, node):
+        """Returns the neighbor ids of node id 'node'."""
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def edges(self, node):
+        """Returns (neighbor id, edge length) pairs for node id 'node'."""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    # While rows are overridden, these shadow neighbors/edges on the instance,
+    # so an unmodified graph pays nothing for the override lookup.
+    def _neighbors_with_overrides(self, node):
+        row = self._rows.get(node)
+        if row is not None:
+            return row[0]
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def _edges_with_overrides(self, node):
+        row = self._rows.get(node)
+        if row is not None:
+            return zip(*row)
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def csr(self):
+        """
+        (offsets, targets) for loops that read neighbor rows straight out of
+        the CSR arrays, or None while road updates override some rows
+        (compact() folds them back in).
+        """
+        if self._rows:
+            return None
+        return self.offsets, self.targets
+
+    def edge_count(self):
+        """Number of directed edges (each road counts twice)."""
+        return len(self.targets) + sum(len(targets) - (self.offsets[node + 1] - self.offsets[node])
+                                       for node, (targets, _) in self._rows.items())
+
+    def set_edge_weight(self, city1, city2, weight):
+        """
+        Sets the length (km) of the road between two cities, in both
+        directions. Raises KeyError if there is no such road, and ValueError
+        for a length shorter than the straight line between the cities,
+        which would make the straight-line heuristics inadmissible.
+        inf keeps the road but makes it impassable for weighted searches.
+        """
+        u, v = self._ids(city1, city2)
+        old = self._edge_weight(u, v)
+        if old is None:
+            raise KeyError(f"No road between {city1} and {city2}")
+        self._check_weight(u, v, weight)
+        for a, b in ((u, v), (v, u)):
+            row = self._rows.get(a)
+            if row is not None:
+                targets, weights = row
+                for k in range(len(targets)):
+                    if targets[k] == b:
+                        weights[k] = weight
+                continue
+            if getattr(self.weights, "readonly", False):
+                self.weights = array('d', self.weights)  # e.g. a read-only snapshot mapping
+            for k in range(self.offsets[a], self.offsets[a + 1]):
+                if self.targets[k] == b:
+                    self.weights[k] = weight
+        self._changed(u, v, old, weight)
+
+    def add_edge(self, city1, city2, weight=None):
+        """
+        Adds a road between two cities (both directions), with the given
+        length or, by default, their straight-line distance. An existing
+        road just gets the new length.
+        """
+        u, v = self._ids(city1, city2)
+        if weight is None:
+            weight = self.distance(u, v)
+        if self._edge_weight(u, v) is not None:
+            self.set_edge_weight(city1, city2, weight)
+            return
+        self._check_weight(u, v, weight)
+        for a, b in ((u, v), (v, u)) if u != v else ((u, v),):
+            targets, weights = self._row(a)
+            targets.append(b)
+            weights.append(weight)
+        if self.components is not None:
+            self.components.join(self, u, v)
+        self._changed(u, v, float('inf'), weight)
+
+    def remove_edge(self, city1, city2):
+        """Removes the road between two cities (both directions); KeyError if there is none."""
+        u, v = self._ids(city1, city2)
+        old = self._edge_weight(u, v)
+        if old is None:
+            raise KeyError(f"No road between {city1} and {city2}")
+        for a, b in ((u, v), (v, u)):
+            targets, weights = self._row(a)
+            keep = [k for k in range(len(targets)) if targets[k] != b]
+            self._rows[a] = (array('i', (targets[k] for k in keep)), array('d', (weights[k] for k in keep)))
+        if self.components is not None:
+            self.components.split(self, u, v)
+        self._changed(u, v, old, float('inf'))
+
+    def changes_since(self, version):
+        """
+        EdgeChanges made after 'version', oldest first, or None when the
+        log no longer reaches back that far (the caller must rebuild).
+        """
+        if version == self.version:
+            return []
+        if (not self.changes or self.changes[0].version > version + 1
+                or self.changes[-1].version != self.version):  # Bumped by hand: changes unknown
+            return None
+        return [change for change in self.changes if change.version > version]
+
+    def compact(self):
+        """
+        Folds the overridden rows back into fresh CSR arrays, so lookups
+        take the fast path again. The graph itself does not change, so the
+        version stays the same.
+        """
+        if not self._rows:
+            return
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = array('d')
+        for node in range(len(self.names)):
+            row = self._rows.get(node)
+            if row is None:
+                start, end = self.offsets[node], self.offsets[node + 1]
+                row = (self.targets[start:end], self.weights[start:end])
+            targets.extend(row[0])
+            weights.extend(row[1])
+            offsets.append(len(targets))
+        self.offsets, self.targets, self.weights = offsets, targets, weights
+        self._rows = {}
+        del self.neighbors, self.edges
+
+    def _ids(self, city1, city2):
+        u, v = self.index.get(city1), self.index.get(city2)
+        if u is None or v is None:
+            raise KeyError(city1 if u is None else city2)
+        return u, v
+
+    def _edge_weight(self, u, v):
+        """Length of the road u -> v (the shortest, if there are several), or None."""
+        lengths = [weight for neighbor, weight in self.edges(u) if neighbor == v]
+        return min(lengths) if lengths else None
+
+    def _check_weight(self, u, v, weight):
+        straight = self.distance(u, v)  # inf when a city has no coordinates: nothing to check
+        if math.isnan(weight) or (straight != float('inf') and weight < straight * (1 - 1e-9)):
+            raise ValueError(f"Road length {weight} is shorter than the straight-line distance "
+                             f"between {self.names[u]} and {self.names[v]}")
+
+    def _row(self, node):
+        """The writable override row of 'node', copied from the CSR arrays on first use."""
+        row = self._rows.get(node)
+        if row is None:
+            start, end = self.offsets[node], self.offsets[node + 1]
+            row = (array('i', self.targets[start:end]), array('d', self.weights[start:end]))
+            if not self._rows:
+                self.neighbors = self._neighbors_with_overrides
+                self.edges = self._edges_with_overrides
+            self._rows[node] = row
+        return row
+
+    def _changed(self, u, v, old_weight, new_weight):
+        self.version += 1
+        self.changes.append(EdgeChange(self.version, u, v, old_weight, new_weight))
+        if len(self._rows) > COMPACT_AFTER * len(self.names) + 64:
+            self.compact()
+
+    def distance(self, node1, node2):
+        """
+        Haversine distance (km) between two node ids,
+        or inf if either has no coordinates (like haversine_distance).
+        """
+        lat1, lat2 = self.lat_rad[node1], self.lat_rad[node2]
+        if math.isnan(lat1) or math.isnan(lat2):
+            return float('inf')
+        return haversine_radians(lat1, self.lon_rad[node1], lat2, self.lon_rad[node2])
+
+    def heuristic_table(self, goal, precompute=False):
+        """
+        Returns the table of straight-line distances from every node id to
+        node id 'goal'. Entries are filled lazily by the searches (-1.0 marks
+        "not computed yet"), and tables for the most recent goals are kept,
+        so repeated queries towards the same goal reuse earlier work.
+        With precompute=True (and NumPy installed) a new table is filled for
+        every node in one vectorized pass instead.
+        """
+        table = self._heuristic_cache.pop(goal, None)
+        if table is None and precompute and np is not None:
+            lat, lon = np.frombuffer(self.lat_rad), np.frombuffer(self.lon_rad)
+            table = array('d', _haversine_vectors(lat, lon, lat[goal], lon[goal]))
+        elif table is None:
+            table = array('d', [-1.0]) * len(self.names)
+        self._heuristic_cache[goal] = table
+        while len(self._heuristic_cache) > HEURISTIC_CACHE_SIZE:
+            self._heuristic_cache.popitem(last=False)
+        return table
+
+    def adjacency_by_id(self):
+        """Id-keyed adjacency view with the dict-style get() the searches use."""
+        return _IdAdjacency(self)
+
+
+class _IdAdjacency:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def get(self, node, default=None):
+        if 0 <= node < len(self.graph.names):
+            return self.graph.neighbors(node)
+        return default
+
+
+class LoadReport:
+    """
+    What stream_compact_graph saw: line and road counts, repeated roads
+    dropped (a road given three times counts 2, whichever way round its
+    cities are), and up to MAX_REPORTED_LINES malformed lines as
+    (file path, line number, text); malformed_count counts all of them.
+    """
+    MAX_REPORTED_LINES = 1000
+
+    def __init__(self):
+        self.lines = 0
+        self.edges = 0
+        self.duplicate_edges = 0
+        self.malformed_count = 0
+        self.malformed = []
+
+    def add_malformed(self, file_path, line_number, text):
+        self.malformed_count += 1
+        if len(self.malformed) < self.MAX_REPORTED_LINES:
+            self.malformed.append((file_path, line_number, text))
+
+    def __repr__(self):
+        return (f"LoadReport(lines={self.lines}, edges={self.edges}, "
+                f"duplicate_edges={self.duplicate_edges}, malformed={self.malformed_count})")
+
+
+def stream_compact_graph(adjacency_path, coordinates_path=None, chunk_size=1000000):
+    """
+    Builds a weighted CompactGraph from adjacency/coordinate files of any
+    size, returning (graph, LoadReport).
+
+    Each adjacency line is "city1 city2" or "city1 city2 length_km". Edges
+    are packed into int64 keys, and every 'chunk_size' lines they are
+    sorted, deduplicated and spilled to a temporary file; the runs are then
+    merged back a block at a time straight into the CSR arrays. Besides the
+    graph itself, memory holds one chunk, the city names and the
+    coordinates file. Repeated roads are kept once (with the shortest given
+    length); roads without a length get their Haversine length, and a road
+    from a city to itself is kept as a single entry. Lines that cannot be
+    parsed, and lengths shorter than the straight-line distance (which
+    would make the A* heuristics overestimate), are recorded in the report
+    and skipped. Node ids follow first appearance in the file, and each
+    node's neighbors are ordered by id.
+    """
+    report = LoadReport()
+    coordinates = {}
+    if coordinates_path:
+        with open(coordinates_path, newline='') as csvfile:
+            for line_number, row in enumerate(csv.reader(csvfile), 1):
+                report.lines += 1
+                try:
+                    coordinates[row[0]] = (float(row[1]), float(row[2]))
+                except (IndexError, ValueError):
+                    report.add_malformed(coordinates_path, line_number, ",".join(row))
+
+    index = {}
+    names = []
+    spilled = []  # Temporary files holding sorted, deduplicated runs, with their lengths
+    keys, lengths = array('q'), array('d')
+
+    def intern(city):
+        node = index.get(city)
+        if node is None:
+            node = index[city] = len(names)
+            names.append(city)
+        return node
+
+    try:
+        with open(adjacency_path, 'r') as file:
+            for line_number, line in enumerate(file, 1):
+                report.lines += 1
+                fields = line.split()
+                if not fields:
+                    continue
+                if len(fields) not in (2, 3):
+                    report.add_malformed(adjacency_path, line_number, line.rstrip("\n"))
+                    continue
+                length = math.nan  # Filled in from coordinates later
+                if len(fields) == 3:
+                    try:
+                        length = float(fields[2])
+                    except ValueError:
+                        length = -1.0
+                    straight = haversine_distance(fields[0], fields[1], coordinates)
+                    if not length >= 0 or (straight != float('inf') and length < straight * (1 - 1e-9)):
+                        report.add_malformed(adjacency_path, line_number, line.rstrip("\n"))
+                        continue
+
+                u, v = intern(fields[0]), intern(fields[1])
+                # Bidirectional connection
+                keys.append(u << 32 | v)
+                lengths.append(length)
+                if u != v:
+                    keys.append(v << 32 | u)
+                    lengths.append(length)
+                if len(keys) >= 2 * chunk_size:
+                    spilled.append(_spill_run(keys, lengths, report))
+                    keys, lengths = array('q'), array('d')
+
+        n = len(names)
+        offsets = array('q', [0]) * (n + 1)
+        targets = array('i')
+        weights = array('d')
+        runs = [_read_run(*run) for run in spilled]
+        runs.append(zip(*_sorted_run(keys, lengths, report)))
+        del keys, lengths
+        for key, length in _unique_edges(heapq.merge(*runs), report):
+            u, v = key >> 32, key & 0xFFFFFFFF
+            offsets[u + 1] += 1
+            targets.append(v)
+            weights.append(length)
+            if u <= v:
+                report.edges += 1
+    finally:
+        for run_file, _ in spilled:
+            run_file.close()
+    for node in range(n):
+        offsets[node + 1] += offsets[node]
+
+    lat = array('d', [math.nan]) * n
+    lon = array('d', [math.nan]) * n
+    for node, city in enumerate(names):
+        if city in coordinates:
+            lat[node], lon[node] = coordinates[city]
+    del coordinates
+
+    graph = CompactGraph(names, offsets, targets, lat, lon, weights)
+    graph._index = index
+    # Roads given without a length: measure them
+    for node in range(n):
+        for k in range(offsets[node], offsets[node + 1]):
+            if math.isnan(weights[k]):
+                weights[k] = graph.distance(node, targets[k])
+    graph.label_components()
+    return graph, report
+
+
+def _sorted_run(keys, lengths, report):
+    """Sorts one chunk of (key, length) edges, merging repeats (see _unique_edges)."""
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    run_keys, run_lengths = array('q'), array('d')
+    for key, length in _unique_edges(((keys[i], lengths[i]) for i in order), report):
+        run_keys.append(key)
+        run_lengths.append(length)
+    return run_keys, run_lengths
+
+
+def _unique_edges(edges, report):
+    """
+    Yields sorted (key, length) edges with repeats merged, keeping the
+    shortest known length (NaN = unknown). Each repeated road is counted
+    once in the report, on the entry whose first city has the lower id.
+    """
+    previous = best = None
+    for key, length in edges:
+        if key == previous:
+            if key >> 32 <= key & 0xFFFFFFFF:
+                report.duplicate_edges += 1
+            if length < best or math.isnan(best):
+                best = length
+            continue
+        if previous is not None:
+            yield previous, best
+        previous, best = key, length
+    if previous is not None:
+        yield previous, best
+
+
+def _spill_run(keys, lengths, report):
+    """
+    Writes one sorted chunk (see _sorted_run) to a temporary file, keys
+    then lengths; returns (file, number of edges) for _read_run.
+    """
+    run_keys, run_lengths = _sorted_run(keys, lengths, report)
+    run_file = tempfile.TemporaryFile()
+    run_keys.tofile(run_file)
+    run_lengths.tofile(run_file)
+    return run_file, len(run_keys)
+
+
+def _read_run(run_file, count):
+    """Yields the (key, length) edges of a spilled run, SPILL_BLOCK at a time."""
+    for start in range(0, count, SPILL_BLOCK):
+        size = min(SPILL_BLOCK, count - start)
+        keys, lengths = array('q'), array('d')
+        run_file.seek(keys.itemsize * start)
+        keys.fromfile(run_file, size)
+        run_file.seek(keys.itemsize * count + lengths.itemsize * start)
+        lengths.fromfile(run_file, size)
+        yield from zip(keys, lengths)
+
+
+def graph_version(graph):
+    """
+    Version number of a graph: CompactGraph.version, or 0 for a dict graph
+    (dict graphs are treated as immutable once loaded).
+    """
+    return getattr(graph, "version", 0)
+
+
+class ComponentLabels:
+    """
+    Connected-component label of every city, from connected_components.
+
+    connected(a, b) is False when no route can exist: the cities are in
+    different components, or one of them is not in the graph. Roads are
+    treated as undirected, so on a one-way graph True only means "maybe".
+    For a CompactGraph, labels is an array indexed by node id (id_of maps
+    a city to its id), and join/split repair it after a road is added or
+    removed by relabeling only the smaller of the components involved.
+    """
+
+    def __init__(self, labels, id_of=None):
+        self.labels = labels
+        self.id_of = id_of
+        self._sizes = None
+
+    @property
+    def sizes(self):
+        """Number of cities with each label, counted on first use."""
+        if self._sizes is None:
+            labels = self.labels.values() if self.id_of is None else self.labels
+            self._sizes = [0] * (max(labels, default=-1) + 1)
+            for label in labels:
+                self._sizes[label] += 1
+        return self._sizes
+
+    @property
+    def count(self):
+        """Number of components."""
+        return sum(1 for size in self.sizes if size)
+
+    def label(self, city):
+        """Component label of 'city', or None if it is not in the graph."""
+        if self.id_of is None:
+            return self.labels.get(city)
+        node = self.id_of(city)
+        return None if node is None else self.labels[node]
+
+    def connected(self, city1, city2):
+        label = self.label(city1)
+        return label is not None and label == self.label(city2)
+
+    def join(self, graph, u, v):
+        """Repairs the labels after a road between node ids u and v was added to 'graph'."""
+        labels = self._writable_labels()
+        if labels[u] == labels[v]:
+            return
+        if self.sizes[labels[u]] > self.sizes[labels[v]]:
+            u, v = v, u
+        old, new = labels[u], labels[v]
+        self.sizes[new] += self.sizes[old]
+        self.sizes[old] = 0
+        self._relabel(graph, u, old, new)
+
+    def split(self, graph, u, v):
+        """
+        Repairs the labels after the road between node ids u and v was
+        removed from 'graph'. Searches outward from both ends in turn; if
+        the searches meet, nothing changed, otherwise the side that ran out
+        first has become its own component.
+        """
+        if u == v:
+            return
+        sides = ({u}, {v})
+        queues = (deque([u]), deque([v]))
+        while queues[0] and queues[1]:
+            for side in (0, 1):
+                node = queues[side].popleft()
+                for neighbor in graph.neighbors(node):
+                    if neighbor in sides[1 - side]:
+                        return  # Still connected
+                    if neighbor not in sides[side]:
+                        sides[side].add(neighbor)
+                        queues[side].append(neighbor)
+                if not queues[side]:
+                    break
+        smaller = sides[0] if not queues[0] else sides[1]
+        labels = self._writable_labels()
+        old, new = labels[u], len(self.sizes)
+        self.sizes.append(len(smaller))
+        self.sizes[old] -= len(smaller)
+        for node in smaller:
+            labels[node] = new
+
+    def _writable_labels(self):
+        if getattr(self.labels, "readonly", False):
+            self.labels = array('i', self.labels)  # e.g. a read-only snapshot mapping
+        return self.labels
+
+    def _relabel(self, graph, start, old, new):
+        labels = self.labels
+        labels[start] = new
+        stack = [start]
+        while stack:
+            for neighbor in graph.neighbors(stack.pop()):
+                if labels[neighbor] == old:
+                    labels[neighbor] = new
+                    stack.append(neighbor)
+
+
+def connected_components(graph):
+    """
+    Labels the connected components of a dict graph or CompactGraph with
+    union-find over its edges and returns a ComponentLabels.
+    """
+    if isinstance(graph, CompactGraph):
+        n = len(graph)
+        pairs = ((u, v) for u in range(n) for v in graph.neighbors(u) if u < v)
+        return ComponentLabels(_union_find(n, pairs), graph.id_of)
+
+    names = list(graph)
+    index = {name: i for i, name in enumerate(names)}
+    for neighbors in graph.values():
+        for neighbor in neighbors:
+            if neighbor not in index:
+                index[neighbor] = len(names)
+                names.append(neighbor)
+    pairs = ((index[city], index[neighbor]) for city, neighbors in graph.items() for neighbor in neighbors)
+    labels = _union_find(len(names), pairs)
+    return ComponentLabels({name: labels[i] for i, name in enumerate(names)})
+
+
+def _union_find(n, pairs):
+    """Component labels 0..k-1 for nodes 0..n-1 joined by the (u, v) pairs."""
+    parent = list(range(n))
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:  # Path compression
+            parent[node], node = root, parent[node]
+        return root
+
+    for u, v in pairs:
+        root_u, root_v = find(u), find(v)
+        if root_u != root_v:
+            parent[root_u] = root_v
+
+    labels = array('i', [0]) * n
+    roots = {}
+    for node in range(n):
+        labels[node] = roots.setdefault(find(node), len(roots))
+    return labels
+
+
+def changes_since(graph, version):
+    """
+    Edge changes made to 'graph' after 'version' (see CompactGraph.changes_since);
+    always [] for a dict graph.
+    """
+    if isinstance(graph, CompactGraph):
+        return graph.changes_since(version)
+    return []
+
+
+def build_compact_graph(graph, coordinates=None):
+    """
+    Converts a dict graph (as returned by load_adjacencies) into a weighted
+    CompactGraph. Node ids follow the dict's insertion order, so neighbor order
+    is preserved. Edges touching a city without coordinates get weight inf.
+    """
+    names = list(graph.keys())
+    index = {name: i for i, name in enumerate(names)}
+    for neighbors in graph.values():
+        for neighbor in neighbors:
+            if neighbor not in index:
+                index[neighbor] = len(names)
+                names.append(neighbor)
+
+    offsets = array('q', [0])
+    targets = array('i')
+    for name in names:
+        targets.extend(index[neighbor] for neighbor in graph.get(name, []))
+        offsets.append(len(targets))
+
+    lat = array('d', [math.nan]) * len(names)
+    lon = array('d', [math.nan]) * len(names)
+    if coordinates:
+        for i, name in enumerate(names):
+            if name in coordinates:
+                lat[i], lon[i] = coordinates[name]
+
+    graph = CompactGraph(names, offsets, targets, lat, lon)
+    graph.label_components()
+    return graph
+
+
+def load_compact_graph(adjacency_path, coordinates_path=None):
+    """
+    Loads Adjacencies.txt (and optionally coordinates.csv) into a weighted CompactGraph.
+    """
+    coordinates = load_coordinates(coordinates_path) if coordinates_path else None
+    return build_compact_graph(load_adjacencies(adjacency_path), coordinates)
+
+
+# ---------------------------------------------------------------------------
+# Array files: a magic line, a length-prefixed JSON header, then raw
+# little-endian array.array buffers. Used for preprocessed data
+# (contraction hierarchies, landmark tables).
+# ---------------------------------------------------------------------------
+
+def save_arrays(file_path, magic, header, arrays):
+    """
+    Writes 'header' (a JSON-serializable dict) and 'arrays' to file_path.
+    """
+    header = dict(header, arrays=[[a.typecode, len(a)] for a in arrays])
+    encoded = json.dumps(header).encode("utf-8")
+
+    with open(file_path, "wb") as file:
+        file.write(magic)
+        file.write(struct.pack("<Q", len(encoded)))
+        file.write(encoded)
+        for a in arrays:
+            file.write(_little_endian(a).tobytes())
+
+
+def load_arrays(file_path, magic):
+    """
+    Reads a file written by save_arrays, returning (header, arrays).
+    Raises ValueError if the file does not start with 'magic'.
+    """
+    with open(file_path, "rb") as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError(f"{file_path} is not a {magic.decode('ascii', 'replace').strip()} file")
+        (header_size,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(header_size).decode("utf-8"))
+
+        arrays = []
+        for typecode, length in header["arrays"]:
+            a = array(typecode)
+            a.frombytes(file.read(a.itemsize * length))
+            arrays.append(_little_endian(a))
+    return header, arrays
+
+
+def _little_endian(a):
+    """Returns 'a' in little-endian byte order (a swapped copy on big-endian hosts)."""
+    if struct.pack("=H", 1) == struct.pack("<H", 1):
+        return a
+    swapped = array(a.typecode, a)
+    swapped.byteswap()
+    return swapped
+
+
+# ---------------------------------------------------------------------------
+# Binary graph snapshots
+#
+# compile_snapshot turns coordinates.csv + Adjacencies.txt into one file that
+# load_snapshot memory-maps without parsing anything. Layout (little-endian):
+#
+#   magic (8 bytes) | node count, edge count, name bytes (3 x uint64)
+#   name_offsets  int64   [N + 1]   city i is name_bytes[name_offsets[i]:name_offsets[i + 1]]
+#   name_bytes    UTF-8   [name bytes]  (padded to 8 bytes)
+#   offsets       int64   [N + 1]   CSR row offsets
+#   targets       int32   [E]       (padded to 8 bytes)
+#   weights       float64 [E]
+#   lat, lon, lat_rad, lon_rad  float64 [N] each
+#   components    int32   [N]       connected-component label of each node
+# ---------------------------------------------------------------------------
+
+_SNAPSHOT_MAGIC = b"GRAPHSN2"
+_SNAPSHOT_MAGIC_V1 = b"GRAPHSN1"  # Same layout without the component labels
+_SNAPSHOT_HEADER = struct.Struct("<8sQQQ")
+
+
+class StringTable:
+    """
+    Read-only sequence of city names stored as one UTF-8 blob plus offsets;
+    each name is decoded only when it is accessed.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("StringTable index out of range")
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def save_snapshot(graph, snapshot_path):
+    """
+    Writes a CompactGraph to 'snapshot_path' in the snapshot layout above.
+    """
+    graph.compact()
+    components = graph.components if graph.components is not None else connected_components(graph)
+    encoded = [name.encode("utf-8") for name in graph.names]
+    name_offsets = array('q', [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    blob = b"".join(encoded)
+
+    with open(snapshot_path, "wb") as file:
+        file.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, len(graph), len(graph.targets), len(blob)))
+        sections = [name_offsets, blob, array('q', graph.offsets), array('i', graph.targets),
+                    array('d', graph.weights), array('d', graph.lat), array('d', graph.lon),
+                    array('d', graph.lat_rad), array('d', graph.lon_rad), array('i', components.labels)]
+        for section in sections:
+            data = section if isinstance(section, bytes) else _little_endian(section).tobytes()
+            file.write(data)
+            file.write(b"\0" * (-len(data) % 8))  # Keep every section 8-byte aligned
+
+
+def compile_snapshot(adjacency_path, coordinates_path, snapshot_path):
+    """
+    Parses Adjacencies.txt and coordinates.csv once and writes the weighted
+    graph as a binary snapshot for load_snapshot.
+    """
+    save_snapshot(load_compact_graph(adjacency_path, coordinates_path), snapshot_path)
+
+
+def load_snapshot(snapshot_path):
+    """
+    Memory-maps a snapshot written by compile_snapshot/save_snapshot and
+    returns a CompactGraph whose arrays are memoryviews straight into the
+    mapping: nothing is parsed or copied, and worker processes that load
+    (or fork with) the same file share its pages through the OS page cache.
+    On big-endian hosts the arrays are copied and byte-swapped instead.
+    The component labels are read from the file too (older snapshots
+    without them are labeled on load).
+    """
+    with open(snapshot_path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, n, e, blob_size = _SNAPSHOT_HEADER.unpack_from(mapped, 0)
+    if magic not in (_SNAPSHOT_MAGIC, _SNAPSHOT_MAGIC_V1):
+        mapped.close()
+        raise ValueError(f"{snapshot_path} is not a graph snapshot")
+
+    view = memoryview(mapped)
+    position = _SNAPSHOT_HEADER.size
+
+    def section(typecode, length):
+        nonlocal position
+        size = length * (1 if typecode == 'B' else array(typecode).itemsize)
+        data = view[position:position + size]
+        position += size + (-size % 8)
+        if typecode == 'B':
+            return data
+        if sys.byteorder == "little":
+            return data.cast(typecode)
+        return _little_endian(array(typecode, data.tobytes()))
+
+    name_offsets = section('q', n + 1)
+    blob = section('B', blob_size)
+    offsets = section('q', n + 1)
+    targets = section('i', e)
+    weights = section('d', e)
+    lat, lon, lat_rad, lon_rad = (section('d', n) for _ in range(4))
+
+    graph = CompactGraph(StringTable(name_offsets, blob), offsets, targets, lat, lon, weights, lat_rad, lon_rad)
+    if magic == _SNAPSHOT_MAGIC:
+        graph.components = ComponentLabels(section('i', n), graph.id_of)
+    else:
+        graph.label_components()
+    graph.snapshot = mapped  # Keeps the mapping open for as long as the graph lives
+    return graph
@@ -0,0 +1,199 @@
+import heapq
+import time
+import graph_setup
+import search_algorithms
+
+
+def yen_k_shortest(graph, start, goal, k=3, coordinates=None, max_overlap=1.0, max_candidates=None,
+                   max_time=5.0, stats=None, deadline=None):
+    """
+    Yen's k shortest loopless routes from start to goal, as a list of
+    (path, cost) pairs, cheapest first (fewer than k if there are not that
+    many; [] if there is no route).
+
+    One Dijkstra from the goal gives every node's exact distance to it. The
+    first route is read straight off that tree, and every spur search of
+    Yen's algorithm runs A* with those distances as its heuristic: removing
+    roads only makes routes longer, so they stay admissible, and the spur
+    searches expand little more than the route they return.
+
+    A route sharing more than max_overlap of its length with a route
+    already returned is skipped (1.0 keeps all of them); at most
+    max_candidates routes (default 10 * k) are generated while looking for
+    k that pass. Roads are assumed to be two-way. Accepts a CompactGraph, or
+    a dict graph plus its coordinates (converted on every call).
+    """
+    if deadline is None:
+        deadline = search_algorithms.Deadline(max_time)
+    graph, s, t = _endpoints(graph, start, goal, coordinates)
+    if s is None or t is None:
+        return [([start], 0)] if start == goal and k > 0 else []
+    if s == t:
+        return [([start], 0)] if k > 0 else []
+    if max_candidates is None:
+        max_candidates = 10 * k
+
+    to_goal = search_algorithms.dijkstra_one_to_many(graph, goal, stats=stats)
+    if to_goal.dist[s] == float('inf'):
+        return []
+    first = _chain(to_goal.parents, s)
+    found = [(first, to_goal.dist[s])]  # Every route generated, in order (Yen's list A)
+    routes = [found[0]] if k > 0 else []
+    candidates = []  # Heap of (cost, path) (Yen's list B)
+    queued = {tuple(first)}
+
+    while len(routes) < k and len(found) < max_candidates and not deadline.expired():
+        previous, _ = found[-1]
+        prefix_cost = 0.0
+        for i in range(len(previous) - 1):
+            spur, root = previous[i], previous[:i + 1]
+            # Roads out of the spur node already used by a found route with the same root
+            banned_edges = {path[i + 1] for path, _ in found if path[:i + 1] == root}
+            spur_path, spur_cost = _spur_search(graph, spur, t, to_goal.dist, set(root[:-1]),
+                                                banned_edges, deadline, stats)
+            if spur_path is not None:
+                path = root[:-1] + spur_path
+                if tuple(path) not in queued:
+                    queued.add(tuple(path))
+                    heapq.heappush(candidates, (prefix_cost + spur_cost, path))
+            prefix_cost += _edge_length(graph, spur, previous[i + 1])
+
+        if not candidates:
+            break
+        cost, path = heapq.heappop(candidates)
+        found.append((path, cost))
+        if all(overlap(graph, path, route) <= max_overlap for route, _ in routes):
+            routes.append((path, cost))
+
+    return [([graph.names[node] for node in path], cost) for path, cost in routes]
+
+
+def alternative_routes(graph, start, goal, k=3, coordinates=None, max_overlap=0.7, max_stretch=1.4,
+                       stats=None):
+    """
+    Up to k routes from start to goal, as (path, cost) pairs: the shortest
+    one first, then alternatives through "via" nodes, cheapest first.
+
+    Two Dijkstra runs, one from each end, give for every node v the
+    shortest route through it: start -> v from the first tree, then v ->
+    goal from the second. Nodes on a stretch that both trees share (a
+    plateau) all give the same route, which is considered once. A via
+    route is kept when it has no loop, costs at most max_stretch times the
+    shortest, and shares at most max_overlap of its length with each route
+    already kept. Much cheaper than yen_k_shortest, but the alternatives
+    are not the k shortest routes. Roads are assumed to be two-way. Accepts
+    a CompactGraph, or a dict graph plus its coordinates.
+    """
+    graph, s, t = _endpoints(graph, start, goal, coordinates)
+    if s is None or t is None or k <= 0:
+        return [([start], 0)] if start == goal and k > 0 else []
+
+    from_start = search_algorithms.dijkstra_one_to_many(graph, start, stats=stats)
+    to_goal = search_algorithms.dijkstra_one_to_many(graph, goal, stats=stats)
+    best = from_start.dist[t]
+    if best == float('inf'):
+        return []
+    routes = [(_chain(to_goal.parents, s), best)]
+
+    limit = best * max_stretch
+    via = [(from_start.dist[v] + to_goal.dist[v], v) for v in range(len(graph))
+           if from_start.dist[v] + to_goal.dist[v] <= limit]
+    via.sort()
+    seen = {tuple(routes[0][0])}
+    for cost, v in via:
+        if len(routes) == k:
+            break
+        path = _chain(from_start.parents, v)[::-1] + _chain(to_goal.parents, v)[1:]
+        key = tuple(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        if len(set(path)) < len(path):
+            continue  # The two halves cross: not a simple route
+        if all(overlap(graph, path, route) <= max_overlap for route, _ in routes):
+            routes.append((path, cost))
+
+    return [([graph.names[node] for node in path], cost) for path, cost in routes]
+
+
+def overlap(graph, path, other):
+    """
+    Fraction of the length of 'path' (node ids on a CompactGraph) that
+    runs along roads also used by 'other', in either direction.
+    """
+    shared_roads = {frozenset(road) for road in zip(other, other[1:])}
+    total = shared = 0.0
+    for a, b in zip(path, path[1:]):
+        length = _edge_length(graph, a, b)
+        total += length
+        if frozenset((a, b)) in shared_roads:
+            shared += length
+    return shared / total if total > 0 else 1.0
+
+
+def _endpoints(graph, start, goal, coordinates):
+    if not isinstance(graph, graph_setup.CompactGraph):
+        graph = graph_setup.build_compact_graph(graph, coordinates)
+    return graph, graph.id_of(start), graph.id_of(goal)
+
+
+def _chain(parents, node):
+    """node, its tree parent, its parent, ... up to the tree's root."""
+    chain = [node]
+    while parents[node] >= 0:
+        node = parents[node]
+        chain.append(node)
+    return chain
+
+
+def _edge_length(graph, a, b):
+    return min(weight for neighbor, weight in graph.edges(a) if neighbor == b)
+
+
+def _spur_search(graph, source, goal, to_goal, banned_nodes, banned_edges, deadline, stats):
+    """
+    A* from 'source' to 'goal' that avoids banned_nodes and the roads from
+    'source' to banned_edges, guided by the exact unrestricted distances
+    'to_goal'. Returns (path of ids, cost) or (None, inf).
+    """
+    expired = deadline.expired
+    search_start = time.perf_counter()
+    g_score = {source: 0.0}
+    parents = {source: None}
+    closed = set()
+    queue = [(to_goal[source], 0.0, source)]
+    expanded = generated = peak = 0
+
+    try:
+        while queue:
+            if expired():
+                return None, float('inf')
+            if len(queue) > peak:
+                peak = len(queue)
+            _, g, node = heapq.heappop(queue)
+            if node in closed:
+                continue
+            if node == goal:
+                path = [node]
+                while parents[node] is not None:
+                    node = parents[node]
+                    path.append(node)
+                return path[::-1], g
+            closed.add(node)
+            expanded += 1
+
+            for neighbor, weight in graph.edges(node):
+                if neighbor in banned_nodes or neighbor in closed:
+                    continue
+                if node == source and neighbor in banned_edges:
+                    continue
+                new_g = g + weight
+                if new_g < g_score.get(neighbor, float('inf')) and to_goal[neighbor] != float('inf'):
+                    g_score[neighbor] = new_g
+                    parents[neighbor] = node
+                    heapq.heappush(queue, (new_g + to_goal[neighbor], new_g, neighbor))
+                    generated += 1
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
@@ -0,0 +1,167 @@
+import math
+import random
+from array import array
+import graph_setup
+import search_algorithms
+
+LANDMARK_SLACK = 1e-6  # Relative slack that keeps float32-rounded bounds admissible
+_MAGIC = b"LANDMARKS1\n"
+
+
+class LandmarkTable:
+    """
+    ALT (A*, Landmarks, Triangle inequality) lower bounds for one graph.
+
+    distances[i] holds the shortest-path distance from landmarks[i] to every
+    node id, as float32 (inf when unreachable). For any landmark L, the
+    triangle inequality gives d(v, t) >= |d(L, t) - d(L, v)| on an
+    undirected graph; lower_bound() takes the largest such bound.
+
+    'version' is the graph_setup.graph_version of the graph the distances
+    were computed on (see is_current).
+    """
+
+    def __init__(self, names, landmarks, distances, version=0):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.landmarks = landmarks
+        self.distances = distances
+        self.version = version
+
+    def __len__(self):
+        return len(self.names)
+
+    def is_current(self, graph):
+        """
+        True when the bounds are still admissible for 'graph': it has not
+        changed since the table was built, or roads were only removed or
+        made longer, which can only lengthen routes. The table then takes
+        the graph's version, so later checks only look at newer changes.
+        False after a road was added or shortened, or when the change log
+        no longer reaches back to the table's version: rebuild the table.
+        """
+        version = graph_setup.graph_version(graph)
+        if version == self.version:
+            return True
+        changes = graph_setup.changes_since(graph, self.version)
+        if changes is None or any(change.new_weight < change.old_weight for change in changes):
+            return False
+        self.version = version
+        return True
+
+    def lower_bound(self, node, goal):
+        """Lower bound on the distance between node ids 'node' and 'goal'."""
+        return self.heuristic_to(goal)(node)
+
+    def heuristic_to(self, goal):
+        """Returns h(node id) = lower_bound(node, goal) for a fixed goal id."""
+        goal_row = [row[goal] for row in self.distances]
+        rows = list(zip(self.distances, goal_row))
+
+        def heuristic(node):
+            best = 0.0
+            for row, to_goal in rows:
+                to_node = row[node]
+                if to_goal == to_node:
+                    continue
+                if math.isinf(to_goal) or math.isinf(to_node):
+                    return float('inf')
+                bound = abs(to_goal - to_node) - LANDMARK_SLACK * (to_goal + to_node)
+                if bound > best:
+                    best = bound
+            return best
+        return heuristic
+
+
+def build_landmark_table(graph, k=8, method="farthest", coordinates=None, seed=0):
+    """
+    Selects k landmarks and runs Dijkstra from each of them.
+
+    method="farthest" repeatedly picks the node farthest (by road distance)
+    from the landmarks chosen so far; unreachable nodes count as farthest, so
+    every component gets a landmark if k allows. method="planar" splits the
+    map into k angular sectors around its center and picks the node farthest
+    from the center in each. Accepts a CompactGraph, or a dict graph plus
+    its coordinates.
+    """
+    if not isinstance(graph, graph_setup.CompactGraph):
+        graph = graph_setup.build_compact_graph(graph, coordinates)
+    k = min(k, len(graph))
+
+    if method == "farthest":
+        landmarks, distances = _farthest_landmarks(graph, k, seed)
+    elif method == "planar":
+        landmarks = _planar_landmarks(graph, k)
+        distances = [_distances_from(graph, landmark) for landmark in landmarks]
+    else:
+        raise ValueError(f"Unknown landmark selection method: {method}")
+
+    compact = [array('f', row) for row in distances]
+    return LandmarkTable(graph.names, array('i', landmarks), compact, graph_setup.graph_version(graph))
+
+
+def _farthest_landmarks(graph, k, seed):
+    n = len(graph)
+    if k == 0:
+        return [], []
+    # The first Dijkstra (from a random node) only serves to find the first landmark
+    nearest = _distances_from(graph, random.Random(seed).randrange(n))
+    landmarks, distances = [], []
+    while len(landmarks) < k:
+        chosen = set(landmarks)
+        candidate = max((v for v in range(n) if v not in chosen), key=lambda v: nearest[v])
+        row = _distances_from(graph, candidate)
+        landmarks.append(candidate)
+        distances.append(row)
+        nearest = [row[v] if len(landmarks) == 1 else min(nearest[v], row[v]) for v in range(n)]
+    return landmarks, distances
+
+
+def _planar_landmarks(graph, k):
+    located = [v for v in range(len(graph)) if not math.isnan(graph.lat[v])]
+    if not located:
+        return list(range(k))
+    center_lat = sum(graph.lat[v] for v in located) / len(located)
+    center_lon = sum(graph.lon[v] for v in located) / len(located)
+    lat_rad, lon_rad = math.radians(center_lat), math.radians(center_lon)
+
+    def from_center(v):
+        return graph_setup.haversine_radians(lat_rad, lon_rad, graph.lat_rad[v], graph.lon_rad[v])
+
+    best = {}  # sector -> node farthest from the center
+    for v in located:
+        d_lat = graph.lat[v] - center_lat
+        d_lon = (graph.lon[v] - center_lon) * math.cos(lat_rad)
+        sector = int((math.atan2(d_lon, d_lat) + math.pi) / (2 * math.pi) * k) % k
+        if sector not in best or from_center(v) > from_center(best[sector]):
+            best[sector] = v
+
+    landmarks = list(best.values())
+    # Empty sectors: top up with the remaining nodes farthest from the center
+    if len(landmarks) < k:
+        chosen = set(landmarks)
+        rest = sorted((v for v in located if v not in chosen), key=from_center, reverse=True)
+        rest += [v for v in range(len(graph)) if v not in chosen and math.isnan(graph.lat[v])]
+        landmarks.extend(rest[:k - len(landmarks)])
+    return landmarks
+
+
+def _distances_from(graph, source):
+    """Road distances from node id 'source' to every node id (inf when unreachable)."""
+    return search_algorithms.dijkstra_one_to_many(graph, graph.names[source]).dist
+
+
+def save_landmark_table(table, file_path):
+    """
+    Writes the table to 'file_path' (see graph_setup.save_arrays).
+    """
+    graph_setup.save_arrays(file_path, _MAGIC, {"names": table.names, "version": table.version},
+                            [table.landmarks] + list(table.distances))
+
+
+def load_landmark_table(file_path):
+    """
+    Reads a table written by save_landmark_table.
+    """
+    header, arrays = graph_setup.load_arrays(file_path, _MAGIC)
+    return LandmarkTable(header["names"], arrays[0], arrays[1:], header.get("version", 0))
@@ -1,6 +1,9 @@
+import sys
+import cli
 import user_interface
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Arguments given: run non-interactively (see cli.py)
+        sys.exit(cli.main())
     user_interface.main()
-
-
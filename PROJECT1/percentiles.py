@@ -0,0 +1,13 @@
+import math
+
+PERCENTILES = (50, 90, 99)  # Latency percentiles reported by benchmark and routing_service
+
+
+def percentile(sorted_values, p):
+    """Linearly interpolated p-th percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * p / 100
+    low = math.floor(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
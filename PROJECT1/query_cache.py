@@ -0,0 +1,189 @@
+from collections import OrderedDict
+import graph_setup
+import search_algorithms
+
+# Algorithms that return shortest paths, grouped by what they minimize. Any
+# subpath of a shortest path is itself shortest, so a cached route from one
+# of these answers queries between any two cities on it.
+_OPTIMAL_METRIC = {
+    "bfs": "edges",
+    "bidirectional_bfs": "edges",
+    "a_star": "distance",
+    "bidirectional_a_star": "distance",
+}
+
+
+class QueryCache:
+    """
+    LRU cache in front of search_algorithms.run_search for one graph.
+
+    Results are keyed on (start, goal, algorithm, options). When
+    graph_setup.graph_version(graph) changes, the cache is repaired from the
+    graph's change log: if roads were only removed or made longer, shortest
+    routes and trees that avoid them are still shortest and are kept, and
+    only those using a changed road (plus all non-optimal results) are
+    dropped. Any shorter or new road drops everything.
+    Queries for shortest-path algorithms are also answered from cached routes
+    that contain both cities, and from shortest-path trees kept by
+    shortest_path_tree(). hits, subpath_hits, tree_hits and misses count how
+    each query was answered.
+
+    Results with no path are not cached, since a search that timed out looks
+    the same as one that found no route.
+    """
+
+    def __init__(self, graph, coordinates=None, maxsize=1024, max_time=5.0, tree_maxsize=16):
+        self.graph = graph
+        self.coordinates = coordinates
+        self.maxsize = maxsize
+        self.max_time = max_time
+        self.tree_maxsize = tree_maxsize
+        self.hits = self.subpath_hits = self.tree_hits = self.misses = 0
+        self._version = graph_setup.graph_version(graph)
+        self._entries = OrderedDict()  # key -> (path, cost, prefix costs)
+        self._routes_through = {}  # city -> keys of cached optimal routes through it
+        self._trees = OrderedDict()  # source -> ShortestPathTree
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Returns the hit/miss counters and current size as a dict."""
+        return {
+            "hits": self.hits,
+            "subpath_hits": self.subpath_hits,
+            "tree_hits": self.tree_hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "trees": len(self._trees),
+        }
+
+    def invalidate(self):
+        """Drops every cached result and tree."""
+        self._entries.clear()
+        self._routes_through.clear()
+        self._trees.clear()
+        self._version = graph_setup.graph_version(self.graph)
+
+    def _sync(self):
+        """Brings the cache up to date with the graph's version (see the class docstring)."""
+        version = graph_setup.graph_version(self.graph)
+        if version == self._version:
+            return
+        changes = graph_setup.changes_since(self.graph, self._version)
+        if changes is None or any(change.new_weight < change.old_weight for change in changes):
+            self.invalidate()  # A shorter road can improve any route
+            return
+
+        self._version = version
+        names = self.graph.names
+        changed = {(names[change.node1], names[change.node2]) for change in changes}
+        changed |= {(b, a) for a, b in changed}
+        for key, (path, _, _) in list(self._entries.items()):
+            if key[2] not in _OPTIMAL_METRIC or any(pair in changed for pair in zip(path, path[1:])):
+                self._drop(key)
+
+        changed_ids = {(change.node1, change.node2) for change in changes}
+        for source, tree in list(self._trees.items()):
+            if any(tree.parents[v] == u or tree.parents[u] == v for u, v in changed_ids):
+                del self._trees[source]
+
+    def search(self, start, goal, algorithm, **options):
+        """
+        Returns (path, cost) like run_search(algorithm, ...), from the cache when possible.
+        """
+        self._sync()
+
+        key = (start, goal, algorithm, tuple(sorted(options.items())))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0]), entry[1]
+
+        metric = _OPTIMAL_METRIC.get(algorithm)
+        if metric is not None:
+            result = self._from_trees(start, goal, metric) or self._from_subpaths(start, goal, metric)
+            if result is not None:
+                return result
+
+        self.misses += 1
+        path, cost = search_algorithms.run_search(algorithm, self.graph, start, goal, self.coordinates,
+                                                  self.max_time, **options)
+        if path is not None:
+            self._store(key, path, cost, metric)
+        return path, cost
+
+    def shortest_path_tree(self, source):
+        """
+        Returns the (cached) dijkstra_one_to_many tree from 'source'. While it
+        is cached, distance queries from or to 'source' are answered from it.
+        """
+        self._sync()
+
+        tree = self._trees.get(source)
+        if tree is None:
+            tree = search_algorithms.dijkstra_one_to_many(self.graph, source, self.coordinates)
+            self._trees[source] = tree
+            while len(self._trees) > self.tree_maxsize:
+                self._trees.popitem(last=False)
+        else:
+            self._trees.move_to_end(source)
+        return tree
+
+    def _from_trees(self, start, goal, metric):
+        if metric != "distance":
+            return None
+        for source, target, reverse in ((start, goal, False), (goal, start, True)):
+            tree = self._trees.get(source)
+            if tree is not None:
+                self.tree_hits += 1
+                path = tree.path(target)
+                if path is None:
+                    return None, float('inf')  # The tree covers everything reachable
+                return (path[::-1] if reverse else path), tree.distance(target)
+        return None
+
+    def _from_subpaths(self, start, goal, metric):
+        candidates = self._routes_through.get(start, set()) & self._routes_through.get(goal, set())
+        for key in candidates:
+            if _OPTIMAL_METRIC[key[2]] != metric:
+                continue
+            path, _, prefix = self._entries[key]
+            i, j = path.index(start), path.index(goal)
+            self._entries.move_to_end(key)
+            self.subpath_hits += 1
+            if i <= j:
+                return path[i:j + 1], prefix[j] - prefix[i]
+            return path[j:i + 1][::-1], prefix[i] - prefix[j]
+        return None
+
+    def _store(self, key, path, cost, metric):
+        if metric == "distance":
+            prefix = [0.0]
+            for a, b in zip(path, path[1:]):
+                prefix.append(prefix[-1] + self._edge_length(a, b))
+        else:
+            prefix = list(range(len(path)))
+        self._entries[key] = (list(path), cost, prefix)
+        if metric is not None:
+            for city in path:
+                self._routes_through.setdefault(city, set()).add(key)
+
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        path = self._entries.pop(key)[0]
+        for city in path:
+            keys = self._routes_through.get(city)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._routes_through[city]
+
+    def _edge_length(self, a, b):
+        if isinstance(self.graph, graph_setup.CompactGraph):
+            b_id = self.graph.id_of(b)
+            return min(weight for neighbor, weight in self.graph.edges(self.graph.id_of(a)) if neighbor == b_id)
+        return graph_setup.haversine_distance(a, b, self.coordinates)
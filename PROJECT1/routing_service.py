@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import batch_queries
+import graph_setup
+import percentiles
+import search_algorithms
+
+LATENCY_WINDOW = 1000  # Recent request latencies kept for the percentiles in metrics()
+COALESCE_SLACK = 0.01  # Seconds sooner than a request's deadline a search it joins may end
+
+
+class RoutingService:
+    """
+    Answers route queries for one graph from an asyncio event loop.
+
+    Searches are CPU-bound, so they run on a worker pool (a process pool by
+    default, each worker holding its own copy of the graph; any
+    concurrent.futures executor may be passed instead). Identical queries
+    that arrive while one is already running share its result instead of
+    searching again, as long as that search may run about as long as the new
+    request allows (up to COALESCE_SLACK less). Every request has a deadline, sent with the query as
+    an absolute end_time: the search gets whatever is left of it when a
+    worker picks the query up, and a request still waiting when the deadline
+    passes is answered as timed out.
+    """
+
+    def __init__(self, graph, coordinates=None, workers=None, executor=None, max_time=5.0):
+        self.graph = graph
+        self.coordinates = coordinates
+        self.max_time = max_time
+        state = {"graph": graph, "coordinates": coordinates, "max_time": max_time}
+        self._batch = batch_queries._register(state)  # Thread pools share this process's copy
+        if executor is None:
+            executor = ProcessPoolExecutor(workers, initializer=batch_queries._init_worker,
+                                           initargs=(self._batch, state))
+        self.executor = executor
+        self._in_flight = {}  # query key -> (future of its BatchResult, its end_time)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._started = time.perf_counter()
+        self.requests = self.coalesced = self.completed = self.timed_out = self.errors = 0
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        batch_queries._release(self._batch)
+
+    async def query(self, start, goal, algorithm="a_star", deadline=None, **options):
+        """
+        Returns a JSON-ready dict for one query: path, cost (None when no
+        route was found), the search time, the total time including queueing
+        (both in ms), whether it timed out and whether it was coalesced with
+        an identical query already in flight. 'deadline' is in seconds from
+        now (default: the service's max_time). Bad queries give a dict with
+        an "error" instead.
+        """
+        received = time.perf_counter()
+        self.requests += 1
+        deadline = self.max_time if deadline is None else deadline
+        record = {"start": start, "goal": goal, "algorithm": algorithm}
+        if algorithm not in search_algorithms.ALGORITHMS:
+            self.errors += 1
+            record["error"] = f"Unknown search algorithm: {algorithm}"
+            return record
+
+        key = (start, goal, algorithm, tuple(sorted(options.items())))
+        end_time = time.time() + max(deadline, 0.0)
+        future, search_end = self._in_flight.get(key, (None, None))
+        # A search ending sooner than this request may would cut it short
+        record["coalesced"] = future is not None and search_end >= end_time - COALESCE_SLACK
+        if record["coalesced"]:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            query = (start, goal, algorithm, dict(options, max_time=max(deadline, 0.0), end_time=end_time))
+            future = loop.run_in_executor(self.executor, batch_queries._run_query, query, self._batch)
+            self._in_flight[key] = (future, end_time)
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        try:
+            # shield: a caller giving up must not cancel the search others share
+            result = await asyncio.wait_for(asyncio.shield(future), max(deadline, 0.0))
+        except asyncio.TimeoutError:
+            record.update(path=None, cost=None, search_ms=None, timed_out=True)
+        except Exception as error:
+            self.errors += 1
+            record["error"] = str(error)
+            return record
+        else:
+            record.update(path=result.path,
+                          cost=None if math.isinf(result.cost) else result.cost,
+                          search_ms=result.elapsed * 1000,
+                          timed_out=result.timed_out)
+
+        elapsed = time.perf_counter() - received
+        record["total_ms"] = elapsed * 1000
+        self.completed += 1
+        self.timed_out += record["timed_out"]
+        self._latencies.append(elapsed)
+        return record
+
+    def _forget(self, key, future):
+        if self._in_flight.get(key, (None,))[0] is future:
+            del self._in_flight[key]
+
+    def metrics(self):
+        """
+        Request counters, throughput (completed requests per second since
+        the service started) and latency percentiles (ms) over the last
+        LATENCY_WINDOW requests.
+        """
+        latencies = sorted(self._latencies)
+        uptime = time.perf_counter() - self._started
+        return {
+            "requests": self.requests,
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+            "timed_out": self.timed_out,
+            "errors": self.errors,
+            "in_flight": len(self._in_flight),
+            "uptime_s": uptime,
+            "throughput_qps": self.completed / uptime if uptime > 0 else 0.0,
+            "latency_ms": {f"p{p}": percentiles.percentile(latencies, p) * 1000
+                           for p in percentiles.PERCENTILES} if latencies else {},
+        }
+
+    async def handle_request(self, message):
+        """
+        Answers one decoded protocol message (see serve). The request's "id",
+        if any, is echoed back so clients can match out-of-order replies.
+        """
+        if message.get("op") == "metrics":
+            reply = self.metrics()
+        else:
+            try:
+                options = dict(message.get("options") or {})
+                deadline_ms = message.get("deadline_ms")
+                reply = await self.query(message["start"], message["goal"], message.get("algorithm", "a_star"),
+                                         None if deadline_ms is None else deadline_ms / 1000, **options)
+            except (KeyError, TypeError, AttributeError) as error:
+                self.errors += 1
+                reply = {"error": f"Malformed request: {error!r}"}
+        if "id" in message:
+            reply["id"] = message["id"]
+        return reply
+
+    async def _serve_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(message):
+            reply = await self.handle_request(message)
+            async with lock:
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as error:
+                    self.errors += 1
+                    async with lock:
+                        writer.write(json.dumps({"error": f"Invalid JSON: {error}"}).encode() + b"\n")
+                        await writer.drain()
+                    continue
+                task = asyncio.create_task(answer(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, path=None, host="127.0.0.1", port=0):
+        """
+        Starts the line protocol server on a Unix socket at 'path', or on a
+        local TCP port, and returns the asyncio Server.
+
+        Each line sent is one JSON request: {"start", "goal", "algorithm",
+        "options", "deadline_ms", "id"} (only start and goal are required), or
+        {"op": "metrics"}. Each reply is one JSON line, written when that
+        request finishes, so replies to pipelined requests may come back out
+        of order.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self._serve_connection, path)
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+
+class RoutingClient:
+    """
+    Client for the RoutingService line protocol. Requests may be issued
+    concurrently over one connection; replies are matched by id.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader, self._writer = reader, writer
+        self._pending = {}
+        self._next_id = 0
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, path=None, host="127.0.0.1", port=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, message):
+        """Sends one protocol message and returns the decoded reply."""
+        self._next_id += 1
+        message = dict(message, id=self._next_id)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self._writer.write(json.dumps(message).encode() + b"\n")
+        await self._writer.drain()
+        return await future
+
+    async def query(self, start, goal, algorithm="a_star", deadline_ms=None, **options):
+        message = {"start": start, "goal": goal, "algorithm": algorithm, "options": options}
+        if deadline_ms is not None:
+            message["deadline_ms"] = deadline_ms
+        return await self.request(message)
+
+    async def metrics(self):
+        return await self.request({"op": "metrics"})
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._receiver
+
+    async def _receive(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            future = self._pending.pop(reply.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(reply)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection closed"))
+        self._pending.clear()
+
+
+async def serve_forever(service, path=None, host="127.0.0.1", port=0):
+    server = await service.serve(path, host, port)
+    address = path if path is not None else "%s:%d" % server.sockets[0].getsockname()[:2]
+    print(f"Routing service listening on {address}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve route queries over a local socket.")
+    parser.add_argument("--adjacencies", default="Adjacencies.txt")
+    parser.add_argument("--coordinates", default="coordinates.csv")
+    parser.add_argument("--compact", action="store_true", help="search a CompactGraph")
+    parser.add_argument("--socket", metavar="PATH", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8461)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--max-time", type=float, default=5.0, help="default deadline per request, in seconds")
+    args = parser.parse_args(argv)
+
+    coordinates = graph_setup.load_coordinates(args.coordinates)
+    graph = graph_setup.load_adjacencies(args.adjacencies)
+    if args.compact:
+        graph = graph_setup.build_compact_graph(graph, coordinates)
+    service = RoutingService(graph, coordinates, args.workers, max_time=args.max_time)
+    try:
+        asyncio.run(serve_forever(service, args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
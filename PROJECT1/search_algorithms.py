@@ -1,158 +1,1720 @@
+from array import array
 from collections import deque
 import heapq
 import time
 import graph_setup  # for haversine_distance if needed
 
+DEADLINE_CHECK_EVERY = 64  # Expansions between clock reads
 
-def bfs(graph, start, goal, max_time=5.0):
+
+def _unreachable(graph, start, goal):
+    """
+    True when the graph's component labels (on a CompactGraph from one of
+    the loaders, see label_components) prove there is no route: the cities
+    are in different components, or one of them is not in the graph. Dict
+    graphs carry no labels and are searched.
+    """
+    if start == goal:
+        return False
+    components = getattr(graph, "components", None)
+    return components is not None and not components.connected(start, goal)
+
+
+def _search_compact(graph, start, goal, search, stats=None):
+    """
+    Runs search(start_id, goal_id) over the integer ids of a CompactGraph
+    and maps the resulting id path back to city names.
+    """
+    lookup_start = time.perf_counter()
+    start_id, goal_id = graph.id_of(start), graph.id_of(goal)
+    if start_id is None or goal_id is None:
+        if start == goal:
+            return [start], 0
+        return None, float('inf')
+    if stats is not None:
+        stats.add_time("lookup", time.perf_counter() - lookup_start)
+
+    path, cost = search(start_id, goal_id)
+    if path is None:
+        return None, cost
+    lookup_start = time.perf_counter()
+    path = [graph.names[node] for node in path]
+    if stats is not None:
+        stats.add_time("lookup", time.perf_counter() - lookup_start)
+    return path, cost
+
+
+def _dict_heuristic(goal, coordinates):
+    """
+    Straight-line distance to goal over a coordinates dict,
+    memoized so each city is evaluated at most once per search.
+    """
+    cache = {}
+
+    def heuristic(city):
+        h = cache.get(city)
+        if h is None:
+            h = cache[city] = graph_setup.haversine_distance(city, goal, coordinates)
+        return h
+    return heuristic
+
+
+def _compact_heuristic(graph, goal):
+    """
+    Straight-line distance to goal backed by the CompactGraph's per-goal
+    table, so repeated queries towards the same goal reuse earlier values.
+    """
+    table = graph.heuristic_table(goal)
+
+    def heuristic(node):
+        h = table[node]
+        if h < 0:
+            h = table[node] = graph.distance(node, goal)
+        return h
+    return heuristic
+
+
+def _dict_edges(graph, coordinates):
+    """
+    (neighbor, edge length) pairs for a dict graph, measured with Haversine.
+    """
+    def edges(city):
+        return [(neighbor, graph_setup.haversine_distance(city, neighbor, coordinates))
+                for neighbor in graph.get(city, [])]
+    return edges
+
+
+def _counted(heuristic, stats):
+    """
+    Wraps heuristic so its calls are counted in stats.heuristic_evaluations
+    (returned unchanged when stats is None).
+    """
+    if stats is None:
+        return heuristic
+
+    def counted(node):
+        stats.heuristic_evaluations += 1
+        return heuristic(node)
+    return counted
+
+
+def _hooks(stats):
+    """(on_expand, on_push) of stats, or (None, None)."""
+    if stats is None:
+        return None, None
+    return stats.on_expand, stats.on_push
+
+
+def _reconstruct_path(parents, goal):
+    """
+    Walks the parent pointers back from goal to the start (whose parent is None).
+    """
+    path = [goal]
+    parent = parents[goal]
+    while parent is not None:
+        path.append(parent)
+        parent = parents[parent]
+    path.reverse()
+    return path
+
+
+def _csr_path(parents, start, goal):
+    """
+    Walks an array of parent ids back from goal to start (its own parent),
+    for the integer searches over a CompactGraph's CSR arrays.
+    """
+    path = [goal]
+    while goal != start:
+        goal = parents[goal]
+        path.append(goal)
+    path.reverse()
+    return path
+
+
+class Deadline:
+    """
+    Time budget for a search, cheap enough to check on every expansion:
+    expired() reads the clock only on every 'check_every'-th call.
+
+    cancel() may be called from any thread; the search stops at its next
+    clock check. Once a search returns, timed_out and cancelled tell
+    whether it was cut short, and why. Every search takes one as
+    deadline=...; without it, a Deadline of max_time seconds is used.
+    """
+    __slots__ = ('max_time', 'check_every', 'end', 'timed_out', 'cancelled', '_countdown')
+
+    def __init__(self, max_time=5.0, check_every=DEADLINE_CHECK_EVERY):
+        self.max_time = max_time
+        self.check_every = check_every
+        self.end = time.perf_counter() + max_time
+        self.timed_out = False
+        self.cancelled = False
+        self._countdown = 1  # The first call checks the clock
+
+    def cancel(self):
+        """Stops the search(es) using this deadline at their next check."""
+        self.cancelled = True
+
+    def remaining(self):
+        """Seconds left, never negative."""
+        return max(0.0, self.end - time.perf_counter())
+
+    def expired(self):
+        self._countdown -= 1
+        if self._countdown:
+            return False
+        if self.cancelled:
+            self._countdown = 1  # Stay expired
+            return True
+        if time.perf_counter() > self.end:
+            self.timed_out = True
+            self._countdown = 1
+            return True
+        self._countdown = self.check_every
+        return False
+
+
+def _deadline(deadline, max_time):
+    return Deadline(max_time) if deadline is None else deadline
+
+
+class SearchStats:
+    """
+    Counters a search fills in when passed as stats=...
+    expanded counts nodes whose neighbors were examined, and reexpanded
+    the expansions that repeat an earlier one (a reopened A* node, a later
+    ARA* pass, an SMA* regeneration, or, for iterative deepening, the
+    previous pass's work redone). generated counts frontier entries pushed,
+    peak_frontier is the largest frontier (queue, stack or route) held, and
+    heuristic_evaluations counts heuristic calls. phase_times maps a phase
+    to seconds: "search" for the search loop, "lookup" for mapping names to
+    CompactGraph ids and back. iterations holds the nodes visited by each
+    pass of an iterative search.
+    Searches that may trade optimality for speed set suboptimality to the
+    factor by which the returned cost may exceed the optimum
+    (inf when there is no guarantee).
+
+    on_expand(node) and on_push(node), if given, are called for every
+    expansion and every frontier entry pushed, with a city name (or id on a
+    CompactGraph). Without them, the searches make no calls at all.
+    """
+
+    def __init__(self, on_expand=None, on_push=None):
+        self.expanded = 0
+        self.reexpanded = 0
+        self.generated = 0
+        self.peak_frontier = 0
+        self.heuristic_evaluations = 0
+        self.phase_times = {}
+        self.iterations = []
+        self.suboptimality = None
+        self.on_expand = on_expand
+        self.on_push = on_push
+
+    def add_time(self, phase, seconds):
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+
+    def record(self, expanded, generated, peak_frontier, search_start, reexpanded=0):
+        """Adds one search's counters; search_start is its perf_counter() at the start."""
+        self.expanded += expanded
+        self.generated += generated
+        self.reexpanded += reexpanded
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+        self.add_time("search", time.perf_counter() - search_start)
+
+    def __repr__(self):
+        return (f"SearchStats(expanded={self.expanded}, reexpanded={self.reexpanded}, "
+                f"generated={self.generated}, peak_frontier={self.peak_frontier}, "
+                f"heuristic_evaluations={self.heuristic_evaluations})")
+
+
+class _PathTieBreak:
+    """
+    Heap tie-breaker for equal priorities. Orders entries by their full path,
+    like the old (priority, path) tuples did, but only rebuilds the paths from
+    the parent pointers when a tie actually has to be broken. For CompactGraph
+    ids, 'names' maps the ids back so ties resolve exactly as on a dict graph.
+    """
+    __slots__ = ('parents', 'node', 'parent', 'names')
+
+    def __init__(self, parents, node, parent, names=None):
+        self.parents = parents
+        self.node = node
+        self.parent = parent
+        self.names = names
+
+    def path(self):
+        path = [self.node]
+        if self.parent is not None:
+            path = _reconstruct_path(self.parents, self.parent) + path
+        if self.names is not None:
+            path = [self.names[node] for node in path]
+        return path
+
+    def __lt__(self, other):
+        return self.path() < other.path()
+
+
+def bfs(graph, start, goal, max_time=5.0, stats=None, deadline=None):
     """
     Breadth-First Search (BFS) for an unweighted graph,
     returning (path, cost) or (None, float('inf')) if not found or time-out.
     """
-    start_time = time.perf_counter()
-    queue = deque([(start, [start])])
-    visited = set()
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        csr = graph.csr()
+        if csr is None:  # Rows overridden by road updates: go through neighbors()
+            return _search_compact(graph, start, goal, lambda s, g: bfs(
+                graph.adjacency_by_id(), s, g, stats=stats, deadline=deadline), stats)
+        return _search_compact(graph, start, goal, lambda s, g: _bfs_csr(
+            *csr, s, g, deadline, stats), stats)
 
-    while queue:
-        # Time-out check
-        if (time.perf_counter() - start_time) > max_time:
-            print("BFS timed out!")
-            return None, float('inf')
+    expired = deadline.expired
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    queue = deque([start])
+    parents = {start: None}  # Doubles as the visited set
+    expanded = peak = 0
+
+    try:
+        while queue:
+            # Time-out check
+            if expired():
+                return None, float('inf')
 
-        current, path = queue.popleft()
-        if current == goal:
-            return path, len(path) - 1  # BFS "cost" in edges
+            if len(queue) > peak:
+                peak = len(queue)
+            current = queue.popleft()
+            if current == goal:
+                path = _reconstruct_path(parents, goal)
+                return path, len(path) - 1  # BFS "cost" in edges
 
-        if current not in visited:
-            visited.add(current)
+            expanded += 1
+            if on_expand is not None:
+                on_expand(current)
             for neighbor in graph.get(current, []):
-                queue.append((neighbor, path + [neighbor]))
+                if neighbor not in parents:
+                    parents[neighbor] = current
+                    queue.append(neighbor)
+                    if on_push is not None:
+                        on_push(neighbor)
 
-    return None, float('inf')
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, len(parents) - 1, peak, search_start)
+
+
+def _bfs_csr(offsets, targets, start, goal, deadline, stats=None):
+    """
+    bfs on the node ids of a CompactGraph, reading neighbor rows straight
+    from its CSR arrays. Nodes are expanded a whole level at a time, which
+    is the same FIFO order, and an array of parent ids (-1 = not reached)
+    doubles as the visited set.
+    """
+    expired = deadline.expired
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    parents = array('i', [-1]) * (len(offsets) - 1)
+    parents[start] = start
+    level, next_level = [start], []
+    expanded = generated = peak = 0
+
+    try:
+        while level:
+            if len(level) > peak:
+                peak = len(level)
+            append = next_level.append
+            for current in level:
+                if expired():
+                    return None, float('inf')
+                if current == goal:
+                    path = _csr_path(parents, start, goal)
+                    return path, len(path) - 1
+
+                expanded += 1
+                if on_expand is not None:
+                    on_expand(current)
+                for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                    if parents[neighbor] < 0:
+                        parents[neighbor] = current
+                        append(neighbor)
+                        if on_push is not None:
+                            on_push(neighbor)
+            generated += len(next_level)
+            level, next_level = next_level, []
 
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated + len(next_level), peak, search_start)
 
-def dfs(graph, start, goal, max_time=5.0):
+
+def dfs(graph, start, goal, max_time=5.0, stats=None, deadline=None):
     """
     Depth-First Search (DFS),
     returning (path, cost) or (None, float('inf')) if not found or time-out.
     """
-    start_time = time.perf_counter()
-    stack = [(start, [start])]
-    visited = set()
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        csr = graph.csr()
+        if csr is None:
+            return _search_compact(graph, start, goal, lambda s, g: dfs(
+                graph.adjacency_by_id(), s, g, stats=stats, deadline=deadline), stats)
+        return _search_compact(graph, start, goal, lambda s, g: _dfs_csr(
+            *csr, s, g, deadline, stats), stats)
 
-    while stack:
-        if (time.perf_counter() - start_time) > max_time:
-            print("DFS timed out!")
-            return None, float('inf')
+    expired = deadline.expired
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    stack = [(start, None)]  # (node, parent it was pushed from)
+    parents = {}  # Filled when a node is expanded, so doubles as the visited set
+    expanded = generated = peak = 0
 
-        current, path = stack.pop()
-        if current == goal:
-            return path, len(path) - 1
+    try:
+        while stack:
+            if expired():
+                return None, float('inf')
+
+            if len(stack) > peak:
+                peak = len(stack)
+            current, parent = stack.pop()
+            if current in parents:
+                continue
+            parents[current] = parent
 
-        if current not in visited:
-            visited.add(current)
+            if current == goal:
+                path = _reconstruct_path(parents, goal)
+                return path, len(path) - 1
+
+            expanded += 1
+            if on_expand is not None:
+                on_expand(current)
             for neighbor in reversed(graph.get(current, [])):
-                stack.append((neighbor, path + [neighbor]))
+                if neighbor not in parents:
+                    stack.append((neighbor, current))
+                    generated += 1
+                    if on_push is not None:
+                        on_push(neighbor)
 
-    return None, float('inf')
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
+
+
+def _dfs_csr(offsets, targets, start, goal, deadline, stats=None):
+    """
+    dfs on the node ids of a CompactGraph, reading neighbor rows straight
+    from its CSR arrays. A node is expanded from its latest push, which is
+    the one nearest the top of the stack, so an array holding the node each
+    one was last pushed from gives its parent, and a bytearray marks the
+    expanded nodes.
+    """
+    expired = deadline.expired
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    parents = array('i', [-1]) * (len(offsets) - 1)
+    parents[start] = start
+    expanded_nodes = bytearray(len(offsets) - 1)
+    stack = [start]
+    push = stack.append
+    expanded = generated = peak = 0
+
+    try:
+        while stack:
+            if expired():
+                return None, float('inf')
+
+            if len(stack) > peak:
+                peak = len(stack)
+            current = stack.pop()
+            if expanded_nodes[current]:
+                continue
+            expanded_nodes[current] = 1
+
+            if current == goal:
+                path = _csr_path(parents, start, goal)
+                return path, len(path) - 1
+
+            expanded += 1
+            if on_expand is not None:
+                on_expand(current)
+            for neighbor in reversed(targets[offsets[current]:offsets[current + 1]]):
+                if not expanded_nodes[neighbor]:
+                    push(neighbor)
+                    parents[neighbor] = current
+                    generated += 1
+                    if on_push is not None:
+                        on_push(neighbor)
 
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
 
-def id_dfs(graph, start, goal, max_depth=10, max_time=5.0):
+
+def id_dfs(graph, start, goal, max_depth=10, max_time=5.0, prune=False, stats=None, deadline=None):
     """
     Iterative Deepening DFS up to max_depth,
     returning (path, cost) or (None, float('inf')) if not found or time-out.
+
+    Each depth-limited pass runs on an explicit stack, so depths in the
+    thousands do not hit the recursion limit. prune=True skips a node reached
+    again, within a pass, no shallower than before; the route found is still
+    a shortest one, with far less repeated work on graphs full of cycles.
+    Deepening stops as soon as a pass never reaches the depth limit. With
+    stats, the nodes visited by each pass are appended to stats.iterations.
     """
-    start_time = time.perf_counter()
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    on_expand, on_push = _hooks(stats)
+    if isinstance(graph, graph_setup.CompactGraph):
+        csr = graph.csr()
+        if csr is None:
+            return _search_compact(graph, start, goal, lambda s, g: id_dfs(
+                graph.adjacency_by_id(), s, g, max_depth, prune=prune, stats=stats, deadline=deadline), stats)
+        return _search_compact(graph, start, goal, lambda s, g: _deepen(
+            lambda limit: _depth_limited_csr(*csr, s, g, limit, prune, deadline, on_expand, on_push),
+            max_depth, stats), stats)
+
+    return _deepen(lambda limit: _depth_limited(graph, start, goal, limit, prune, deadline, on_expand, on_push),
+                   max_depth, stats)
 
-    def dls(node, goal, depth, path):
-        # Time-out check in recursion
-        if (time.perf_counter() - start_time) > max_time:
-            return None  # Signal time-out at this deeper level
 
-        if node == goal:
+def _deepen(depth_limited, max_depth, stats):
+    """
+    The deepening loop of id_dfs: runs depth_limited(limit) for limits
+    0, 1, ... max_depth until a pass finds the goal, times out, or never
+    reaches its limit.
+    """
+    previous = 0  # Expansions of the previous pass, which the next one redoes
+    for limit in range(max_depth + 1):
+        search_start = time.perf_counter()
+        path, expanded, visited, deepest, timed_out, cut_off = depth_limited(limit)
+        if stats is not None:
+            stats.record(expanded, visited - 1, deepest, search_start, min(previous, expanded))
+            stats.iterations.append(visited)
+        previous = expanded
+        if path is not None:
             return path, len(path) - 1
+        if timed_out or not cut_off:
+            break
 
-        if depth == 0:
-            return None
+    return None, float('inf')
 
-        for neighbor in graph.get(node, []):
-            if neighbor not in path:
-                result = dls(neighbor, goal, depth - 1, path + [neighbor])
-                if result:
-                    return result
-        return None
 
-    for depth in range(max_depth + 1):
-        result = dls(start, goal, depth, [start])
-        if result:
-            return result
+def _depth_limited(graph, start, goal, limit, prune, deadline, on_expand=None, on_push=None):
+    """
+    One depth-limited DFS pass of id_dfs. Returns (path or None, nodes
+    expanded, nodes visited, longest route held, timed out, whether any node
+    was cut off at the limit).
+    """
+    if start == goal:
+        return [start], 0, 1, 1, False, False
+
+    path = [start]  # Current route; on_path mirrors it for O(1) membership tests
+    on_path = {start}
+    best_depth = {start: 0}
+    expired = deadline.expired
+    visited = 1
+    if limit == 0:
+        return None, 0, visited, 1, False, bool(graph.get(start))
 
-    return None, float('inf')
+    if on_expand is not None:
+        on_expand(start)
+    stack = [iter(graph.get(start, []))]
+    expanded = deepest = 1
+    cut_off = False
+
+    while stack:
+        if expired():
+            return None, expanded, visited, deepest, True, cut_off
+
+        neighbor = next(stack[-1], None)
+        if neighbor is None:
+            stack.pop()
+            on_path.discard(path.pop())
+            continue
+        if neighbor in on_path:
+            continue
 
+        depth = len(path)
+        if prune:
+            if best_depth.get(neighbor, limit + 1) <= depth:
+                continue
+            best_depth[neighbor] = depth
 
-def best_first_search(graph, start, goal, coordinates, max_time=5.0):
+        visited += 1
+        if on_push is not None:
+            on_push(neighbor)
+        if neighbor == goal:
+            return path + [neighbor], expanded, visited, max(deepest, depth + 1), False, cut_off
+        if depth == limit:
+            if not cut_off:
+                cut_off = any(n not in on_path and n != neighbor for n in graph.get(neighbor, []))
+            continue
+
+        expanded += 1
+        if on_expand is not None:
+            on_expand(neighbor)
+        path.append(neighbor)
+        on_path.add(neighbor)
+        stack.append(iter(graph.get(neighbor, [])))
+        if len(path) > deepest:
+            deepest = len(path)
+
+    return None, expanded, visited, deepest, False, cut_off
+
+
+def _depth_limited_csr(offsets, targets, start, goal, limit, prune, deadline, on_expand=None, on_push=None):
+    """
+    _depth_limited on the node ids of a CompactGraph, reading neighbor rows
+    straight from its CSR arrays, with a bytearray for the nodes on the
+    current route and an array for the best depths seen.
+    """
+    if start == goal:
+        return [start], 0, 1, 1, False, False
+
+    n = len(offsets) - 1
+    path = [start]
+    on_path = bytearray(n)
+    on_path[start] = 1
+    best_depth = array('i', [limit + 1]) * n if prune else None
+    if prune:
+        best_depth[start] = 0
+    expired = deadline.expired
+    visited = 1
+    if limit == 0:
+        return None, 0, visited, 1, False, offsets[start + 1] > offsets[start]
+
+    if on_expand is not None:
+        on_expand(start)
+    stack = [iter(targets[offsets[start]:offsets[start + 1]])]
+    expanded = deepest = 1
+    cut_off = False
+
+    while stack:
+        if expired():
+            return None, expanded, visited, deepest, True, cut_off
+
+        neighbor = next(stack[-1], None)
+        if neighbor is None:
+            stack.pop()
+            on_path[path.pop()] = 0
+            continue
+        if on_path[neighbor]:
+            continue
+
+        depth = len(path)
+        if prune:
+            if best_depth[neighbor] <= depth:
+                continue
+            best_depth[neighbor] = depth
+
+        visited += 1
+        if on_push is not None:
+            on_push(neighbor)
+        if neighbor == goal:
+            return path + [neighbor], expanded, visited, max(deepest, depth + 1), False, cut_off
+        if depth == limit:
+            if not cut_off:
+                cut_off = any(not on_path[n] and n != neighbor
+                              for n in targets[offsets[neighbor]:offsets[neighbor + 1]])
+            continue
+
+        expanded += 1
+        if on_expand is not None:
+            on_expand(neighbor)
+        path.append(neighbor)
+        on_path[neighbor] = 1
+        stack.append(iter(targets[offsets[neighbor]:offsets[neighbor + 1]]))
+        if len(path) > deepest:
+            deepest = len(path)
+
+    return None, expanded, visited, deepest, False, cut_off
+
+
+def best_first_search(graph, start, goal, coordinates, max_time=5.0, stats=None, deadline=None):
     """
     Best-First Search using a heuristic = straight-line distance to goal,
     returning (path, cost) or (None, float('inf')) if not found or time-out.
+    A CompactGraph uses its own coordinates, so 'coordinates' may be None.
     """
-    start_time = time.perf_counter()
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        return _search_compact(graph, start, goal, lambda s, g: _best_first(
+            graph.neighbors, _compact_heuristic(graph, g), s, g, deadline, stats, graph.names), stats)
 
-    def heuristic(city):
-        return graph_setup.haversine_distance(city, goal, coordinates)
+    return _best_first(lambda city: graph.get(city, []), _dict_heuristic(goal, coordinates),
+                       start, goal, deadline, stats)
 
-    visited = set()
-    queue = [(heuristic(start), [start])]
 
-    while queue:
-        if (time.perf_counter() - start_time) > max_time:
-            print("Best-First Search timed out!")
-            return None, float('inf')
+def _best_first(neighbors, heuristic, start, goal, deadline, stats=None, names=None):
+    expired = deadline.expired
+    heuristic = _counted(heuristic, stats)
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
 
-        _, path = heapq.heappop(queue)
-        current = path[-1]
+    parents = {}  # Filled when a node is expanded, so doubles as the visited set
+    queue = [(heuristic(start), _PathTieBreak(parents, start, None, names))]
+    expanded = generated = peak = 0
 
-        if current == goal:
-            return path, len(path) - 1
+    try:
+        while queue:
+            if expired():
+                return None, float('inf')
 
-        if current not in visited:
-            visited.add(current)
-            for neighbor in graph.get(current, []):
-                heapq.heappush(queue, (heuristic(neighbor), path + [neighbor]))
+            if len(queue) > peak:
+                peak = len(queue)
+            _, entry = heapq.heappop(queue)
+            current, parent = entry.node, entry.parent
+            if current in parents:
+                continue
+            parents[current] = parent
 
-    return None, float('inf')
+            if current == goal:
+                path = _reconstruct_path(parents, goal)
+                return path, len(path) - 1
+
+            expanded += 1
+            if on_expand is not None:
+                on_expand(current)
+            for neighbor in neighbors(current):
+                if neighbor not in parents:
+                    heapq.heappush(queue, (heuristic(neighbor), _PathTieBreak(parents, neighbor, current, names)))
+                    generated += 1
+                    if on_push is not None:
+                        on_push(neighbor)
+
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
+
+
+def beam_search(graph, start, goal, coordinates, max_time=5.0, width=10, stats=None, deadline=None):
+    """
+    Beam search: Best-First Search level by level, keeping only the 'width'
+    cities closest (in straight line) to the goal at each level,
+    returning (path, cost) like best_first_search, or (None, float('inf')).
 
+    Time and memory per level are bounded by width, but a route may be missed
+    or long: stats.suboptimality is always inf.
+    """
+    deadline = _deadline(deadline, max_time)
+    if stats is not None:
+        stats.suboptimality = float('inf')
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        return _search_compact(graph, start, goal, lambda s, g: _beam(
+            graph.neighbors, _compact_heuristic(graph, g), s, g, deadline, width, stats, graph.names), stats)
+
+    return _beam(lambda city: graph.get(city, []), _dict_heuristic(goal, coordinates),
+                 start, goal, deadline, width, stats)
+
+
+def _beam(neighbors, heuristic, start, goal, deadline, width, stats=None, names=None):
+    if start == goal:
+        return [start], 0
+
+    expired = deadline.expired
+    heuristic = _counted(heuristic, stats)
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    parents = {start: None}  # Every city ever kept in the beam
+    level = [start]
+    expanded = generated = peak = 0
+
+    def order(node):
+        return heuristic(node), (node if names is None else names[node])
+
+    try:
+        while level:
+            candidates = {}  # neighbor -> parent, for this level
+            for current in level:
+                if expired():
+                    return None, float('inf')
+
+                expanded += 1
+                if on_expand is not None:
+                    on_expand(current)
+                for neighbor in neighbors(current):
+                    if neighbor not in parents and neighbor not in candidates:
+                        candidates[neighbor] = current
+                        generated += 1
+                        if on_push is not None:
+                            on_push(neighbor)
+                        if neighbor == goal:
+                            parents[goal] = current
+                            path = _reconstruct_path(parents, goal)
+                            return path, len(path) - 1
+
+            if len(candidates) > peak:
+                peak = len(candidates)
+            level = sorted(candidates, key=order)[:width]
+            for node in level:
+                parents[node] = candidates[node]
+
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
 
-def a_star_search(graph, start, goal, coordinates, max_time=5.0):
+
+def a_star_search(graph, start, goal, coordinates, max_time=5.0, consistent=True, stats=None,
+                  landmarks=None, deadline=None):
     """
     A* Search using Haversine for both heuristic and path cost,
     returning (path, cost) or (None, float('inf')) if not found or time-out.
+    A CompactGraph uses its precomputed edge lengths and coordinates,
+    so 'coordinates' may be None.
+
+    Keeps the best-known g for every node and skips stale heap entries. With
+    a consistent heuristic (Haversine is one) an expanded node is closed for
+    good; pass consistent=False to let cheaper paths reopen closed nodes.
+    Pass a SearchStats as 'stats' to get node expansion/generation counts.
+    Pass a landmarks.LandmarkTable built for this graph as 'landmarks' to use
+    max(Haversine, landmark bound) as the heuristic (ALT). Raises ValueError
+    if the table is for another graph, or out of date after road updates.
     """
-    start_time = time.perf_counter()
+    deadline = _deadline(deadline, max_time)
+    if landmarks is not None:
+        if len(landmarks) != len(graph):
+            raise ValueError("The landmark table was built for a different graph")
+        if not landmarks.is_current(graph):
+            raise ValueError("The landmark table is out of date: roads were added or shortened since it was built")
+
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        def search(s, g):
+            heuristic = _compact_heuristic(graph, g)
+            if landmarks is not None:
+                heuristic = _max_heuristic(heuristic, landmarks.heuristic_to(g))
+            return _a_star(graph.edges, heuristic, s, g, deadline, consistent, stats, graph.names)
+        return _search_compact(graph, start, goal, search, stats)
+
+    heuristic = _dict_heuristic(goal, coordinates)
+    if landmarks is not None:
+        heuristic = _max_heuristic(heuristic, _landmark_heuristic(landmarks, goal))
+    return _a_star(_dict_edges(graph, coordinates), heuristic, start, goal, deadline, consistent, stats)
+
+
+def _max_heuristic(first, second):
+    """
+    Pointwise maximum of two admissible heuristics, which is still admissible
+    (and consistent, when both are).
+    """
+    def heuristic(node):
+        return max(first(node), second(node))
+    return heuristic
+
+
+def _landmark_heuristic(landmarks, goal):
+    """
+    Landmark lower bound to goal, for a dict graph keyed by city name.
+    """
+    goal_id = landmarks.index.get(goal)
+    if goal_id is None:
+        return lambda city: 0.0
+    bound, index = landmarks.heuristic_to(goal_id), landmarks.index
 
     def heuristic(city):
-        return graph_setup.haversine_distance(city, goal, coordinates)
+        node = index.get(city)
+        return 0.0 if node is None else bound(node)
+    return heuristic
 
-    queue = [(0, 0, [start])]  # (f, g, path)
-    visited = {}
 
-    while queue:
-        if (time.perf_counter() - start_time) > max_time:
-            print("A* timed out!")
-            return None, float('inf')
+def _a_star(edges, heuristic, start, goal, deadline, consistent=True, stats=None, names=None):
+    expired = deadline.expired
+    heuristic = _counted(heuristic, stats)
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
 
-        f, g_cost, path = heapq.heappop(queue)
-        current = path[-1]
+    g_score = {start: 0}  # Best-known cost from start
+    parents = {start: None}  # Parent on the best-known path
+    closed = set()
+    reopened = set()
+    queue = [(heuristic(start), 0, _PathTieBreak(parents, start, None, names))]  # (f, g, entry)
+    expanded = reexpanded = generated = peak = 0
 
-        if current == goal:
-            return path, g_cost
+    try:
+        while queue:
+            if expired():
+                return None, float('inf')
 
-        # Only proceed if not visited or found cheaper cost
-        if current not in visited or g_cost < visited[current]:
-            visited[current] = g_cost
-            for neighbor in graph.get(current, []):
-                travel_cost = graph_setup.haversine_distance(current, neighbor, coordinates)
+            if len(queue) > peak:
+                peak = len(queue)
+            f, g_cost, entry = heapq.heappop(queue)
+            current = entry.node
+
+            # Stale entry: the node was expanded already or a cheaper path was pushed since
+            if current in closed or g_cost > g_score[current]:
+                continue
+
+            if current == goal:
+                return _reconstruct_path(parents, goal), g_cost
+
+            closed.add(current)
+            expanded += 1
+            if reopened:
+                if current in reopened:
+                    reopened.discard(current)
+                    reexpanded += 1
+            if on_expand is not None:
+                on_expand(current)
+            for neighbor, travel_cost in edges(current):
                 new_g = g_cost + travel_cost
-                new_f = new_g + heuristic(neighbor)
-                heapq.heappush(queue, (new_f, new_g, path + [neighbor]))
+                if neighbor in g_score and new_g >= g_score[neighbor]:
+                    continue
+                if neighbor in closed:
+                    if consistent:
+                        continue  # A consistent heuristic never finds a cheaper path to a closed node
+                    closed.discard(neighbor)  # Reopen it with the cheaper path
+                    reopened.add(neighbor)
 
-    return None, float('inf')
+                g_score[neighbor] = new_g
+                parents[neighbor] = current
+                generated += 1
+                heapq.heappush(queue, (new_g + heuristic(neighbor), new_g,
+                                       _PathTieBreak(parents, neighbor, current, names)))
+                if on_push is not None:
+                    on_push(neighbor)
+
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start, reexpanded)
+
+
+def weighted_a_star_search(graph, start, goal, coordinates, max_time=5.0, weight=1.5, stats=None,
+                           deadline=None):
+    """
+    Weighted A*: A* ordered by f = g + weight * h,
+    returning (path, cost) like a_star_search, or (None, float('inf')).
+
+    A larger weight heads for the goal more greedily and expands fewer nodes;
+    the route found costs at most 'weight' times the optimum, which is
+    reported as stats.suboptimality.
+    """
+    deadline = _deadline(deadline, max_time)
+    if weight < 1:
+        raise ValueError("weight must be at least 1")
+    if stats is not None:
+        stats.suboptimality = weight
+
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        return _search_compact(graph, start, goal, lambda s, g: _a_star(
+            graph.edges, _weighted(_compact_heuristic(graph, g), weight), s, g, deadline,
+            stats=stats, names=graph.names), stats)
+
+    return _a_star(_dict_edges(graph, coordinates), _weighted(_dict_heuristic(goal, coordinates), weight),
+                   start, goal, deadline, stats=stats)
+
+
+def _weighted(heuristic, weight):
+    return lambda node: weight * heuristic(node)
+
+
+def ara_star_search(graph, start, goal, coordinates, max_time=5.0, initial_weight=3.0, weight_step=0.5,
+                    stats=None, deadline=None):
+    """
+    Anytime Repairing A* (ARA*),
+    returning (path, cost) or (None, float('inf')) if no route was found in time.
+
+    Runs weighted A* with weight 'initial_weight', then keeps lowering the
+    weight by 'weight_step' and repairing the search (reusing every g-value
+    found so far) until the route is provably optimal or max_time runs out.
+    On time-out the best route found so far is returned, and
+    stats.suboptimality holds how far from optimal it may be.
+    """
+    deadline = _deadline(deadline, max_time)
+    if initial_weight < 1 or weight_step <= 0:
+        raise ValueError("initial_weight must be at least 1 and weight_step positive")
+
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        return _search_compact(graph, start, goal, lambda s, g: _ara_star(
+            graph.edges, _compact_heuristic(graph, g), s, g, deadline, initial_weight, weight_step,
+            stats, graph.names), stats)
+
+    return _ara_star(_dict_edges(graph, coordinates), _dict_heuristic(goal, coordinates), start, goal,
+                     deadline, initial_weight, weight_step, stats)
+
+
+def _ara_star(edges, heuristic, start, goal, deadline, initial_weight, weight_step, stats=None, names=None):
+    expired = deadline.expired
+    heuristic = _counted(heuristic, stats)
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+
+    g_score = {start: 0}
+    parents = {start: None}
+    opened = {start}  # Nodes waiting to be expanded in the current pass
+    inconsistent = set()  # Nodes improved after their expansion in the current pass
+    weight = initial_weight
+    best, bound = (None, float('inf')), float('inf')
+    ever_closed = set()  # Expanded in any pass
+    expanded = reexpanded = generated = peak = 0
+
+    def entry(node):
+        return (g_score[node] + weight * heuristic(node), g_score[node],
+                _PathTieBreak(parents, node, parents[node], names))
+
+    try:
+        while True:
+            queue = [entry(node) for node in opened]
+            heapq.heapify(queue)
+            closed = set()
+            pass_expanded = expanded
+
+            # One weighted A* pass, stopping once nothing left can beat the goal's g
+            while queue:
+                if expired():
+                    return best
+
+                f, g_cost, top = queue[0]
+                current = top.node
+                if current not in opened or g_cost > g_score[current]:
+                    heapq.heappop(queue)  # Stale entry
+                    continue
+                if g_score.get(goal, float('inf')) <= f:
+                    break
+
+                if len(queue) > peak:
+                    peak = len(queue)
+                heapq.heappop(queue)
+                opened.discard(current)
+                closed.add(current)
+                expanded += 1
+                if current in ever_closed:
+                    reexpanded += 1
+                else:
+                    ever_closed.add(current)
+                if on_expand is not None:
+                    on_expand(current)
+                for neighbor, travel_cost in edges(current):
+                    new_g = g_cost + travel_cost
+                    if new_g >= g_score.get(neighbor, float('inf')):
+                        continue
+                    g_score[neighbor] = new_g
+                    parents[neighbor] = current
+                    if neighbor in closed:
+                        inconsistent.add(neighbor)
+                    else:
+                        opened.add(neighbor)
+                        generated += 1
+                        heapq.heappush(queue, entry(neighbor))
+                        if on_push is not None:
+                            on_push(neighbor)
+
+            if stats is not None:
+                stats.iterations.append(expanded - pass_expanded)
+            if goal not in g_score:
+                return None, float('inf')  # Every reachable node was expanded
+
+            best = (_reconstruct_path(parents, goal), g_score[goal])
+            # Nothing unexpanded can lead to a route cheaper than g + h
+            lower = min((g_score[node] + heuristic(node) for node in opened | inconsistent),
+                        default=float('inf'))
+            bound = max(1.0, min(weight, best[1] / lower)) if lower > 0 else weight
+            if bound <= 1.0:
+                return best
+
+            weight = max(1.0, weight - weight_step)
+            opened |= inconsistent
+            inconsistent.clear()
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start, reexpanded)
+            stats.suboptimality = bound
+
+
+def ida_star_search(graph, start, goal, coordinates, max_time=5.0, stats=None, deadline=None):
+    """
+    Iterative-Deepening A* with the Haversine heuristic,
+    returning (path, cost) or (None, float('inf')) if not found or time-out.
+
+    Each pass is a depth-first search that cuts off where g + h exceeds the
+    bound; the next pass raises the bound to the smallest f that was cut off.
+    Only the current route is kept, so memory grows with route length, not
+    with the frontier; the price is time, since with real-valued road lengths
+    the bound often rises by one route at a time. Pass a SearchStats as
+    'stats' to get node counts (the nodes visited by each pass go to
+    stats.iterations).
+    """
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        return _search_compact(graph, start, goal, lambda s, g: _ida_star(
+            graph.edges, _compact_heuristic(graph, g), s, g, deadline, stats), stats)
+
+    # Every pass walks the same roads again, so measure each city's roads once
+    edges, lengths = _dict_edges(graph, coordinates), {}
+
+    def cached_edges(city):
+        result = lengths.get(city)
+        if result is None:
+            result = lengths[city] = edges(city)
+        return result
+    return _ida_star(cached_edges, _dict_heuristic(goal, coordinates), start, goal, deadline, stats)
+
+
+def _ida_star(edges, heuristic, start, goal, deadline, stats=None):
+    if start == goal:
+        return [start], 0
+
+    expired = deadline.expired
+    heuristic = _counted(heuristic, stats)
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    bound = heuristic(start)
+    expanded = reexpanded = generated = peak = 0
+    previous = 0  # Expansions of the previous pass, which the next one redoes
+
+    try:
+        while bound != float('inf'):
+            next_bound = float('inf')
+            path, costs = [start], [0]  # Current route and the cost to reach each node on it
+            on_path = {start}
+            if on_expand is not None:
+                on_expand(start)
+            stack = [iter(edges(start))]
+            pass_expanded = visited = 1
+
+            while stack:
+                if expired():
+                    return None, float('inf')
+
+                edge = next(stack[-1], None)
+                if edge is None:
+                    stack.pop()
+                    on_path.discard(path.pop())
+                    costs.pop()
+                    continue
+
+                neighbor, travel_cost = edge
+                if neighbor in on_path:
+                    continue
+                g_cost = costs[-1] + travel_cost
+                f = g_cost + heuristic(neighbor)
+                generated += 1
+                if on_push is not None:
+                    on_push(neighbor)
+                if f > bound:
+                    next_bound = min(next_bound, f)
+                    continue
+
+                visited += 1
+                if neighbor == goal:
+                    return path + [neighbor], g_cost
+
+                pass_expanded += 1
+                if on_expand is not None:
+                    on_expand(neighbor)
+                path.append(neighbor)
+                costs.append(g_cost)
+                on_path.add(neighbor)
+                stack.append(iter(edges(neighbor)))
+                if len(path) > peak:
+                    peak = len(path)
+
+            expanded += pass_expanded
+            reexpanded += min(previous, pass_expanded)
+            previous, pass_expanded = pass_expanded, 0
+            if stats is not None:
+                stats.iterations.append(visited)
+            bound = next_bound
+
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            # A pass cut short still counts its expansions
+            stats.record(expanded + pass_expanded, generated, peak, search_start,
+                         reexpanded + min(previous, pass_expanded))
+
+
+def sma_star_search(graph, start, goal, coordinates, max_time=5.0, max_nodes=1000, stats=None,
+                    deadline=None):
+    """
+    Simplified Memory-bounded A* with the Haversine heuristic,
+    returning (path, cost) or (None, float('inf')) if not found or time-out.
+
+    A tree search that behaves like A* until 'max_nodes' search nodes are
+    held; then the worst leaf (highest f, shallowest first) is forgotten
+    and its f is backed up into its parent, so the branch is regenerated
+    only once it looks best again. A successor is skipped when its city is
+    already held with no higher g at no greater depth: any route through it
+    can go through the held node instead, at no more cost and in no more
+    cities. The route is optimal when the best route has at most max_nodes
+    cities; otherwise the cheapest route of at most max_nodes cities is
+    returned, if any. A budget barely above the route's length leaves room
+    for little else, so branches are forgotten and regenerated many times.
+    """
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        return _search_compact(graph, start, goal, lambda s, g: _sma_star(
+            graph.edges, _compact_heuristic(graph, g), s, g, deadline, max_nodes, stats), stats)
+
+    return _sma_star(_dict_edges(graph, coordinates), _dict_heuristic(goal, coordinates),
+                     start, goal, deadline, max_nodes, stats)
+
+
+class _SMANode:
+    """A node of the SMA* search tree, with the f-costs of its forgotten children."""
+    __slots__ = ('state', 'parent', 'g', 'f', 'depth', 'children', 'successors', 'next_successor',
+                 'forgotten', 'key')
+
+    def __init__(self, state, parent, g, f):
+        self.state = state
+        self.parent = parent
+        self.g = g
+        self.f = f
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.children = []
+        self.successors = None  # (state, cost) for each neighbor off the route here, once expanded
+        self.next_successor = 0  # How many successors have been generated at least once
+        self.forgotten = {}  # state -> backed-up f of a dropped child
+        self.key = None  # Sequence number of its current open-list entry, None when not open
+
+
+def _sma_star(edges, heuristic, start, goal, deadline, max_nodes, stats=None):
+    expired = deadline.expired
+    heuristic = _counted(heuristic, stats)
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    # Open nodes are those with successors not held (never generated, or
+    # forgotten), indexed twice with lazy deletion: best first (lowest f,
+    # deepest) for generating the next successor, and worst first (highest
+    # f, shallowest) for choosing a leaf to drop.
+    best_queue, worst_queue = [], []
+    holding = {}  # city -> the search nodes held for it
+    sequence = 0
+    held = 1
+    expanded = reexpanded = generated = peak = 0
+
+    def open_node(node):
+        nonlocal sequence
+        sequence += 1
+        node.key = sequence
+        f = node.f
+        if node.forgotten and node.next_successor == len(node.successors):
+            f = min(node.forgotten.values())  # All that is left is regenerating the best of these
+        heapq.heappush(best_queue, (f, -node.depth, sequence, node))
+        heapq.heappush(worst_queue, (-f, node.depth, -sequence, node))
+
+    def peek_best():
+        while best_queue and best_queue[0][3].key != best_queue[0][2]:
+            heapq.heappop(best_queue)
+        return best_queue[0] if best_queue else None
+
+    def pop_worst_leaf(keep):
+        """Removes and returns the worst open leaf other than 'keep'."""
+        skipped = None
+        while worst_queue:
+            entry = heapq.heappop(worst_queue)
+            node = entry[3]
+            if node.key != -entry[2] or node.children:
+                continue
+            if node is keep:
+                skipped = entry
+                continue
+            if skipped is not None:
+                heapq.heappush(worst_queue, skipped)
+            return node
+        if skipped is not None:
+            heapq.heappush(worst_queue, skipped)
+        return None
+
+    def backup(node):
+        """Raises f to the best of the children once every successor has been generated."""
+        while node is not None and node.successors is not None and node.next_successor == len(node.successors):
+            best = min([child.f for child in node.children] + list(node.forgotten.values()),
+                       default=float('inf'))
+            if best == node.f:
+                break
+            node.f = best
+            if node.key is not None:
+                open_node(node)
+            node = node.parent
+
+    def forget(leaf):
+        nonlocal held
+        parent = leaf.parent
+        leaf.key = None
+        parent.children.remove(leaf)
+        parent.forgotten[leaf.state] = leaf.f
+        holding[leaf.state].remove(leaf)
+        held -= 1
+        open_node(parent)  # To regenerate the child when it looks best
+
+    root = _SMANode(start, None, 0, heuristic(start))
+    holding[start] = [root]
+    open_node(root)
+
+    try:
+        while True:
+            if expired():
+                return None, float('inf')
+
+            entry = peek_best()
+            if entry is None or entry[0] == float('inf'):
+                return None, float('inf')
+            node = entry[3]
+            if node.state == goal:
+                path = []
+                cost = node.g
+                while node is not None:
+                    path.append(node.state)
+                    node = node.parent
+                return path[::-1], cost
+
+            if node.successors is None:
+                # First expansion: list the neighbors not already on the route here
+                expanded += 1
+                if on_expand is not None:
+                    on_expand(node.state)
+                on_route = set()
+                ancestor = node.parent
+                while ancestor is not None:
+                    on_route.add(ancestor.state)
+                    ancestor = ancestor.parent
+                cheapest = {}
+                for neighbor, travel_cost in edges(node.state):
+                    if neighbor not in on_route and travel_cost < cheapest.get(neighbor, float('inf')):
+                        cheapest[neighbor] = travel_cost
+                if node.depth + 2 >= max_nodes:
+                    # No room to extend a route past the children: only the goal is worth generating
+                    cheapest = {goal: cheapest[goal]} if goal in cheapest else {}
+                # Most promising first, so the ones still to generate are the ones worth forgetting
+                node.successors = sorted(cheapest.items(), key=lambda item: item[1] + heuristic(item[0]))
+                if not node.successors:
+                    backup(node)  # Dead end: f becomes inf
+                    continue
+
+            # Generate the next successor, or regenerate the best forgotten one
+            if node.next_successor < len(node.successors):
+                neighbor, travel_cost = node.successors[node.next_successor]
+                node.next_successor += 1
+                child_f = 0
+            else:
+                neighbor = min(node.forgotten, key=node.forgotten.get)
+                child_f = node.forgotten.pop(neighbor)
+                travel_cost = dict(node.successors)[neighbor]
+                expanded += 1
+                reexpanded += 1
+                if on_expand is not None:
+                    on_expand(node.state)
+            g_cost = node.g + travel_cost
+            duplicate = any(other.g <= g_cost and other.depth <= node.depth + 1
+                            for other in holding.get(neighbor, ()))
+            if not duplicate:
+                f = max(node.f, g_cost + heuristic(neighbor), child_f)
+
+                # Make room first, never dropping the node being expanded
+                if held >= max_nodes:
+                    worst = pop_worst_leaf(node)
+                    if worst is None:
+                        return None, float('inf')  # max_nodes too small to hold any route
+                    forget(worst)
+
+                child = _SMANode(neighbor, node, g_cost, f)
+                node.children.append(child)
+                holding.setdefault(neighbor, []).append(child)
+                open_node(child)
+                held += 1
+                generated += 1
+                if on_push is not None:
+                    on_push(neighbor)
+                if held > peak:
+                    peak = held
+
+            backup(node)  # Requeues the node if its f changed
+            if node.next_successor == len(node.successors):
+                if node.forgotten:
+                    open_node(node)  # Now queued by its best forgotten child
+                elif node.children:
+                    node.key = None  # Every successor is held
+                else:
+                    open_node(node)  # Every successor was a duplicate: a dead end (f = inf) to drop first
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start, reexpanded)
+
+
+def bidirectional_bfs(graph, start, goal, max_time=5.0, stats=None, deadline=None):
+    """
+    Bidirectional BFS over an undirected graph (as built by load_adjacencies),
+    growing the smaller of the two frontiers one full level at a time.
+    Returns the same (path, cost-in-edges) shape as bfs.
+    """
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        csr = graph.csr()
+        if csr is None:
+            return _search_compact(graph, start, goal, lambda s, g: bidirectional_bfs(
+                graph.adjacency_by_id(), s, g, stats=stats, deadline=deadline), stats)
+        return _search_compact(graph, start, goal, lambda s, g: _bidirectional_bfs_csr(
+            *csr, s, g, deadline, stats), stats)
+
+    if start == goal:
+        return [start], 0
+
+    expired = deadline.expired
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    parents = ({start: None}, {goal: None})  # Forward and backward search trees
+    depths = ({start: 0}, {goal: 0})
+    frontiers = ([start], [goal])
+    expanded = generated = peak = 0
+
+    try:
+        while frontiers[0] and frontiers[1]:
+            if len(frontiers[0]) + len(frontiers[1]) > peak:
+                peak = len(frontiers[0]) + len(frontiers[1])
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            other = 1 - side
+            best, meeting = float('inf'), None
+            next_frontier = []
+
+            # Expand one whole level, so the best meeting point in it is a shortest path
+            for current in frontiers[side]:
+                if expired():
+                    return None, float('inf')
+
+                expanded += 1
+                if on_expand is not None:
+                    on_expand(current)
+                for neighbor in graph.get(current, []):
+                    if neighbor in depths[other]:
+                        total = depths[side][current] + 1 + depths[other][neighbor]
+                        if total < best:
+                            best, meeting = total, (current, neighbor)
+                    if neighbor not in parents[side]:
+                        parents[side][neighbor] = current
+                        depths[side][neighbor] = depths[side][current] + 1
+                        next_frontier.append(neighbor)
+                        generated += 1
+                        if on_push is not None:
+                            on_push(neighbor)
+
+            if meeting is not None:
+                near, far = meeting if side == 0 else meeting[::-1]
+                path = _reconstruct_path(parents[0], near) + _reconstruct_path(parents[1], far)[::-1]
+                return path, best
+
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
+
+
+def _bidirectional_bfs_csr(offsets, targets, start, goal, deadline, stats=None):
+    """
+    bidirectional_bfs on the node ids of a CompactGraph, reading neighbor
+    rows straight from its CSR arrays, with arrays of parent ids and depths
+    (-1 = not reached) for each direction.
+    """
+    if start == goal:
+        return [start], 0
+
+    expired = deadline.expired
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    n = len(offsets) - 1
+    parents = (array('i', [-1]) * n, array('i', [-1]) * n)  # Forward and backward search trees
+    depths = (array('i', [-1]) * n, array('i', [-1]) * n)
+    parents[0][start], parents[1][goal] = start, goal
+    depths[0][start] = depths[1][goal] = 0
+    frontiers = ([start], [goal])
+    expanded = generated = peak = 0
+
+    try:
+        while frontiers[0] and frontiers[1]:
+            if len(frontiers[0]) + len(frontiers[1]) > peak:
+                peak = len(frontiers[0]) + len(frontiers[1])
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            side_parents, side_depths, other_depths = parents[side], depths[side], depths[1 - side]
+            best, meeting = float('inf'), None
+            next_frontier = []
+
+            # Expand one whole level, so the best meeting point in it is a shortest path
+            for current in frontiers[side]:
+                if expired():
+                    return None, float('inf')
+
+                expanded += 1
+                if on_expand is not None:
+                    on_expand(current)
+                depth = side_depths[current] + 1
+                for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                    other = other_depths[neighbor]
+                    if other >= 0 and depth + other < best:
+                        best, meeting = depth + other, (current, neighbor)
+                    if side_parents[neighbor] < 0:
+                        side_parents[neighbor] = current
+                        side_depths[neighbor] = depth
+                        next_frontier.append(neighbor)
+                        generated += 1
+                        if on_push is not None:
+                            on_push(neighbor)
+
+            if meeting is not None:
+                near, far = meeting if side == 0 else meeting[::-1]
+                path = _csr_path(parents[0], start, near) + _csr_path(parents[1], goal, far)[::-1]
+                return path, best
+
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+        return None, float('inf')
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
+
+
+def bidirectional_a_star_search(graph, start, goal, coordinates, max_time=5.0, stats=None,
+                                deadline=None):
+    """
+    Bidirectional A* over an undirected graph, using Haversine for both
+    path cost and heuristics, returning the same (path, cost) as a_star_search.
+
+    Both searches use the average potential p(v) = (h_goal(v) - h_start(v)) / 2
+    (forward) and -p(v) (backward), which keeps them consistent with each other.
+    The search stops once the two smallest frontier keys sum to at least the
+    best start-goal path seen, which guarantees that path is shortest.
+    """
+    deadline = _deadline(deadline, max_time)
+    if _unreachable(graph, start, goal):
+        return None, float('inf')
+    if isinstance(graph, graph_setup.CompactGraph):
+        return _search_compact(graph, start, goal, lambda s, g: _bidirectional_a_star(
+            graph.edges, _compact_heuristic(graph, g), _compact_heuristic(graph, s),
+            s, g, deadline, stats), stats)
+
+    return _bidirectional_a_star(_dict_edges(graph, coordinates), _dict_heuristic(goal, coordinates),
+                                 _dict_heuristic(start, coordinates), start, goal, deadline, stats)
+
+
+def _bidirectional_a_star(edges, to_goal, to_start, start, goal, deadline, stats=None):
+    if start == goal:
+        return [start], 0
+
+    expired = deadline.expired
+    to_goal, to_start = _counted(to_goal, stats), _counted(to_start, stats)
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+
+    def potential(node):
+        h_goal, h_start = to_goal(node), to_start(node)
+        if h_goal == float('inf') or h_start == float('inf'):
+            return 0.0  # No coordinates: every edge at this node costs inf anyway
+        return (h_goal - h_start) / 2
+
+    g_score = ({start: 0}, {goal: 0})
+    parents = ({start: None}, {goal: None})
+    closed = (set(), set())
+    queues = ([(potential(start), 0, start)], [(-potential(goal), 0, goal)])  # (key, g, node)
+    best, meeting = float('inf'), None
+    expanded = generated = peak = 0
+
+    try:
+        while queues[0] and queues[1]:
+            if expired():
+                return None, float('inf')
+
+            if len(queues[0]) + len(queues[1]) > peak:
+                peak = len(queues[0]) + len(queues[1])
+
+            if queues[0][0][0] + queues[1][0][0] >= best:
+                break  # Neither search can still improve on the best meeting
+
+            side = 0 if len(queues[0]) <= len(queues[1]) else 1
+            sign = 1 if side == 0 else -1
+            _, g_cost, current = heapq.heappop(queues[side])
+            if current in closed[side] or g_cost > g_score[side][current]:
+                continue  # Stale entry
+
+            closed[side].add(current)
+            expanded += 1
+            if on_expand is not None:
+                on_expand(current)
+            for neighbor, travel_cost in edges(current):
+                new_g = g_cost + travel_cost
+                if neighbor in g_score[side] and new_g >= g_score[side][neighbor]:
+                    continue
+
+                g_score[side][neighbor] = new_g
+                parents[side][neighbor] = current
+                generated += 1
+                heapq.heappush(queues[side], (new_g + sign * potential(neighbor), new_g, neighbor))
+                if on_push is not None:
+                    on_push(neighbor)
+
+                other_g = g_score[1 - side].get(neighbor)
+                if other_g is not None and new_g + other_g < best:
+                    best, meeting = new_g + other_g, neighbor
+
+        if meeting is None:
+            return None, float('inf')
+        path = _reconstruct_path(parents[0], meeting) + _reconstruct_path(parents[1], meeting)[-2::-1]
+        return path, best
+    finally:
+        if stats is not None:
+            stats.record(expanded, generated, peak, search_start)
+
+
+class ShortestPathTree:
+    """
+    Result of dijkstra_one_to_many: shortest distances and parent pointers
+    from one source. For a dict graph, dist/parents are dicts keyed by city
+    (missing = unreached). For a CompactGraph they are arrays indexed by node
+    id (inf / -1 = unreached), and 'names'/'index' map ids to cities.
+    """
+
+    def __init__(self, source, dist, parents, names=None, index=None):
+        self.source = source
+        self.dist = dist
+        self.parents = parents
+        self.names = names
+        self.index = index
+
+    def distance(self, city):
+        """Shortest distance from the source to 'city', or inf if unreached."""
+        if self.index is None:
+            return self.dist.get(city, float('inf'))
+        node = self.index.get(city)
+        return float('inf') if node is None else self.dist[node]
+
+    def path(self, city):
+        """Shortest path from the source to 'city', or None if unreached."""
+        if self.distance(city) == float('inf'):
+            return None
+        if self.index is None:
+            return _reconstruct_path(self.parents, city)
+
+        node = self.index[city]
+        path = [node]
+        while self.parents[node] >= 0:
+            node = self.parents[node]
+            path.append(node)
+        return [self.names[node] for node in reversed(path)]
+
+
+def dijkstra_one_to_many(graph, source, coordinates=None, targets=None, stats=None):
+    """
+    Dijkstra from 'source' over Haversine edge lengths, settling the whole
+    reachable graph once (or stopping early once every city in 'targets' is
+    settled). Returns a ShortestPathTree that answers every target.
+    A CompactGraph uses its precomputed edge lengths, so 'coordinates' may be None.
+    """
+    if isinstance(graph, graph_setup.CompactGraph):
+        dist = array('d', [float('inf')]) * len(graph)
+        parents = array('i', [-1]) * len(graph)
+        source_id = graph.id_of(source)
+        if source_id is not None:
+            target_ids = None if targets is None else {graph.id_of(t) for t in targets} - {None}
+            tree_dist, tree_parents = _dijkstra(graph.edges, source_id, target_ids, stats)
+            for node, d in tree_dist.items():
+                dist[node] = d
+                parent = tree_parents[node]
+                parents[node] = -1 if parent is None else parent
+        return ShortestPathTree(source, dist, parents, graph.names, graph.index)
+
+    if source not in graph:
+        return ShortestPathTree(source, {}, {})
+    tree_dist, tree_parents = _dijkstra(_dict_edges(graph, coordinates), source,
+                                        None if targets is None else set(targets), stats)
+    return ShortestPathTree(source, tree_dist, tree_parents)
+
+
+def _dijkstra(edges, source, targets=None, stats=None):
+    on_expand, on_push = _hooks(stats)
+    search_start = time.perf_counter()
+    dist = {source: 0.0}
+    parents = {source: None}
+    settled = set()
+    queue = [(0.0, source)]
+    remaining = None if targets is None else set(targets)
+    generated = peak = 0
+
+    while queue:
+        if len(queue) > peak:
+            peak = len(queue)
+        d, current = heapq.heappop(queue)
+        if current in settled:
+            continue
+        settled.add(current)
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+
+        if on_expand is not None:
+            on_expand(current)
+        for neighbor, travel_cost in edges(current):
+            new_d = d + travel_cost
+            if neighbor not in dist or new_d < dist[neighbor]:
+                dist[neighbor] = new_d
+                parents[neighbor] = current
+                heapq.heappush(queue, (new_d, neighbor))
+                generated += 1
+                if on_push is not None:
+                    on_push(neighbor)
+
+    if stats is not None:
+        stats.record(len(settled), generated, peak, search_start)
+    # Keep only settled (final) distances
+    if remaining is not None:
+        dist = {node: dist[node] for node in settled}
+        parents = {node: parents[node] for node in settled}
+    return dist, parents
+
+
+ALGORITHMS = {
+    "bfs": (bfs, False),
+    "dfs": (dfs, False),
+    "id_dfs": (id_dfs, False),
+    "best_first": (best_first_search, True),
+    "beam": (beam_search, True),
+    "a_star": (a_star_search, True),
+    "weighted_a_star": (weighted_a_star_search, True),
+    "ara_star": (ara_star_search, True),
+    "ida_star": (ida_star_search, True),
+    "sma_star": (sma_star_search, True),
+    "bidirectional_bfs": (bidirectional_bfs, False),
+    "bidirectional_a_star": (bidirectional_a_star_search, True),
+}
+
+
+def run_search(algorithm, graph, start, goal, coordinates=None, max_time=5.0, **options):
+    """
+    Runs the search registered under 'algorithm' in ALGORITHMS, passing
+    coordinates only to the informed ones, and returns its (path, cost).
+    Extra keyword options (e.g. max_depth for id_dfs, or a Deadline as
+    deadline) are passed through.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown search algorithm: {algorithm}")
+    search, informed = ALGORITHMS[algorithm]
+    if informed:
+        return search(graph, start, goal, coordinates, max_time=max_time, **options)
+    return search(graph, start, goal, max_time=max_time, **options)
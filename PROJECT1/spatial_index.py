@@ -0,0 +1,168 @@
+import heapq
+import math
+from array import array
+import graph_setup
+
+
+class SpatialIndex:
+    """
+    KD-tree over city locations, for snapping GPS points to the nearest
+    graph nodes.
+
+    Each location is stored as a 3D unit vector, so straight-line (chord)
+    distance orders points exactly like great-circle distance, with no
+    special cases at the poles or the antimeridian. The tree is implicit:
+    order[lo:hi] holds one subtree, with its splitting point at the middle
+    position and that point's split axis in axes. Cities without
+    coordinates are left out.
+    """
+
+    def __init__(self, names, lat, lon):
+        self.names = []
+        xs, ys, zs = array('d'), array('d'), array('d')
+        for name, lat_deg, lon_deg in zip(names, lat, lon):
+            if math.isnan(lat_deg) or math.isnan(lon_deg):
+                continue
+            x, y, z = _unit_vector(lat_deg, lon_deg)
+            self.names.append(name)
+            xs.append(x)
+            ys.append(y)
+            zs.append(z)
+        self.points = (xs, ys, zs)
+        self.order = array('i', range(len(self.names)))
+        self.axes = array('b', [0]) * len(self.names)
+        self._build()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _build(self):
+        order, axes = self.order, self.axes
+        stack = [(0, len(order))]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= 1:
+                continue
+            # Split on the axis along which this subtree is most spread out
+            spreads = []
+            for coordinate in self.points:
+                values = [coordinate[p] for p in order[lo:hi]]
+                spreads.append(max(values) - min(values))
+            axis = spreads.index(max(spreads))
+            coordinate = self.points[axis]
+            order[lo:hi] = array('i', sorted(order[lo:hi], key=coordinate.__getitem__))
+            mid = (lo + hi) // 2
+            axes[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Returns the k cities closest to (lat, lon) as (name, distance in km)
+        pairs, nearest first.
+        """
+        return self._query(lat, lon, k, 4.0)
+
+    def within(self, lat, lon, radius_km):
+        """
+        Returns every city within radius_km of (lat, lon) as (name, distance
+        in km) pairs, nearest first.
+        """
+        if radius_km < 0:
+            return []
+        angle = min(radius_km / graph_setup.EARTH_RADIUS_KM, math.pi)
+        chord = 2 * math.sin(angle / 2)
+        return self._query(lat, lon, len(self.names), chord * chord * (1 + 1e-12))
+
+    def snap(self, lat, lon):
+        """Returns the name of the city closest to (lat, lon), or None if the index is empty."""
+        found = self._query(lat, lon, 1, 4.0)
+        return found[0][0] if found else None
+
+    def _query(self, lat, lon, k, limit):
+        """
+        The (at most) k points with squared chord distance <= limit from
+        (lat, lon), nearest first, found by a depth-first walk that skips
+        every subtree whose box is farther than the current k-th best. The
+        box distance is kept incrementally, as the squared offset from the
+        query to the subtree along each axis (Arya and Mount).
+        """
+        if k <= 0 or not self.names:
+            return []
+        query = _unit_vector(lat, lon)
+        qx, qy, qz = query
+        xs, ys, zs = self.points
+        order, axes = self.order, self.axes
+        best = []  # Max-heap of (-squared distance, point) holding the k best so far
+        stack = [(0, len(order), 0.0, (0.0, 0.0, 0.0))]
+
+        while stack:
+            lo, hi, box, offsets = stack.pop()
+            bound = limit if len(best) < k else -best[0][0]
+            if lo >= hi or box > bound:
+                continue
+            mid = (lo + hi) // 2
+            p = order[mid]
+            d = (xs[p] - qx) ** 2 + (ys[p] - qy) ** 2 + (zs[p] - qz) ** 2
+            if d <= bound:
+                if len(best) < k:
+                    heapq.heappush(best, (-d, p))
+                else:
+                    heapq.heapreplace(best, (-d, p))
+
+            axis = axes[mid]
+            diff = query[axis] - self.points[axis][p]
+            far_offsets = list(offsets)
+            far_offsets[axis] = diff * diff
+            far = (box - offsets[axis] + diff * diff, tuple(far_offsets))
+            # Visit the side holding the query point first
+            if diff < 0:
+                stack.append((mid + 1, hi) + far)
+                stack.append((lo, mid, box, offsets))
+            else:
+                stack.append((lo, mid) + far)
+                stack.append((mid + 1, hi, box, offsets))
+
+        return [(self.names[p], _chord_to_km(math.sqrt(-d))) for d, p in sorted(best, reverse=True)]
+
+
+def build_spatial_index(graph, coordinates=None):
+    """
+    Builds a SpatialIndex over the cities of a CompactGraph, or of a dict
+    graph using 'coordinates' (as returned by load_coordinates). Only
+    cities in the graph are indexed, so snapped points are valid search
+    endpoints.
+    """
+    if isinstance(graph, graph_setup.CompactGraph):
+        return SpatialIndex(graph.names, graph.lat, graph.lon)
+    located = [city for city in graph if city in coordinates]
+    return SpatialIndex(located, [coordinates[city][0] for city in located],
+                        [coordinates[city][1] for city in located])
+
+
+def parse_point(text):
+    """
+    Parses "lat,lon" (degrees, optionally space-separated) into a
+    (lat, lon) tuple, or returns None if 'text' is not a valid point.
+    """
+    fields = text.replace(",", " ").split()
+    if len(fields) != 2:
+        return None
+    try:
+        lat, lon = float(fields[0]), float(fields[1])
+    except ValueError:
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return lat, lon
+
+
+def _unit_vector(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+
+def _chord_to_km(chord):
+    """Great-circle distance (km) between two unit vectors 'chord' apart."""
+    return 2 * graph_setup.EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
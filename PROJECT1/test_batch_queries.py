@@ -0,0 +1,94 @@
+import unittest
+import time
+import multiprocessing.context
+import multiprocessing.pool
+from unittest.mock import patch
+import graph_setup
+import search_algorithms
+import batch_queries
+
+
+class TestBatchQueries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cities = list(cls.graph)
+        algorithms = list(search_algorithms.ALGORITHMS)
+        cls.queries = [(start, goal, algorithms[i % len(algorithms)])
+                       for i, (start, goal) in enumerate(zip(cities, reversed(cities)))]
+
+    def check_results(self, results, graph):
+        self.assertEqual(len(results), len(self.queries))
+        for query, result in zip(self.queries, results):
+            start, goal, algorithm = query
+            self.assertEqual((result.start, result.goal, result.algorithm), query)
+            expected = search_algorithms.run_search(algorithm, graph, start, goal, self.coords)
+            self.assertEqual(result.path, expected[0])
+            self.assertAlmostEqual(result.cost, expected[1], places=6)
+            self.assertGreaterEqual(result.elapsed, 0.0)
+            self.assertFalse(result.timed_out)
+
+    def test_inline(self):
+        results = batch_queries.run_batch(self.queries, self.graph, self.coords, processes=1)
+        self.check_results(results, self.graph)
+
+    def test_process_pool_keeps_order(self):
+        results = batch_queries.run_batch(iter(self.queries), self.graph, self.coords,
+                                          processes=2, chunksize=4)
+        self.check_results(results, self.graph)
+
+    def test_compact_graph(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        results = batch_queries.run_batch(self.queries, compact, processes=2)
+        self.check_results(results, compact)
+
+    def test_replacement_workers(self):
+        # Retire each worker after one task, so the pool keeps starting new ones
+        def retiring_pool(context, processes=None, initializer=None, initargs=(), maxtasksperchild=None):
+            return multiprocessing.pool.Pool(processes, initializer, initargs, 1, context=context.get_context())
+
+        with patch.object(multiprocessing.context.BaseContext, "Pool", retiring_pool):
+            results = batch_queries.run_batch(self.queries, self.graph, self.coords, processes=2, chunksize=1)
+        self.check_results(results, self.graph)
+
+    def test_concurrent_inline_batches(self):
+        shortcut = {"Anthony": ["Salina"], "Salina": ["Anthony"]}
+        first = batch_queries.iter_batch([("Anthony", "Salina", "bfs")] * 3, self.graph, processes=1)
+        second = batch_queries.iter_batch([("Anthony", "Salina", "bfs")] * 3, shortcut, processes=1)
+        expected = search_algorithms.bfs(self.graph, "Anthony", "Salina")[0]
+
+        self.assertEqual(next(first).path, expected)
+        self.assertEqual(next(second).path, ["Anthony", "Salina"])
+        self.assertEqual(next(first).path, expected)
+        second.close()
+        self.assertEqual(next(first).path, expected)
+        self.assertEqual(list(first), [])
+        self.assertEqual(batch_queries._shared, {})
+
+    def test_per_query_options(self):
+        queries = [("Anthony", "Salina", "id_dfs", {"max_depth": 2}),
+                   ("Anthony", "Salina", "id_dfs", {"max_depth": 15})]
+        shallow, deep = batch_queries.run_batch(queries, self.graph, processes=1)
+        self.assertIsNone(shallow.path)
+        self.assertIsNotNone(deep.path)
+
+    def test_end_time_counts_time_queued(self):
+        chain = {str(i): [str(i - 1), str(i + 1)] for i in range(1, 3000)}
+        chain["0"], chain["3000"] = ["1"], ["2999"]
+        queries = [("0", "3000", "id_dfs", {"max_depth": 3000, "end_time": time.time() - 1}),
+                   ("0", "3000", "id_dfs", {"max_depth": 3000, "end_time": time.time() + 0.05})]
+        expired, cut_short = batch_queries.run_batch(queries, chain, processes=1, max_time=30)
+
+        self.assertEqual((expired.path, expired.elapsed, expired.timed_out), (None, 0.0, True))
+        self.assertTrue(cut_short.timed_out)
+        self.assertLess(cut_short.elapsed, 2)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            batch_queries.run_batch([("Anthony", "Salina", "teleport")], self.graph, processes=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr
+import benchmark
+import search_algorithms
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_generators_are_reproducible(self):
+        for family, generate in benchmark.GENERATORS.items():
+            first, second = generate(400, seed=5), generate(400, seed=5)
+            self.assertEqual(list(first.targets), list(second.targets), family)
+            self.assertEqual(list(first.lat), list(second.lat), family)
+            self.assertNotEqual(list(generate(400, seed=6).lat), list(first.lat), family)
+
+            # Undirected: every edge is stored in both directions
+            edges = {(u, v) for u in range(len(first)) for v in first.neighbors(u)}
+            self.assertTrue(all((v, u) in edges for u, v in edges), family)
+
+    def test_road_like_graph_is_connected(self):
+        graph = benchmark.road_like_graph(900, seed=1)
+        distances = search_algorithms.dijkstra_one_to_many(graph, "v0").dist
+        self.assertTrue(all(d != float('inf') for d in distances))
+
+    def test_smoke_run_writes_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "results.json")
+            with redirect_stderr(io.StringIO()):
+                benchmark.main(["--families", "grid", "road", "--sizes", "100", "--queries", "5",
+                                "--memory-queries", "1", "--output", output])
+            with open(output) as file:
+                report = json.load(file)
+
+        self.assertEqual(report["settings"]["queries"], 5)
+        self.assertEqual(len(report["results"]), 2 * len(benchmark.DEFAULT_ALGORITHMS))
+        for result in report["results"]:
+            self.assertEqual(result["nodes"], 100)
+            self.assertEqual(result["queries"], 5)
+            self.assertLessEqual(result["latency_ms"]["p50"], result["latency_ms"]["p99"])
+            self.assertGreater(result["throughput_qps"], 0)
+            self.assertGreater(result["peak_memory_kb"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
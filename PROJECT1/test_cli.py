@@ -0,0 +1,82 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr
+from unittest.mock import patch
+import cli
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def run_cli(self, argv, stdin=""):
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout, patch("sys.stdin", io.StringIO(stdin)):
+            status = cli.main(argv)
+        return status, [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_single_route_several_algorithms(self):
+        status, records = self.run_cli(["Anthony", "Salina", "-a", "bfs", "a_star"])
+        self.assertEqual(status, 0)
+        self.assertEqual([r["algorithm"] for r in records], ["bfs", "a_star"])
+        for record in records:
+            self.assertEqual(record["path"][0], "Anthony")
+            self.assertEqual(record["path"][-1], "Salina")
+            self.assertGreater(record["distance_km"], 0)
+            self.assertGreaterEqual(record["time_ms"], 0)
+            self.assertGreater(record["memory_kb"], 0)
+            self.assertFalse(record["timed_out"])
+        self.assertEqual(records[0]["cost"], len(records[0]["path"]) - 1)
+        self.assertAlmostEqual(records[1]["cost"], records[1]["distance_km"], places=6)
+
+    def test_query_file_and_errors(self):
+        lines = "# start goal [algorithms]\nAnthony Topeka\n\nAnthony,Salina,dfs,id_dfs\nAnthony Atlantis\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            query_path = os.path.join(tmp, "queries.txt")
+            output_path = os.path.join(tmp, "results.jsonl")
+            with open(query_path, "w") as file:
+                file.write(lines)
+            status = cli.main(["-q", query_path, "-o", output_path, "--max-depth", "15", "--no-memory"])
+            with open(output_path) as file:
+                records = [json.loads(line) for line in file]
+
+        self.assertEqual(status, 1)
+        self.assertEqual([(r["goal"], r["algorithm"]) for r in records],
+                         [("Topeka", "a_star"), ("Salina", "dfs"), ("Salina", "id_dfs"), ("Atlantis", "a_star")])
+        self.assertIsNotNone(records[2]["path"])  # max_depth reached id_dfs only
+        self.assertIsNone(records[0]["memory_kb"])
+        self.assertEqual(records[3]["error"], "Unknown city: Atlantis")
+
+    def test_other_component_rejected_without_searching(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            adjacency_path = os.path.join(tmp, "roads.txt")
+            coordinates_path = os.path.join(tmp, "coords.csv")
+            with open(adjacency_path, "w") as file:
+                file.write("A B\nB C\nX Y\n")
+            with open(coordinates_path, "w") as file:
+                file.write("A,37.0,-97.0\nB,37.0,-96.9\nC,37.0,-96.8\nX,38.0,-97.0\nY,38.0,-96.9\n")
+            status, records = self.run_cli(["A", "Y", "-a", "bfs", "dfs", "a_star", "--no-memory",
+                                            "--adjacencies", adjacency_path, "--coordinates", coordinates_path])
+
+        self.assertEqual(status, 0)
+        for record in records:
+            self.assertIsNone(record["path"])
+            self.assertEqual(record["expanded"], 0, record["algorithm"])
+
+    def test_queries_from_stdin(self):
+        status, records = self.run_cli(["-q", "-", "-a", "bidirectional_bfs"], stdin="Anthony Salina\n")
+        self.assertEqual(status, 0)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["algorithm"], "bidirectional_bfs")
+
+    def test_bad_arguments(self):
+        for argv in (["Anthony"], ["Anthony", "Salina", "-q", "-"], ["Anthony", "Salina", "-a", "magic"]):
+            with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                cli.main(argv)
+
+        with self.assertRaises(ValueError):
+            cli.parse_query_line("Anthony\n", ["bfs"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import os
+import random
+import tempfile
+import graph_setup
+import search_algorithms
+import contraction_hierarchy
+import distance_matrix
+
+
+def random_geometric_graph(n, seed):
+    """
+    Connects each random point to its 3 nearest points within a 0.1-degree grid
+    cell neighborhood; gives a sparse, road-like (and not always connected) graph.
+    """
+    rng = random.Random(seed)
+    coords = {str(i): (37.0 + rng.random() * 3, -100.0 + rng.random() * 5) for i in range(n)}
+    cells = {}
+    for city, (lat, lon) in coords.items():
+        cells.setdefault((int(lat * 10), int(lon * 10)), []).append(city)
+
+    graph = {city: [] for city in coords}
+    for city, (lat, lon) in coords.items():
+        row, col = int(lat * 10), int(lon * 10)
+        nearby = [other for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                  for other in cells.get((row + dr, col + dc), []) if other != city]
+        nearby.sort(key=lambda o: (coords[o][0] - lat) ** 2 + (coords[o][1] - lon) ** 2)
+        for other in nearby[:3]:
+            if other not in graph[city]:
+                graph[city].append(other)
+                graph[other].append(city)
+    return graph, coords
+
+
+class TestContractionHierarchy(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.ch = contraction_hierarchy.build_contraction_hierarchy(cls.graph, cls.coords)
+
+    def assertSameRoute(self, result, expected):
+        path, cost = result
+        expected_path, expected_cost = expected
+        if expected_path is None:
+            self.assertIsNone(path)
+            self.assertEqual(cost, float('inf'))
+        else:
+            self.assertAlmostEqual(cost, expected_cost, places=6)
+
+    def test_matches_a_star_on_real_data(self):
+        for start in self.graph:
+            for goal in self.graph:
+                expected = search_algorithms.a_star_search(self.graph, start, goal, self.coords)
+                path, cost = contraction_hierarchy.ch_search(self.ch, start, goal)
+                self.assertEqual(path, expected[0])
+                self.assertAlmostEqual(cost, expected[1], places=6)
+
+    def test_matches_a_star_on_synthetic_graph(self):
+        graph, coords = random_geometric_graph(1500, seed=7)
+        ch = contraction_hierarchy.build_contraction_hierarchy(graph, coords)
+        rng = random.Random(7)
+        cities = list(graph)
+        for _ in range(200):
+            start, goal = rng.sample(cities, 2)
+            result = contraction_hierarchy.ch_search(ch, start, goal)
+            self.assertSameRoute(result, search_algorithms.a_star_search(graph, start, goal, coords))
+            if result[0] is not None:
+                # Shortcuts must unpack into real roads
+                self.assertEqual((result[0][0], result[0][-1]), (start, goal))
+                for a, b in zip(result[0], result[0][1:]):
+                    self.assertIn(b, graph[a])
+
+    def test_compact_graph_input(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        ch = contraction_hierarchy.build_contraction_hierarchy(compact)
+        self.assertEqual(contraction_hierarchy.ch_search(ch, "Anthony", "Salina"),
+                         contraction_hierarchy.ch_search(self.ch, "Anthony", "Salina"))
+
+    def test_no_route(self):
+        self.assertEqual(contraction_hierarchy.ch_search(self.ch, "Anthony", "Fake_City"),
+                         (None, float('inf')))
+
+        graph = {"A": ["B"], "B": ["A"], "X": []}
+        coords = {"A": (37.0, -97.0), "B": (37.0, -96.5), "X": (36.0, -98.0)}
+        ch = contraction_hierarchy.build_contraction_hierarchy(graph, coords)
+        self.assertEqual(contraction_hierarchy.ch_search(ch, "A", "X"), (None, float('inf')))
+        self.assertEqual(contraction_hierarchy.ch_search(ch, "A", "A"), (["A"], 0.0))
+
+    def test_bucket_many_to_many(self):
+        graph, coords = random_geometric_graph(800, seed=11)
+        ch = contraction_hierarchy.build_contraction_hierarchy(graph, coords)
+        rng = random.Random(11)
+        sources = rng.sample(list(graph), 12)
+        targets = rng.sample(list(graph), 9) + ["Fake_City"]
+
+        matrix = contraction_hierarchy.ch_many_to_many(ch, sources, targets)
+        expected = distance_matrix.many_to_many(graph, sources, targets, coords)
+        for i in range(len(sources)):
+            for j in range(len(targets)):
+                if expected[i][j] == float('inf'):
+                    self.assertEqual(matrix[i][j], float('inf'))
+                else:
+                    self.assertAlmostEqual(matrix[i][j], expected[i][j], places=6)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "kansas.ch")
+            contraction_hierarchy.save_contraction_hierarchy(self.ch, file_path)
+            loaded = contraction_hierarchy.load_contraction_hierarchy(file_path)
+
+        self.assertEqual(loaded.names, self.ch.names)
+        self.assertEqual(list(loaded.up_middle), list(self.ch.up_middle))
+        self.assertEqual(contraction_hierarchy.ch_search(loaded, "Anthony", "Salina"),
+                         contraction_hierarchy.ch_search(self.ch, "Anthony", "Salina"))
+
+    def test_road_updates_require_rebuild(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        ch = contraction_hierarchy.build_contraction_hierarchy(compact)
+        self.assertIs(ch.graph, compact)
+        self.assertIsNotNone(contraction_hierarchy.ch_search(ch, "Anthony", "Salina")[0])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "kansas.ch")
+            contraction_hierarchy.save_contraction_hierarchy(ch, file_path)
+            compact.set_edge_weight("McPherson", "Salina", 500.0)  # Longer roads break shortcuts too
+            loaded = contraction_hierarchy.load_contraction_hierarchy(file_path, compact)
+        for stale in (ch, loaded):
+            with self.assertRaises(ValueError):
+                contraction_hierarchy.ch_search(stale, "Anthony", "Salina")
+            with self.assertRaises(ValueError):
+                contraction_hierarchy.ch_many_to_many(stale, ["Anthony"], ["Salina"])
+
+        ch = contraction_hierarchy.build_contraction_hierarchy(compact)
+        path, cost = contraction_hierarchy.ch_search(ch, "Anthony", "Salina")
+        self.assertAlmostEqual(cost, search_algorithms.a_star_search(compact, "Anthony", "Salina", None)[1],
+                               places=6)
+
+    def test_load_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            contraction_hierarchy.load_contraction_hierarchy("Adjacencies.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import graph_setup
+import search_algorithms
+import distance_matrix
+
+
+class TestManyToMany(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.sources = ["Anthony", "Wichita", "Salina"]
+        cls.targets = ["Topeka", "Coldwater", "Hays", "Harper", "Fake_City"]
+
+    def check_matrix(self, matrix, sources, targets):
+        self.assertEqual(len(matrix), len(sources))
+        for i, source in enumerate(sources):
+            self.assertEqual(len(matrix[i]), len(targets))
+            for j, target in enumerate(targets):
+                _, expected = search_algorithms.a_star_search(self.graph, source, target, self.coords)
+                if expected == float('inf'):
+                    self.assertEqual(matrix[i][j], float('inf'))
+                else:
+                    self.assertAlmostEqual(matrix[i][j], expected, places=6)
+
+    def test_matrix_matches_a_star(self):
+        matrix = distance_matrix.many_to_many(self.graph, self.sources, self.targets, self.coords)
+        self.check_matrix(matrix, self.sources, self.targets)
+
+    def test_searches_from_smaller_side(self):
+        # More sources than targets: computed from the targets and transposed
+        matrix = distance_matrix.many_to_many(self.graph, self.targets, self.sources, self.coords)
+        self.check_matrix(matrix, self.targets, self.sources)
+
+    def test_compact_graph(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        matrix = distance_matrix.many_to_many(compact, self.sources, self.targets)
+        self.check_matrix(matrix, self.sources, self.targets)
+
+    def test_predecessor_trees(self):
+        matrix, trees = distance_matrix.many_to_many(self.graph, self.sources, self.targets, self.coords,
+                                                     return_trees=True)
+        self.assertEqual([tree.source for tree in trees], self.sources)
+        path = trees[0].path("Topeka")
+        self.assertEqual((path[0], path[-1]), ("Anthony", "Topeka"))
+        self.assertAlmostEqual(graph_setup.path_distance(path, self.coords), matrix[0][0], places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
 import unittest
 import os
 import tempfile
+from array import array
 import math
+import random
 import graph_setup
+import search_algorithms
+from unittest.mock import patch
 
 
 class TestGraphSetup(unittest.TestCase):
@@ -64,5 +68,375 @@ CityB CityC
             os.remove(tmp_path)
 
 
+    def test_build_compact_graph(self):
+        graph = {
+            "CityA": ["CityB"],
+            "CityB": ["CityA", "CityC"],
+            "CityC": ["CityB"],
+        }
+        coords = {"CityA": (37.0, -97.0), "CityB": (38.5, -96.2)}
+        compact = graph_setup.build_compact_graph(graph, coords)
+
+        self.assertEqual(len(compact), 3)
+        self.assertEqual(compact.names, ["CityA", "CityB", "CityC"])
+        self.assertEqual(list(compact.offsets), [0, 1, 3, 4])
+        self.assertEqual(list(compact.neighbors(compact.id_of("CityB"))), [0, 2])
+        self.assertEqual(compact["CityB"], ["CityA", "CityC"])  # Neighbor order preserved
+        self.assertIn("CityC", compact)
+        self.assertIsNone(compact.id_of("CityD"))
+
+        self.assertEqual((compact.lat[0], compact.lon[0]), (37.0, -97.0))
+        self.assertTrue(math.isnan(compact.lat[2]))  # No coordinates for CityC
+
+    def test_load_compact_graph_matches_dict_graph(self):
+        graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        compact = graph_setup.load_compact_graph("Adjacencies.txt", "coordinates.csv")
+
+        self.assertEqual(compact.keys(), list(graph.keys()))
+        for city in graph:
+            self.assertEqual(compact[city], graph[city])
+
+
+    def test_compact_graph_edge_weights(self):
+        graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        coords = graph_setup.load_coordinates("coordinates.csv")
+        compact = graph_setup.build_compact_graph(graph, coords)
+
+        self.assertEqual(len(compact.weights), len(compact.targets))
+        for city in ("Anthony", "Wichita", "Salina"):
+            node = compact.id_of(city)
+            for neighbor, weight in compact.edges(node):
+                expected = graph_setup.haversine_distance(city, compact.names[neighbor], coords)
+                self.assertAlmostEqual(weight, expected, places=9)
+
+        self.assertAlmostEqual(compact.lat_rad[0], math.radians(compact.lat[0]))
+
+    def test_compact_graph_missing_coordinates(self):
+        compact = graph_setup.build_compact_graph({"CityA": ["CityB"], "CityB": ["CityA"]},
+                                                  {"CityA": (37.0, -97.0)})
+        self.assertEqual(list(compact.weights), [float('inf'), float('inf')])
+        self.assertEqual(compact.distance(0, 1), float('inf'))
+
+    def test_heuristic_table_cache(self):
+        compact = graph_setup.load_compact_graph("Adjacencies.txt", "coordinates.csv")
+        table = compact.heuristic_table(0)
+        self.assertIs(compact.heuristic_table(0), table)  # Reused for the same goal
+        self.assertTrue(all(h == -1.0 for h in table))  # Nothing computed yet
+
+        for goal in range(1, graph_setup.HEURISTIC_CACHE_SIZE + 1):
+            compact.heuristic_table(goal)
+        self.assertIsNot(compact.heuristic_table(0), table)  # Evicted as least recently used
+
+
+class TestBatchHaversine(unittest.TestCase):
+    """
+    The batch helpers return NumPy arrays when NumPy is installed and nested
+    lists otherwise; both index the same way, so the tests cover either.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.cities = list(cls.coords.keys())
+
+    def test_one_to_many(self):
+        distances = graph_setup.haversine_one_to_many("Wichita", self.cities + ["Fake_City"], self.coords)
+        for i, city in enumerate(self.cities):
+            expected = graph_setup.haversine_distance("Wichita", city, self.coords)
+            self.assertAlmostEqual(distances[i], expected, places=6)
+        self.assertEqual(distances[-1], float('inf'))
+
+    def test_many_to_many(self):
+        sources = ["Wichita", "Anthony", "Salina"]
+        matrix = graph_setup.haversine_many_to_many(sources, self.cities, self.coords)
+        self.assertEqual(len(matrix), len(sources))
+        for i, source in enumerate(sources):
+            self.assertEqual(len(matrix[i]), len(self.cities))
+            for j, target in enumerate(self.cities):
+                expected = graph_setup.haversine_distance(source, target, self.coords)
+                self.assertAlmostEqual(matrix[i][j], expected, places=6)
+
+    def test_full_matrix_is_symmetric(self):
+        matrix = graph_setup.haversine_matrix(self.coords)
+        n = len(self.cities)
+        self.assertEqual(len(matrix), n)
+        for i in range(n):
+            self.assertAlmostEqual(matrix[i][i], 0.0, places=6)
+            for j in range(i):
+                self.assertAlmostEqual(matrix[i][j], matrix[j][i], places=6)
+
+    def test_path_distance(self):
+        path = ["Anthony", "Bluff_City", "Kiowa", "Attica"]
+        expected = sum(graph_setup.haversine_distance(a, b, self.coords) for a, b in zip(path, path[1:]))
+        self.assertAlmostEqual(graph_setup.path_distance(path, self.coords), expected, places=6)
+        self.assertEqual(graph_setup.path_distance(["Anthony"], self.coords), 0.0)
+
+    def test_precomputed_heuristic_table(self):
+        compact = graph_setup.load_compact_graph("Adjacencies.txt", "coordinates.csv")
+        goal = compact.id_of("Salina")
+        table = compact.heuristic_table(goal, precompute=True)
+        for node, h in enumerate(table):
+            if h >= 0:  # Without NumPy the table is filled lazily instead
+                self.assertAlmostEqual(h, compact.distance(node, goal), places=6)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.snapshot_path = os.path.join(cls.tmp.name, "kansas.graph")
+        graph_setup.compile_snapshot("Adjacencies.txt", "coordinates.csv", cls.snapshot_path)
+        cls.compact = graph_setup.load_compact_graph("Adjacencies.txt", "coordinates.csv")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_round_trip(self):
+        graph = graph_setup.load_snapshot(self.snapshot_path)
+        self.assertEqual(len(graph), len(self.compact))
+        self.assertEqual(list(graph.names), self.compact.names)
+        for field in ("offsets", "targets", "weights", "lat", "lon", "lat_rad", "lon_rad"):
+            self.assertEqual(list(getattr(graph, field)), list(getattr(self.compact, field)), field)
+        self.assertEqual(graph["Anthony"], self.compact["Anthony"])
+        self.assertEqual(graph.id_of("Salina"), self.compact.id_of("Salina"))
+
+    def test_arrays_are_memory_mapped(self):
+        graph = graph_setup.load_snapshot(self.snapshot_path)
+        for field in ("offsets", "targets", "weights", "lat_rad"):
+            array_view = getattr(graph, field)
+            self.assertIsInstance(array_view, memoryview)
+            self.assertTrue(array_view.readonly)
+
+    def test_searches_on_snapshot(self):
+        graph = graph_setup.load_snapshot(self.snapshot_path)
+        for goal in ("Salina", "Topeka", "Fake_City"):
+            self.assertEqual(search_algorithms.a_star_search(graph, "Anthony", goal, None),
+                             search_algorithms.a_star_search(self.compact, "Anthony", goal, None))
+            self.assertEqual(search_algorithms.bfs(graph, "Anthony", goal),
+                             search_algorithms.bfs(self.compact, "Anthony", goal))
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            graph_setup.load_snapshot("Adjacencies.txt")
+
+
+
+class TestDynamicUpdates(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        self.coords = graph_setup.load_coordinates("coordinates.csv")
+        self.compact = graph_setup.build_compact_graph(self.graph, self.coords)
+
+    def rebuilt(self):
+        """A graph built from scratch with the same roads as self.compact."""
+        graph = {city: list(self.compact[city]) for city in self.compact}
+        return graph_setup.build_compact_graph(graph, self.coords)
+
+    def test_remove_and_add_roads(self):
+        before = search_algorithms.a_star_search(self.compact, "Anthony", "Salina", None)
+        self.compact.remove_edge("McPherson", "Salina")
+        self.assertNotIn("Salina", self.compact["McPherson"])
+        self.assertNotIn("McPherson", self.compact["Salina"])
+        self.assertEqual(self.compact.version, 1)
+
+        after = search_algorithms.a_star_search(self.compact, "Anthony", "Salina", None)
+        self.assertGreater(after[1], before[1])
+        self.assertEqual(after, search_algorithms.a_star_search(self.rebuilt(), "Anthony", "Salina", None))
+        self.assertEqual(search_algorithms.bfs(self.compact, "Anthony", "Salina"),
+                         search_algorithms.bfs(self.rebuilt(), "Anthony", "Salina"))
+
+        self.compact.add_edge("McPherson", "Salina")
+        self.assertEqual(search_algorithms.a_star_search(self.compact, "Anthony", "Salina", None), before)
+        with self.assertRaises(KeyError):
+            self.compact.remove_edge("Anthony", "Salina")
+        with self.assertRaises(KeyError):
+            self.compact.add_edge("Anthony", "Atlantis")
+
+    def test_set_edge_weight(self):
+        u, v = self.compact.id_of("McPherson"), self.compact.id_of("Salina")
+        straight = self.compact.distance(u, v)
+        self.compact.set_edge_weight("McPherson", "Salina", straight * 3)
+        self.assertIn((v, straight * 3), list(self.compact.edges(u)))
+        self.assertIn((u, straight * 3), list(self.compact.edges(v)))
+        with self.assertRaises(ValueError):
+            self.compact.set_edge_weight("McPherson", "Salina", straight / 2)
+        with self.assertRaises(KeyError):
+            self.compact.set_edge_weight("Anthony", "Salina", 500.0)
+
+    def test_read_only_snapshot_is_copied_on_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot_path = os.path.join(tmp, "kansas.graph")
+            graph_setup.save_snapshot(self.compact, snapshot_path)
+            graph = graph_setup.load_snapshot(snapshot_path)
+            u, v = graph.id_of("McPherson"), graph.id_of("Salina")
+            graph.set_edge_weight("McPherson", "Salina", graph.distance(u, v) * 2)
+            graph.remove_edge("Anthony", "Bluff_City")
+            self.assertIsInstance(graph.weights, array)
+            self.assertNotIn("Bluff_City", graph["Anthony"])
+            del graph
+
+    def test_change_log_and_compact(self):
+        self.compact.remove_edge("McPherson", "Salina")
+        self.compact.add_edge("Anthony", "Salina")
+        changes = self.compact.changes_since(0)
+        self.assertEqual([(c.version, c.old_weight == float('inf'), c.new_weight == float('inf'))
+                          for c in changes], [(1, False, True), (2, True, False)])
+        self.assertEqual(graph_setup.changes_since(self.compact, 2), [])
+        self.assertEqual(graph_setup.changes_since(self.graph, 0), [])
+
+        expected = {city: sorted(self.compact[city]) for city in self.compact}
+        edge_count = self.compact.edge_count()
+        self.compact.compact()
+        self.assertEqual({city: sorted(self.compact[city]) for city in self.compact}, expected)
+        self.assertEqual(len(self.compact.targets), edge_count)
+        self.assertEqual(self.compact.version, 2)
+
+        for _ in range(graph_setup.CHANGE_LOG_SIZE + 1):
+            self.compact.set_edge_weight("Anthony", "Salina", 1000.0)
+        self.assertIsNone(self.compact.changes_since(2))  # Older than the log reaches
+        self.compact.version += 1
+        self.assertIsNone(self.compact.changes_since(self.compact.version - 1))
+
+
+class TestConnectedComponents(unittest.TestCase):
+
+    def partition(self, graph, components):
+        groups = {}
+        for city in graph:
+            groups.setdefault(components.label(city), set()).add(city)
+        return sorted(sorted(group) for group in groups.values())
+
+    def test_labels_at_load_time(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot_path = os.path.join(tmp, "kansas.graph")
+            graph_setup.compile_snapshot("Adjacencies.txt", "coordinates.csv", snapshot_path)
+            snapshot = graph_setup.load_snapshot(snapshot_path)
+            loaded = [graph_setup.load_compact_graph("Adjacencies.txt", "coordinates.csv"),
+                      graph_setup.stream_compact_graph("Adjacencies.txt", "coordinates.csv")[0], snapshot]
+            for graph in loaded:
+                self.assertIsNotNone(graph.components)
+                self.assertEqual(graph.components.count, 1)
+                self.assertTrue(graph.components.connected("Anthony", "Salina"))
+                self.assertFalse(graph.components.connected("Anthony", "Fake_City"))
+            self.assertIsInstance(snapshot.components.labels, memoryview)
+            del snapshot, loaded
+
+    def test_dict_graphs(self):
+        graph = {"A": ["B"], "B": ["A", "C"], "C": ["B"], "X": [], "Y": ["Z"]}
+        components = graph_setup.connected_components(graph)
+        self.assertEqual(components.count, 3)
+        self.assertTrue(components.connected("A", "C"))
+        self.assertTrue(components.connected("Y", "Z"))  # Z only appears as a neighbor
+        self.assertFalse(components.connected("A", "X"))
+
+        # Loaded dicts carry no labels, so editing them never leaves stale ones behind
+        kansas = graph_setup.load_adjacencies("Adjacencies.txt")
+        self.assertIs(type(kansas), dict)
+        kansas["Anthony"].append("NewTown")
+        kansas["NewTown"] = ["Anthony"]
+        self.assertEqual(search_algorithms.bfs(kansas, "Anthony", "NewTown"), (["Anthony", "NewTown"], 1))
+
+    def test_incremental_repair_matches_recomputation(self):
+        rng = random.Random(7)
+        coords = {str(i): (37.0 + rng.random(), -98.0 + rng.random()) for i in range(60)}
+        graph = {city: [] for city in coords}
+        for _ in range(70):
+            a, b = rng.sample(list(coords), 2)
+            if b not in graph[a]:
+                graph[a].append(b)
+                graph[b].append(a)
+        compact = graph_setup.build_compact_graph(graph, coords)
+        components = compact.components
+
+        for _ in range(200):
+            a, b = rng.sample(list(coords), 2)
+            if b in compact[a]:
+                compact.remove_edge(a, b)
+            else:
+                compact.add_edge(a, b)
+            expected = graph_setup.connected_components(compact)
+            self.assertEqual(self.partition(compact, components), self.partition(compact, expected))
+            self.assertEqual(components.count, expected.count)
+
+
+class TestStreamingLoader(unittest.TestCase):
+
+    def write(self, tmp, name, text):
+        file_path = os.path.join(tmp, name)
+        with open(file_path, "w") as file:
+            file.write(text)
+        return file_path
+
+    def test_matches_compact_loader(self):
+        expected = graph_setup.load_compact_graph("Adjacencies.txt", "coordinates.csv")
+        graph, report = graph_setup.stream_compact_graph("Adjacencies.txt", "coordinates.csv", chunk_size=7)
+
+        self.assertEqual(list(graph.keys()), list(expected.keys()))
+        for city in expected.keys():
+            self.assertEqual(sorted(graph[city]), sorted(set(expected[city])))
+        self.assertEqual(report.malformed_count, 0)
+        self.assertEqual(report.edges, len(graph.targets) // 2)
+        for goal in ("Salina", "Coldwater"):
+            path, cost = search_algorithms.a_star_search(graph, "Anthony", goal, None)
+            self.assertAlmostEqual(cost, search_algorithms.a_star_search(expected, "Anthony", goal, None)[1])
+
+    def test_duplicates_weights_and_malformed_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            adjacency = self.write(tmp, "roads.txt",
+                                   "A B\nB A\nA B 2.5\nB C 4\nC B 3\n\nC\nC D x\nC D -1\nA B C D\n")
+            graph, report = graph_setup.stream_compact_graph(adjacency, chunk_size=2)
+
+        self.assertEqual(list(graph.keys()), ["A", "B", "C"])
+        self.assertEqual(graph["B"], ["A", "C"])
+        self.assertEqual(report.edges, 2)
+        self.assertEqual(report.duplicate_edges, 3)  # A-B given three times, B-C twice
+        self.assertEqual([line for _, line, _ in report.malformed], [7, 8, 9, 10])
+        self.assertEqual(dict(graph.edges(graph.id_of("B"))), {0: 2.5, 2: 3.0})
+
+    def test_self_loops_and_short_lengths(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            adjacency = self.write(tmp, "roads.txt", "A B 1\nA B\nC C\nC C 2\nB C 100\n")
+            coordinates = self.write(tmp, "coords.csv", "A,37.0,-97.0\nB,37.0,-96.0\nC,37.0,-95.0\n")
+            graph, report = graph_setup.stream_compact_graph(adjacency, coordinates)
+
+        a, b, c = graph.id_of("A"), graph.id_of("B"), graph.id_of("C")
+        # A-B is ~89 km apart, so "A B 1" would make the heuristics overestimate
+        self.assertEqual([(file_path, line) for file_path, line, _ in report.malformed], [(adjacency, 1)])
+        self.assertAlmostEqual(dict(graph.edges(a))[b], graph.distance(a, b))
+        self.assertEqual(list(graph.edges(c)), [(b, 100.0), (c, 2.0)])
+        self.assertEqual(report.edges, 3)
+        self.assertEqual(report.edges, (len(graph.targets) + 1) // 2)
+        self.assertEqual(report.duplicate_edges, 1)
+
+    def test_runs_spilled_to_disk(self):
+        expected = graph_setup.load_compact_graph("Adjacencies.txt", "coordinates.csv")
+        with patch.object(graph_setup, "SPILL_BLOCK", 3), \
+                patch.object(graph_setup.tempfile, "TemporaryFile",
+                             wraps=graph_setup.tempfile.TemporaryFile) as temporary_file:
+            graph, report = graph_setup.stream_compact_graph("Adjacencies.txt", "coordinates.csv", chunk_size=5)
+
+        self.assertGreater(temporary_file.call_count, 1)
+        self.assertEqual(list(graph.targets), list(graph_setup.stream_compact_graph(
+            "Adjacencies.txt", "coordinates.csv")[0].targets))
+        self.assertEqual(report.edges * 2, len(graph.targets))
+        for city in expected.keys():
+            self.assertEqual(sorted(graph[city]), sorted(set(expected[city])))
+
+    def test_unweighted_roads_without_coordinates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            adjacency = self.write(tmp, "roads.txt", "A B\nB C 1\n")
+            coordinates = self.write(tmp, "coords.csv", "A,37.0,-97.0\nB,37.0,-96.0\n")
+            graph, report = graph_setup.stream_compact_graph(adjacency, coordinates)
+
+        a, b, c = graph.id_of("A"), graph.id_of("B"), graph.id_of("C")
+        self.assertAlmostEqual(dict(graph.edges(a))[b], graph_setup.haversine_distance(
+            "A", "B", {"A": (37.0, -97.0), "B": (37.0, -96.0)}))
+        self.assertEqual(dict(graph.edges(b))[c], 1.0)
+        self.assertEqual(report.malformed_count, 0)
+
+
 if __name__ == "__main__":
     unittest.main()
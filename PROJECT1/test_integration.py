@@ -104,6 +104,24 @@ class TestIntegrationWithRealData(unittest.TestCase):
         self.assertIsNone(path)
         self.assertEqual(cost, float('inf'))
 
+    # -------------------------------------------------------------------------
+    # 6. Unreachable goals on the graph the interactive loop and CLI load
+    # -------------------------------------------------------------------------
+    def test_unreachable_goals_rejected_without_searching(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coordinates)
+        for city in list(compact[self.real_goal]):
+            compact.remove_edge(self.real_goal, city)  # Cuts Salina off from every other city
+
+        for goal in (self.fake_goal, self.real_goal):
+            for search, informed in ((search_algorithms.bfs, False), (search_algorithms.dfs, False),
+                                     (search_algorithms.a_star_search, True)):
+                stats = search_algorithms.SearchStats()
+                args = (self.coordinates,) if informed else ()
+                path, cost = search(compact, self.real_start, goal, *args, stats=stats)
+                self.assertIsNone(path)
+                self.assertEqual(cost, float('inf'))
+                self.assertEqual(stats.expanded, 0, (search.__name__, goal))
+
 
 if __name__ == "__main__":
     unittest.main()
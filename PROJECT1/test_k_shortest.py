@@ -0,0 +1,90 @@
+import unittest
+import random
+import graph_setup
+import search_algorithms
+import k_shortest
+
+
+def simple_routes(graph, start, goal):
+    """Every loopless route between two node ids as (cost, path), cheapest first."""
+    routes = []
+    stack = [([start], 0.0)]
+    while stack:
+        path, cost = stack.pop()
+        if path[-1] == goal:
+            routes.append((cost, path))
+            continue
+        for neighbor, weight in graph.edges(path[-1]):
+            if neighbor not in path:
+                stack.append((path + [neighbor], cost + weight))
+    return sorted(routes)
+
+
+class TestKShortest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.compact = graph_setup.build_compact_graph(cls.graph, cls.coords)
+
+    def random_graph(self, seed):
+        rng = random.Random(seed)
+        coords = {str(i): (37.0 + rng.random(), -98.0 + rng.random()) for i in range(12)}
+        graph = {city: [] for city in coords}
+        for _ in range(20):
+            a, b = rng.sample(list(coords), 2)
+            if b not in graph[a]:
+                graph[a].append(b)
+                graph[b].append(a)
+        return graph_setup.build_compact_graph(graph, coords)
+
+    def test_yen_matches_enumeration(self):
+        for seed in range(10):
+            graph = self.random_graph(seed)
+            expected = simple_routes(graph, graph.id_of("0"), graph.id_of("1"))[:4]
+            routes = k_shortest.yen_k_shortest(graph, "0", "1", k=4)
+            self.assertEqual(len(routes), len(expected))
+            for (path, cost), (expected_cost, _) in zip(routes, expected):
+                self.assertAlmostEqual(cost, expected_cost, places=6)
+                self.assertEqual(len(set(path)), len(path))
+                self.assertEqual((path[0], path[-1]), ("0", "1"))
+
+    def test_first_route_is_shortest(self):
+        expected = search_algorithms.a_star_search(self.graph, "Anthony", "Topeka", self.coords)
+        for routes in (k_shortest.yen_k_shortest(self.graph, "Anthony", "Topeka", k=5, coordinates=self.coords),
+                       k_shortest.alternative_routes(self.compact, "Anthony", "Topeka", k=3)):
+            self.assertEqual(routes[0][0], expected[0])
+            self.assertAlmostEqual(routes[0][1], expected[1], places=6)
+        costs = [cost for _, cost in k_shortest.yen_k_shortest(self.compact, "Anthony", "Topeka", k=5)]
+        self.assertEqual(costs, sorted(costs))
+        self.assertEqual(len(costs), 5)
+
+    def test_overlap_cap(self):
+        for routes in (k_shortest.yen_k_shortest(self.compact, "Anthony", "Topeka", k=3, max_overlap=0.5),
+                       k_shortest.alternative_routes(self.compact, "Anthony", "Topeka", k=3, max_overlap=0.5)):
+            self.assertGreater(len(routes), 1)
+            ids = [[self.compact.id_of(city) for city in path] for path, _ in routes]
+            for i, path in enumerate(ids):
+                for other in ids[:i]:
+                    self.assertLessEqual(k_shortest.overlap(self.compact, path, other), 0.5)
+
+    def test_alternatives_are_simple_and_bounded(self):
+        routes = k_shortest.alternative_routes(self.compact, "Anthony", "Topeka", k=4, max_stretch=1.5)
+        best = routes[0][1]
+        for path, cost in routes:
+            self.assertEqual(len(set(path)), len(path))
+            self.assertLessEqual(cost, best * 1.5)
+            self.assertAlmostEqual(cost, graph_setup.path_distance(path, self.coords), places=6)
+
+    def test_no_route(self):
+        for find in (k_shortest.yen_k_shortest, k_shortest.alternative_routes):
+            self.assertEqual(find(self.compact, "Anthony", "Fake_City"), [])
+            self.assertEqual(find(self.compact, "Anthony", "Anthony"), [(["Anthony"], 0)])
+            graph = graph_setup.build_compact_graph({"A": ["B"], "B": ["A"], "X": []},
+                                                    {"A": (37.0, -97.0), "B": (37.0, -96.5), "X": (36.0, -98.0)})
+            self.assertEqual(find(graph, "A", "X"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
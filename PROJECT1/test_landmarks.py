@@ -0,0 +1,141 @@
+import unittest
+import os
+import random
+import tempfile
+import graph_setup
+import search_algorithms
+import landmarks
+
+
+def serpentine_graph(rows, cols):
+    """
+    Grid of cities whose rows are joined only at alternating ends, so every
+    route winds back and forth. Each city also has a two-node dead-end spur
+    pointing at the next row, which lures a straight-line heuristic off route.
+    """
+    coords = {f"{r}_{c}": (37.0 + r * 0.1, -97.0 + c * 0.05) for r in range(rows) for c in range(cols)}
+    graph = {city: [] for city in coords}
+
+    def connect(a, b):
+        graph[a].append(b)
+        graph[b].append(a)
+
+    for r in range(rows):
+        for c in range(cols):
+            city = f"{r}_{c}"
+            if c + 1 < cols:
+                connect(city, f"{r}_{c + 1}")
+            previous = city
+            for i in (1, 2):
+                spur = f"{city}_spur{i}"
+                coords[spur] = (coords[city][0] + 0.03 * i, coords[city][1])
+                graph[spur] = []
+                connect(previous, spur)
+                previous = spur
+        if r + 1 < rows:
+            end = cols - 1 if r % 2 == 0 else 0
+            connect(f"{r}_{end}", f"{r + 1}_{end}")
+    return graph, coords
+
+
+class TestLandmarks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.table = landmarks.build_landmark_table(cls.graph, k=4, coordinates=cls.coords)
+
+    def test_bounds_are_admissible(self):
+        for start in self.graph:
+            for goal in self.graph:
+                _, distance = search_algorithms.a_star_search(self.graph, start, goal, self.coords)
+                bound = self.table.lower_bound(self.table.index[start], self.table.index[goal])
+                self.assertLessEqual(bound, distance + 1e-9)
+
+    def test_selection_methods(self):
+        for method in ("farthest", "planar"):
+            table = landmarks.build_landmark_table(self.graph, k=4, method=method, coordinates=self.coords)
+            self.assertEqual(len(set(table.landmarks)), 4)
+            self.assertEqual(len(table.distances), 4)
+
+        with self.assertRaises(ValueError):
+            landmarks.build_landmark_table(self.graph, k=4, method="random", coordinates=self.coords)
+
+    def test_a_star_with_landmarks_finds_same_routes(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        for goal in ("Salina", "Topeka", "Coldwater", "Fake_City"):
+            expected_path, expected_cost = search_algorithms.a_star_search(self.graph, "Anthony", goal, self.coords)
+            for graph in (self.graph, compact):
+                path, cost = search_algorithms.a_star_search(graph, "Anthony", goal, self.coords,
+                                                             landmarks=self.table)
+                self.assertEqual(path, expected_path)
+                if path is not None:
+                    self.assertAlmostEqual(cost, expected_cost, places=6)
+
+    def test_landmarks_reduce_expansions_on_winding_roads(self):
+        graph, coords = serpentine_graph(12, 20)
+        compact = graph_setup.build_compact_graph(graph, coords)
+        table = landmarks.build_landmark_table(compact, k=4)
+
+        plain, alt = search_algorithms.SearchStats(), search_algorithms.SearchStats()
+        rng = random.Random(3)
+        for _ in range(30):
+            start, goal = rng.sample([city for city in graph if "spur" not in city], 2)
+            expected = search_algorithms.a_star_search(compact, start, goal, None, stats=plain)
+            result = search_algorithms.a_star_search(compact, start, goal, None, stats=alt, landmarks=table)
+            self.assertAlmostEqual(result[1], expected[1], places=6)
+        self.assertLess(alt.expanded, plain.expanded / 2)
+
+    def test_disconnected_goal(self):
+        graph = {"A": ["B"], "B": ["A"], "X": []}
+        coords = {"A": (37.0, -97.0), "B": (37.0, -96.5), "X": (36.0, -98.0)}
+        table = landmarks.build_landmark_table(graph, k=2, coordinates=coords)
+        self.assertEqual(table.lower_bound(table.index["A"], table.index["X"]), float('inf'))
+        self.assertEqual(search_algorithms.a_star_search(graph, "A", "X", coords, landmarks=table),
+                         (None, float('inf')))
+
+    def test_table_for_other_graph_rejected(self):
+        with self.assertRaises(ValueError):
+            search_algorithms.a_star_search({"A": []}, "A", "A", {}, landmarks=self.table)
+
+    def test_road_updates(self):
+        graph, coords = serpentine_graph(4, 6)
+        compact = graph_setup.build_compact_graph(graph, coords)
+        table = landmarks.build_landmark_table(compact, k=4)
+        cities = [city for city in graph if "spur" not in city]
+
+        # Closing or lengthening roads keeps the bounds admissible
+        compact.remove_edge("0_2", "0_3")
+        compact.set_edge_weight("1_0", "2_0", 500.0)
+        rng = random.Random(5)
+        for _ in range(50):
+            start, goal = rng.sample(cities, 2)
+            expected = search_algorithms.a_star_search(compact, start, goal, None)
+            result = search_algorithms.a_star_search(compact, start, goal, None, landmarks=table)
+            self.assertAlmostEqual(result[1], expected[1], places=6)
+        self.assertEqual(table.version, compact.version)
+
+        # A new road can make routes shorter than the bounds: the table must be rebuilt
+        compact.add_edge("0_0", "3_5")
+        with self.assertRaises(ValueError):
+            search_algorithms.a_star_search(compact, "0_0", "3_5", None, landmarks=table)
+        table = landmarks.build_landmark_table(compact, k=4)
+        self.assertEqual(search_algorithms.a_star_search(compact, "0_0", "3_5", None, landmarks=table),
+                         search_algorithms.a_star_search(compact, "0_0", "3_5", None))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "kansas.landmarks")
+            landmarks.save_landmark_table(self.table, file_path)
+            loaded = landmarks.load_landmark_table(file_path)
+
+        self.assertEqual(loaded.names, self.table.names)
+        self.assertEqual(loaded.version, self.table.version)
+        self.assertEqual(list(loaded.landmarks), list(self.table.landmarks))
+        for row, expected in zip(loaded.distances, self.table.distances):
+            self.assertEqual(list(row), list(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
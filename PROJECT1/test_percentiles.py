@@ -0,0 +1,18 @@
+import unittest
+import percentiles
+
+
+class TestPercentiles(unittest.TestCase):
+
+    def test_percentile(self):
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentiles.percentile(values, 50), 3.0)
+        self.assertEqual(percentiles.percentile(values, 100), 5.0)
+        self.assertAlmostEqual(percentiles.percentile(values, 90), 4.6)
+        self.assertAlmostEqual(percentiles.percentile(values, 0), 1.0)
+        self.assertEqual(percentiles.percentile([7.0], 99), 7.0)
+        self.assertIsNone(percentiles.percentile([], 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import graph_setup
+import search_algorithms
+import query_cache
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        self.coords = graph_setup.load_coordinates("coordinates.csv")
+        self.cache = query_cache.QueryCache(self.graph, self.coords, maxsize=4)
+
+    def test_repeated_query_hits(self):
+        first = self.cache.search("Anthony", "Salina", "a_star")
+        second = self.cache.search("Anthony", "Salina", "a_star")
+        self.assertEqual(first, second)
+        self.assertEqual(first, search_algorithms.a_star_search(self.graph, "Anthony", "Salina", self.coords))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        goals = ["Salina", "Topeka", "Hays", "Coldwater", "Abilene"]
+        for goal in goals:
+            self.cache.search("Anthony", goal, "dfs")  # Not optimal, so no subpath answers
+        self.assertEqual(len(self.cache), 4)
+
+        self.cache.search("Anthony", "Abilene", "dfs")
+        self.assertEqual(self.cache.hits, 1)
+        self.cache.search("Anthony", "Salina", "dfs")  # Evicted first
+        self.assertEqual(self.cache.misses, len(goals) + 1)
+
+    def test_subpath_of_cached_route(self):
+        path, _ = self.cache.search("Anthony", "Salina", "a_star")
+        start, goal = path[1], path[-2]
+
+        sub_path, sub_cost = self.cache.search(start, goal, "a_star")
+        self.assertEqual(self.cache.subpath_hits, 1)
+        self.assertEqual(sub_path, path[1:-1])
+        _, expected = search_algorithms.a_star_search(self.graph, start, goal, self.coords)
+        self.assertAlmostEqual(sub_cost, expected, places=6)
+
+        # Reverse direction on the undirected graph
+        back_path, back_cost = self.cache.search(goal, start, "bidirectional_a_star")
+        self.assertEqual(back_path, path[1:-1][::-1])
+        self.assertAlmostEqual(back_cost, expected, places=6)
+
+        # BFS minimizes edges, not distance, so it does not reuse A* routes
+        self.cache.search(start, goal, "bfs")
+        self.assertEqual(self.cache.subpath_hits, 2)
+
+    def test_shortest_path_tree_reuse(self):
+        self.cache.shortest_path_tree("Anthony")
+        for goal in ("Salina", "Topeka", "Fake_City"):
+            path, cost = self.cache.search(goal, "Anthony", "a_star")
+            expected_path, expected_cost = search_algorithms.a_star_search(self.graph, goal, "Anthony", self.coords)
+            self.assertEqual(cost if path else None, expected_cost if expected_path else None)
+            if path:
+                self.assertAlmostEqual(cost, expected_cost, places=6)
+                self.assertEqual((path[0], path[-1]), (goal, "Anthony"))
+        self.assertEqual(self.cache.tree_hits, 3)
+        self.assertEqual(self.cache.misses, 0)
+
+    def test_graph_version_change_invalidates(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        cache = query_cache.QueryCache(compact)
+        cache.search("Anthony", "Salina", "bfs")
+        cache.shortest_path_tree("Anthony")
+
+        compact.version += 1
+        cache.search("Anthony", "Salina", "bfs")
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        self.assertEqual(cache.stats()["trees"], 0)
+
+    def test_longer_roads_repair_instead_of_invalidating(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        cache = query_cache.QueryCache(compact)
+        via_mcpherson = cache.search("Anthony", "Salina", "a_star")
+        elsewhere = cache.search("Anthony", "Coldwater", "a_star")
+        cache.search("Anthony", "Topeka", "dfs")
+        tree = cache.shortest_path_tree("Anthony")
+        self.assertIn("McPherson", via_mcpherson[0])
+        self.assertNotIn("Salina", elsewhere[0])
+
+        compact.remove_edge("McPherson", "Salina")
+        self.assertEqual(cache.search("Anthony", "Coldwater", "a_star"), elsewhere)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(cache), 1)  # The route through the closed road and the DFS result are gone
+        self.assertEqual(cache.stats()["trees"], 0)  # The tree used it too
+        self.assertIn("McPherson", tree.path("Salina"))
+
+        rerouted = cache.search("Anthony", "Salina", "a_star")
+        self.assertEqual(rerouted, search_algorithms.a_star_search(compact, "Anthony", "Salina", None))
+        self.assertGreater(rerouted[1], via_mcpherson[1])
+
+        compact.add_edge("McPherson", "Salina")  # A new road can shorten anything
+        cache.search("Anthony", "Coldwater", "a_star")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_no_path_not_cached(self):
+        self.assertEqual(self.cache.search("Anthony", "Fake_City", "bfs"), (None, float('inf')))
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
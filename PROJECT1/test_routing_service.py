@@ -0,0 +1,147 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import graph_setup
+import search_algorithms
+import routing_service
+
+
+class TestRoutingService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+
+    def setUp(self):
+        self.service = routing_service.RoutingService(self.graph, self.coords, executor=ThreadPoolExecutor(4))
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_query_matches_direct_search(self):
+        record = asyncio.run(self.service.query("Anthony", "Salina", "a_star"))
+        path, cost = search_algorithms.a_star_search(self.graph, "Anthony", "Salina", self.coords)
+        self.assertEqual(record["path"], path)
+        self.assertAlmostEqual(record["cost"], cost, places=6)
+        self.assertFalse(record["timed_out"])
+        self.assertFalse(record["coalesced"])
+        self.assertGreaterEqual(record["total_ms"], record["search_ms"])
+
+    def test_identical_queries_are_coalesced(self):
+        async def run():
+            return await asyncio.gather(*(self.service.query("Anthony", "Topeka", "bfs") for _ in range(5)),
+                                        self.service.query("Anthony", "Topeka", "dfs"))
+
+        records = asyncio.run(run())
+        self.assertEqual([r["coalesced"] for r in records], [False, True, True, True, True, False])
+        self.assertTrue(all(r["path"] == records[0]["path"] for r in records[:5]))
+        metrics = self.service.metrics()
+        self.assertEqual((metrics["requests"], metrics["completed"], metrics["coalesced"]), (6, 6, 4))
+        self.assertEqual(metrics["in_flight"], 0)
+        self.assertGreater(metrics["throughput_qps"], 0)
+        self.assertLessEqual(metrics["latency_ms"]["p50"], metrics["latency_ms"]["p99"])
+
+    def test_deadline_becomes_max_time(self):
+        chain = {str(i): [str(i - 1), str(i + 1)] for i in range(1, 3000)}
+        chain["0"], chain["3000"] = ["1"], ["2999"]
+        service = routing_service.RoutingService(chain, executor=ThreadPoolExecutor(1))
+        try:
+            record = asyncio.run(service.query("0", "3000", "id_dfs", deadline=0.05, max_depth=3000))
+        finally:
+            service.close()
+        self.assertTrue(record["timed_out"])
+        self.assertIsNone(record["path"])
+        self.assertLess(record["total_ms"], 2000)
+
+    def test_coalescing_respects_deadlines(self):
+        executor = ThreadPoolExecutor(1)
+        service = routing_service.RoutingService(self.graph, self.coords, executor=executor)
+        release = threading.Event()
+        executor.submit(release.wait)  # Keeps the one worker busy, so the queries queue up
+
+        async def run():
+            asyncio.get_running_loop().call_later(0.2, release.set)
+            return await asyncio.gather(service.query("Anthony", "Salina", "bfs", deadline=0.05),
+                                        service.query("Anthony", "Salina", "bfs", deadline=30),
+                                        service.query("Anthony", "Salina", "bfs", deadline=10))
+
+        try:
+            short, long, shorter = asyncio.run(run())
+        finally:
+            release.set()
+            service.close()
+        # The 0.05 s search must not answer for the 30 s request, but the 30 s search covers the 10 s one
+        self.assertTrue(short["timed_out"])
+        self.assertEqual((long["coalesced"], long["timed_out"], long["path"][-1]), (False, False, "Salina"))
+        self.assertEqual((shorter["coalesced"], shorter["path"]), (True, long["path"]))
+
+    def test_bad_requests(self):
+        record = asyncio.run(self.service.query("Anthony", "Salina", "teleport"))
+        self.assertIn("error", record)
+        reply = asyncio.run(self.service.handle_request({"goal": "Salina", "id": 7}))
+        self.assertIn("error", reply)
+        self.assertEqual(reply["id"], 7)
+        self.assertEqual(self.service.metrics()["errors"], 2)
+
+    def test_local_client_over_unix_socket(self):
+        async def run(path):
+            server = await self.service.serve(path)
+            async with server:
+                client = await routing_service.RoutingClient.connect(path)
+                try:
+                    replies = await asyncio.gather(
+                        client.query("Anthony", "Salina", "id_dfs", max_depth=15),
+                        client.query("Anthony", "Coldwater", "bidirectional_bfs", deadline_ms=2000),
+                        client.request({"start": "Anthony"}))
+                    metrics = await client.metrics()
+                finally:
+                    await client.close()
+            return replies, metrics
+
+        with tempfile.TemporaryDirectory() as tmp:
+            (deep, short, malformed), metrics = asyncio.run(run(os.path.join(tmp, "routes.sock")))
+
+        self.assertEqual(deep["path"][-1], "Salina")
+        self.assertEqual(short["path"][-1], "Coldwater")
+        self.assertIn("error", malformed)
+        self.assertEqual(metrics["completed"], 2)
+
+    def test_process_pool(self):
+        service = routing_service.RoutingService(self.graph, self.coords, workers=2)
+        try:
+            record = asyncio.run(service.query("Anthony", "Topeka", "a_star"))
+        finally:
+            service.close()
+        self.assertEqual(record["path"][-1], "Topeka")
+
+    def test_single_worker_process_pool(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        service = routing_service.RoutingService(compact, workers=1)
+        goals = ("Salina", "Topeka", "Coldwater")
+
+        async def run():
+            return await asyncio.gather(*(service.query("Anthony", goal, "a_star") for goal in goals),
+                                        service.query("Anthony", "Salina", "a_star"))
+
+        try:
+            self.assertIsInstance(service.executor, ProcessPoolExecutor)
+            records = asyncio.run(run())
+            metrics = service.metrics()
+        finally:
+            service.close()
+        # The queries queue up on the one worker, which holds its own copy of the graph
+        for goal, record in zip(goals, records):
+            path, cost = search_algorithms.a_star_search(compact, "Anthony", goal, None)
+            self.assertEqual(record["path"], path)
+            self.assertAlmostEqual(record["cost"], cost, places=6)
+            self.assertFalse(record["timed_out"])
+        self.assertTrue(records[-1]["coalesced"])
+        self.assertEqual((metrics["completed"], metrics["coalesced"], metrics["errors"]), (4, 1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
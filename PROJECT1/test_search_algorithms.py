@@ -1,7 +1,13 @@
 import unittest
+import benchmark
 import graph_setup
 import search_algorithms
+import io
+import random
+import threading
 import time
+import tracemalloc
+from unittest.mock import patch
 
 class TestSearchAlgorithms(unittest.TestCase):
 
@@ -175,5 +181,589 @@ class TestSearchTimeout(unittest.TestCase):
         self.assertLessEqual(elapsed_time, 0.01, "A* Search should have timed out quickly.")
 
 
+class TestCompactGraphSearch(unittest.TestCase):
+
+    def setUp(self):
+        # Same graph as TestSearchAlgorithms, converted to the CSR representation
+        base = TestSearchAlgorithms()
+        base.setUp()
+        self.graph = base.graph
+        self.coords = base.coords
+        self.compact = graph_setup.build_compact_graph(self.graph, self.coords)
+
+    def test_uninformed_searches_match_dict_graph(self):
+        for search in (search_algorithms.bfs, search_algorithms.dfs):
+            for goal in ("C", "E", "X"):
+                self.assertEqual(search(self.compact, "A", goal), search(self.graph, "A", goal))
+
+        for goal in ("C", "E", "X"):
+            self.assertEqual(search_algorithms.id_dfs(self.compact, "A", goal, max_depth=5),
+                             search_algorithms.id_dfs(self.graph, "A", goal, max_depth=5))
+
+    def test_csr_loops_match_dict_graph(self):
+        graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        compact = graph_setup.build_compact_graph(graph, graph_setup.load_coordinates("coordinates.csv"))
+        searches = (search_algorithms.bfs, search_algorithms.dfs, search_algorithms.bidirectional_bfs,
+                    lambda g, s, t, **kw: search_algorithms.id_dfs(g, s, t, max_depth=4, prune=True, **kw))
+
+        def check():
+            for search in searches:
+                for start in ("Anthony", "Salina", "Wichita"):
+                    for goal in graph:
+                        compact_stats, dict_stats = search_algorithms.SearchStats(), search_algorithms.SearchStats()
+                        self.assertEqual(search(compact, start, goal, stats=compact_stats),
+                                         search(graph, start, goal, stats=dict_stats))
+                        self.assertEqual((compact_stats.expanded, compact_stats.generated),
+                                         (dict_stats.expanded, dict_stats.generated))
+
+        self.assertIsNotNone(compact.csr())
+        check()
+        # A road update overrides two rows: the searches fall back to neighbors()
+        compact.add_edge("Anthony", "Salina")
+        graph["Anthony"].append("Salina")
+        graph["Salina"].append("Anthony")
+        self.assertIsNone(compact.csr())
+        check()
+
+    def test_informed_searches_match_dict_graph(self):
+        for search in (search_algorithms.best_first_search, search_algorithms.a_star_search):
+            for goal in ("C", "E", "X"):
+                path, cost = search(self.compact, "A", goal, self.coords)
+                expected_path, expected_cost = search(self.graph, "A", goal, self.coords)
+                self.assertEqual(path, expected_path)
+                self.assertAlmostEqual(cost, expected_cost, delta=0.001)
+
+    def test_a_star_reuses_heuristic_table(self):
+        search_algorithms.a_star_search(self.compact, "A", "E", None)
+        table = self.compact.heuristic_table(self.compact.id_of("E"))
+        # Heuristic values computed by the first query stay cached for the next one
+        self.assertAlmostEqual(table[self.compact.id_of("A")],
+                               graph_setup.haversine_distance("A", "E", self.coords))
+
+        path, cost = search_algorithms.a_star_search(self.compact, "B", "E", None)
+        self.assertEqual(path, ["B", "D", "E"])
+
+    def test_unknown_city(self):
+        path, cost = search_algorithms.bfs(self.compact, "A", "Fake_City")
+        self.assertIsNone(path)
+        self.assertEqual(cost, float('inf'))
+
+
+class TestPathMemory(unittest.TestCase):
+
+    def setUp(self):
+        # 50x50 grid: DFS wanders through most of it, giving routes thousands of edges long
+        n = 50
+        self.graph = {}
+        for i in range(n):
+            for j in range(n):
+                self.graph[f"{i}_{j}"] = [f"{a}_{b}" for a, b in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1))
+                                          if 0 <= a < n and 0 <= b < n]
+        self.goal = f"{n - 1}_{n - 1}"
+
+    def test_dfs_long_route_memory(self):
+        """
+        Copying the path into every stack entry needed ~60 MB here;
+        parent pointers keep the peak well under 1 MB.
+        """
+        tracemalloc.start()
+        path, cost = search_algorithms.dfs(self.graph, "0_0", self.goal, max_time=30.0)
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+        self.assertGreater(len(path), 2000)
+        self.assertEqual(cost, len(path) - 1)
+        self.assertLess(peak_kb, 1024, f"DFS peak memory too high: {peak_kb:.0f} KB")
+
+    def test_paths_are_valid(self):
+        for search in (search_algorithms.bfs, search_algorithms.dfs):
+            path, _ = search(self.graph, "0_0", self.goal, max_time=30.0)
+            self.assertEqual(path[0], "0_0")
+            self.assertEqual(path[-1], self.goal)
+            for a, b in zip(path, path[1:]):
+                self.assertIn(b, self.graph[a])
+
+
+class TestAStarBookkeeping(unittest.TestCase):
+
+    def setUp(self):
+        # Complete graph on a 10x10 lattice of points: every node relaxes every other node
+        self.coords = {f"{i}_{j}": (37.0 + i * 0.1, -97.0 + j * 0.1) for i in range(10) for j in range(10)}
+        self.graph = {city: [other for other in self.coords if other != city] for city in self.coords}
+
+    def test_each_node_expanded_at_most_once(self):
+        stats = search_algorithms.SearchStats()
+        path, cost = search_algorithms.a_star_search(self.graph, "0_0", "9_9", self.coords, stats=stats)
+
+        self.assertEqual(path, ["0_0", "9_9"])  # The straight edge is shortest
+        self.assertLessEqual(stats.expanded, len(self.graph))
+        self.assertGreater(stats.generated, 0)
+        # Only improving relaxations are pushed, so the heap stays far below |E|
+        self.assertLess(stats.generated, sum(len(n) for n in self.graph.values()) // 10)
+
+    def test_reopening_mode_matches(self):
+        graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        coords = graph_setup.load_coordinates("coordinates.csv")
+        for goal in ("Salina", "Topeka", "Coldwater"):
+            expected = search_algorithms.a_star_search(graph, "Anthony", goal, coords)
+            result = search_algorithms.a_star_search(graph, "Anthony", goal, coords, consistent=False)
+            self.assertEqual(result[0], expected[0])
+            self.assertAlmostEqual(result[1], expected[1], places=9)
+
+    def test_stats_on_compact_graph(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        stats = search_algorithms.SearchStats()
+        search_algorithms.a_star_search(compact, "0_0", "5_5", None, stats=stats)
+        self.assertGreater(stats.expanded, 0)
+        self.assertLessEqual(stats.expanded, len(compact))
+
+
+class TestBidirectionalSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.compact = graph_setup.build_compact_graph(cls.graph, cls.coords)
+
+    def test_bidirectional_bfs_matches_bfs_cost(self):
+        for start in self.graph:
+            for goal in self.graph:
+                _, expected = search_algorithms.bfs(self.graph, start, goal)
+                path, cost = search_algorithms.bidirectional_bfs(self.graph, start, goal)
+                self.assertEqual(cost, expected)
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                for a, b in zip(path, path[1:]):
+                    self.assertIn(b, self.graph[a])
+
+    def test_bidirectional_a_star_matches_a_star_cost(self):
+        for start in self.graph:
+            for goal in self.graph:
+                _, expected = search_algorithms.a_star_search(self.graph, start, goal, self.coords)
+                path, cost = search_algorithms.bidirectional_a_star_search(self.graph, start, goal, self.coords)
+                self.assertAlmostEqual(cost, expected, places=6)
+                self.assertAlmostEqual(graph_setup.path_distance(path, self.coords), cost, places=6)
+
+    def test_compact_graph(self):
+        path, cost = search_algorithms.bidirectional_a_star_search(self.compact, "Anthony", "Salina", None)
+        expected = search_algorithms.bidirectional_a_star_search(self.graph, "Anthony", "Salina", self.coords)
+        self.assertEqual(path, expected[0])
+        self.assertAlmostEqual(cost, expected[1], places=9)
+        self.assertEqual(search_algorithms.bidirectional_bfs(self.compact, "Anthony", "Salina"),
+                         search_algorithms.bidirectional_bfs(self.graph, "Anthony", "Salina"))
+
+    def test_no_route(self):
+        graph = {"A": ["B"], "B": ["A"], "X": []}
+        coords = {"A": (37.0, -97.0), "B": (37.0, -96.5), "X": (36.0, -98.0)}
+        self.assertEqual(search_algorithms.bidirectional_bfs(graph, "A", "X"), (None, float('inf')))
+        self.assertEqual(search_algorithms.bidirectional_a_star_search(graph, "A", "X", coords),
+                         (None, float('inf')))
+        self.assertEqual(search_algorithms.bidirectional_bfs(graph, "A", "A"), (["A"], 0))
+
+
+class TestDijkstraOneToMany(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.compact = graph_setup.build_compact_graph(cls.graph, cls.coords)
+
+    def test_matches_a_star_for_every_target(self):
+        for graph in (self.graph, self.compact):
+            tree = search_algorithms.dijkstra_one_to_many(graph, "Anthony", self.coords)
+            for goal in self.graph:
+                expected_path, expected_cost = search_algorithms.a_star_search(self.graph, "Anthony", goal, self.coords)
+                self.assertAlmostEqual(tree.distance(goal), expected_cost, places=6)
+                self.assertEqual(tree.path(goal), expected_path)
+
+    def test_targets_stop_early(self):
+        tree = search_algorithms.dijkstra_one_to_many(self.graph, "Anthony", self.coords, targets=["Harper"])
+        full = search_algorithms.dijkstra_one_to_many(self.graph, "Anthony", self.coords)
+        self.assertAlmostEqual(tree.distance("Harper"), full.distance("Harper"), places=9)
+        self.assertLess(len(tree.dist), len(full.dist))
+        for city in tree.dist:  # Whatever it reports is final
+            self.assertAlmostEqual(tree.distance(city), full.distance(city), places=9)
+
+    def test_unreachable(self):
+        tree = search_algorithms.dijkstra_one_to_many(self.graph, "Anthony", self.coords)
+        self.assertEqual(tree.distance("Fake_City"), float('inf'))
+        self.assertIsNone(tree.path("Fake_City"))
+
+        tree = search_algorithms.dijkstra_one_to_many(self.compact, "Fake_City")
+        self.assertEqual(tree.distance("Anthony"), float('inf'))
+
+
+
+class TestIterativeDeepening(unittest.TestCase):
+
+    def grid(self, n):
+        graph = {}
+        for r in range(n):
+            for c in range(n):
+                graph[f"{r}_{c}"] = [f"{a}_{b}" for a, b in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1))
+                                     if 0 <= a < n and 0 <= b < n]
+        return graph
+
+    def test_deep_chain(self):
+        # Deeper than the default recursion limit
+        graph = {str(i): [str(i - 1), str(i + 1)] for i in range(1, 1200)}
+        graph["0"], graph["1200"] = ["1"], ["1199"]
+        path, cost = search_algorithms.id_dfs(graph, "0", "1200", max_depth=1200, max_time=60.0)
+        self.assertEqual(cost, 1200)
+        self.assertEqual(path, [str(i) for i in range(1201)])
+
+    def test_pruning_keeps_shortest_route(self):
+        graph = self.grid(5)
+        plain, pruned = search_algorithms.SearchStats(), search_algorithms.SearchStats()
+        expected = search_algorithms.id_dfs(graph, "0_0", "4_4", max_depth=8, stats=plain)
+        path, cost = search_algorithms.id_dfs(graph, "0_0", "4_4", max_depth=8, prune=True, stats=pruned)
+
+        self.assertEqual(cost, expected[1])
+        self.assertEqual(cost, 8)
+        self.assertEqual(len(plain.iterations), 9)
+        self.assertEqual(len(pruned.iterations), 9)
+        self.assertLess(pruned.expanded, plain.expanded / 3)
+
+    def test_stops_when_nothing_is_cut_off(self):
+        graph = {"A": ["B"], "B": ["A", "C"], "C": ["B"], "X": []}
+        stats = search_algorithms.SearchStats()
+        self.assertEqual(search_algorithms.id_dfs(graph, "A", "X", max_depth=1000, stats=stats),
+                         (None, float('inf')))
+        self.assertEqual(stats.iterations, [1, 2, 3])
+
+    def test_timeout_ends_every_pass(self):
+        graph = self.grid(30)
+        stats = search_algorithms.SearchStats()
+        start_time = time.perf_counter()
+        path, cost = search_algorithms.id_dfs(graph, "0_0", "29_29", max_depth=100, max_time=0.001, stats=stats)
+
+        self.assertIsNone(path)
+        self.assertLess(time.perf_counter() - start_time, 0.05)
+        self.assertLess(len(stats.iterations), 100)
+
+
+
+class TestMemoryBoundedSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.compact = graph_setup.build_compact_graph(cls.graph, cls.coords)
+
+    def test_optimal_like_a_star(self):
+        for goal in ("Salina", "Coldwater", "Topeka", "Anthony"):
+            _, expected = search_algorithms.a_star_search(self.graph, "Anthony", goal, self.coords)
+            for graph in (self.graph, self.compact):
+                for search, options in ((search_algorithms.ida_star_search, {}),
+                                        (search_algorithms.sma_star_search, {"max_nodes": 15})):
+                    path, cost = search(graph, "Anthony", goal, self.coords, **options)
+                    self.assertEqual(path[0], "Anthony")
+                    self.assertEqual(path[-1], goal)
+                    self.assertAlmostEqual(cost, expected, places=6)
+                    self.assertAlmostEqual(graph_setup.path_distance(path, self.coords), expected, places=6)
+
+    def test_sma_star_optimal_when_route_fits(self):
+        # Tight budgets: exactly the cities on the best route, and two more
+        cities = self.compact.names
+        for start in cities:
+            for goal in cities:
+                path, expected = search_algorithms.a_star_search(self.compact, start, goal, self.coords)
+                if path is None:
+                    continue
+                for max_nodes in (len(path), len(path) + 2):
+                    found, cost = search_algorithms.sma_star_search(self.compact, start, goal, self.coords,
+                                                                    max_nodes=max_nodes)
+                    self.assertIsNotNone(found, (start, goal, max_nodes))
+                    self.assertAlmostEqual(cost, expected, places=6, msg=(start, goal, max_nodes))
+
+    def test_sma_star_on_synthetic_road_graph(self):
+        # Cycles everywhere: without duplicate pruning the tree search regenerates
+        # the same cities until it times out, even at the default budget
+        graph = benchmark.road_like_graph(400, seed=3)
+        rng = random.Random(7)
+        pairs = [("v199", "v221")] + [(graph.names[rng.randrange(400)], graph.names[rng.randrange(400)])
+                                      for _ in range(10)]
+        for start, goal in pairs:
+            path, expected = search_algorithms.a_star_search(graph, start, goal, None)
+            for max_nodes in (2 * len(path), 1000):
+                deadline = search_algorithms.Deadline(10.0)
+                found, cost = search_algorithms.sma_star_search(graph, start, goal, None, max_nodes=max_nodes,
+                                                                deadline=deadline)
+                self.assertFalse(deadline.timed_out, (start, goal, max_nodes))
+                self.assertAlmostEqual(cost, expected, places=6, msg=(start, goal, max_nodes))
+                self.assertEqual((found[0], found[-1]), (start, goal))
+
+    def test_sma_star_cheapest_route_within_budget(self):
+        # A-B-C-D runs close to the straight line; A-X-D detours but has one city fewer
+        graph = {"A": ["B", "X"], "B": ["A", "C"], "C": ["B", "D"], "D": ["C", "X"], "X": ["A", "D"]}
+        coords = {"A": (37.0, -97.0), "B": (37.01, -96.9), "C": (37.01, -96.8), "D": (37.0, -96.7),
+                  "X": (37.3, -96.85)}
+        self.assertEqual(search_algorithms.sma_star_search(graph, "A", "D", coords, max_nodes=4)[0],
+                         ["A", "B", "C", "D"])
+        self.assertEqual(search_algorithms.sma_star_search(graph, "A", "D", coords, max_nodes=3)[0],
+                         ["A", "X", "D"])
+        self.assertEqual(search_algorithms.sma_star_search(graph, "A", "D", coords, max_nodes=2),
+                         (None, float('inf')))
+
+    def test_sma_star_respects_budget(self):
+        # A 60-city chain needs 60 nodes held at once
+        graph = {str(i): [str(i - 1), str(i + 1)] for i in range(1, 59)}
+        graph["0"], graph["59"] = ["1"], ["58"]
+        coords = {str(i): (37.0, -97.0 + i * 0.01) for i in range(60)}
+
+        path, cost = search_algorithms.sma_star_search(graph, "0", "59", coords, max_nodes=60)
+        self.assertEqual(len(path), 60)
+        self.assertEqual(search_algorithms.sma_star_search(graph, "0", "59", coords, max_nodes=30),
+                         (None, float('inf')))
+
+    def test_unreachable_goal(self):
+        graph = {"A": ["B"], "B": ["A", "C"], "C": ["B"], "X": []}
+        coords = {"A": (37.0, -97.0), "B": (37.0, -96.5), "C": (37.5, -96.5), "X": (36.0, -98.0)}
+        for search in (search_algorithms.ida_star_search, search_algorithms.sma_star_search):
+            self.assertEqual(search(graph, "A", "X", coords), (None, float('inf')))
+            self.assertEqual(search(graph, "A", "A", coords), (["A"], 0))
+
+    def test_timeout(self):
+        graph = {str(i): [str(i + 1)] for i in range(5000)}
+        graph["4999"] = []
+        coords = {str(i): (37.0 + i * 0.01, -97.0) for i in range(5000)}
+        for search in (search_algorithms.ida_star_search, search_algorithms.sma_star_search):
+            start_time = time.perf_counter()
+            self.assertEqual(search(graph, "0", "4999", coords, max_time=0.0001), (None, float('inf')))
+            self.assertLessEqual(time.perf_counter() - start_time, 0.01)
+
+
+
+class TestBoundedSuboptimalSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.compact = graph_setup.build_compact_graph(cls.graph, cls.coords)
+
+    def jittered_grid(self, n):
+        rng = random.Random(5)
+        coords = {f"{r}_{c}": (37.0 + r * 0.01 + rng.uniform(0, 0.004), -97.0 + c * 0.01 + rng.uniform(0, 0.004))
+                  for r in range(n) for c in range(n)}
+        graph = {f"{r}_{c}": [f"{a}_{b}" for a, b in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1))
+                              if 0 <= a < n and 0 <= b < n]
+                 for r in range(n) for c in range(n)}
+        return graph, coords
+
+    def test_weighted_a_star_within_bound(self):
+        for goal in ("Salina", "Coldwater", "Topeka"):
+            _, optimal = search_algorithms.a_star_search(self.graph, "Anthony", goal, self.coords)
+            for graph in (self.graph, self.compact):
+                stats = search_algorithms.SearchStats()
+                path, cost = search_algorithms.weighted_a_star_search(graph, "Anthony", goal, self.coords,
+                                                                      weight=2.0, stats=stats)
+                self.assertEqual(stats.suboptimality, 2.0)
+                self.assertLessEqual(cost, 2.0 * optimal + 1e-9)
+                self.assertAlmostEqual(graph_setup.path_distance(path, self.coords), cost, places=6)
+
+        with self.assertRaises(ValueError):
+            search_algorithms.weighted_a_star_search(self.graph, "Anthony", "Salina", self.coords, weight=0.5)
+
+    def test_ara_star_converges_to_optimal(self):
+        for goal in ("Salina", "Coldwater", "Topeka", "Anthony", "Fake_City"):
+            expected = search_algorithms.a_star_search(self.graph, "Anthony", goal, self.coords)
+            for graph in (self.graph, self.compact):
+                stats = search_algorithms.SearchStats()
+                path, cost = search_algorithms.ara_star_search(graph, "Anthony", goal, self.coords, stats=stats)
+                if expected[0] is None:
+                    self.assertIsNone(path)
+                    continue
+                self.assertAlmostEqual(cost, expected[1], places=6)
+                self.assertEqual(stats.suboptimality, 1.0)
+
+    def test_ara_star_returns_best_route_at_deadline(self):
+        graph, coords = self.jittered_grid(80)
+        _, optimal = search_algorithms.a_star_search(graph, "0_0", "79_79", coords, max_time=60.0)
+        stats = search_algorithms.SearchStats()
+        path, cost = search_algorithms.ara_star_search(graph, "0_0", "79_79", coords, max_time=0.02, stats=stats)
+
+        # Whether or not the deadline cut it short, the route is within the reported bound
+        self.assertIsNotNone(path)
+        self.assertGreaterEqual(stats.suboptimality, 1.0)
+        self.assertLessEqual(cost, stats.suboptimality * optimal + 1e-9)
+
+    def test_beam_search_width(self):
+        graph, coords = self.jittered_grid(20)
+        stats = search_algorithms.SearchStats()
+        path, cost = search_algorithms.beam_search(graph, "0_0", "19_19", coords, width=2, stats=stats)
+        self.assertEqual((path[0], path[-1], cost), ("0_0", "19_19", len(path) - 1))
+        self.assertEqual(stats.suboptimality, float('inf'))
+        self.assertLessEqual(stats.expanded, 2 * cost)
+
+        # A dead end that falls outside a narrow beam
+        graph = {"S": ["A", "B"], "A": ["S"], "B": ["S", "G"], "G": ["B"]}
+        coords = {"S": (37.0, -97.0), "A": (37.0, -96.1), "B": (36.0, -97.0), "G": (37.0, -96.0)}
+        self.assertEqual(search_algorithms.beam_search(graph, "S", "G", coords, width=1), (None, float('inf')))
+        self.assertEqual(search_algorithms.beam_search(graph, "S", "G", coords, width=2), (["S", "B", "G"], 2))
+        self.assertEqual(search_algorithms.beam_search(self.compact, "Anthony", "Anthony", None), (["Anthony"], 0))
+
+
+
+class TestDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = {str(i): [str(i + 1)] for i in range(20000)}
+        self.graph["19999"] = []
+        self.coords = {str(i): (37.0 + i * 0.001, -97.0) for i in range(20000)}
+
+    def test_clock_read_every_n_checks(self):
+        deadline = search_algorithms.Deadline(0.0, check_every=3)
+        time.sleep(0.001)
+        self.assertTrue(deadline.expired())  # The first call reads the clock
+        self.assertTrue(deadline.expired())  # and it stays expired
+        self.assertTrue(deadline.timed_out)
+
+        deadline = search_algorithms.Deadline(60.0, check_every=3)
+        self.assertFalse(deadline.expired())
+        deadline.cancel()
+        self.assertEqual([deadline.expired() for _ in range(3)], [False, False, True])
+        self.assertTrue(deadline.cancelled)
+        self.assertFalse(deadline.timed_out)
+
+    def test_structured_time_out_without_printing(self):
+        searches = [
+            lambda d: search_algorithms.bfs(self.graph, "0", "19999", deadline=d),
+            lambda d: search_algorithms.dfs(self.graph, "0", "19999", deadline=d),
+            lambda d: search_algorithms.id_dfs(self.graph, "0", "19999", max_depth=20000, deadline=d),
+            lambda d: search_algorithms.a_star_search(self.graph, "0", "19999", self.coords, deadline=d),
+            lambda d: search_algorithms.bidirectional_bfs(self.graph, "0", "19999", deadline=d),
+        ]
+        for search in searches:
+            deadline = search_algorithms.Deadline(0.0001)
+            with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                self.assertEqual(search(deadline), (None, float('inf')))
+            self.assertTrue(deadline.timed_out)
+            self.assertEqual(stdout.getvalue(), "")
+
+        deadline = search_algorithms.Deadline(5.0)
+        self.assertEqual(search_algorithms.bfs({"A": ["B"], "B": []}, "A", "B", deadline=deadline), (["A", "B"], 1))
+        self.assertFalse(deadline.timed_out)
+
+    def test_cancel_from_another_thread(self):
+        graph = {str(i): [str(i - 1), str(i + 1)] for i in range(1, 2000)}
+        graph["0"], graph["2000"] = ["1"], ["1999"]
+        deadline = search_algorithms.Deadline(60.0)
+        timer = threading.Timer(0.05, deadline.cancel)
+        timer.start()
+        start_time = time.perf_counter()
+        # Far too deep to finish: ID-DFS redoes the whole chain at every depth
+        path, cost = search_algorithms.id_dfs(graph, "0", "2000", max_depth=2000, deadline=deadline)
+        timer.join()
+
+        self.assertIsNone(path)
+        self.assertTrue(deadline.cancelled)
+        self.assertFalse(deadline.timed_out)
+        self.assertLess(time.perf_counter() - start_time, 5.0)
+
+
+class TestUnreachableGoals(unittest.TestCase):
+
+    def setUp(self):
+        # Two separate chains: every search would otherwise exhaust the first
+        self.graph = {str(i): [str(i - 1), str(i + 1)] for i in range(1, 3000)}
+        self.graph.update({"0": ["1"], "3000": ["2999"], "island": ["shore"], "shore": ["island"]})
+        self.coords = {city: (37.0 + i * 0.001, -97.0) for i, city in enumerate(self.graph)}
+        self.compact = graph_setup.build_compact_graph(self.graph, self.coords)
+
+    def test_rejected_without_searching(self):
+        for algorithm in search_algorithms.ALGORITHMS:
+            for goal in ("island", "Atlantis"):
+                stats = search_algorithms.SearchStats()
+                result = search_algorithms.run_search(algorithm, self.compact, "0", goal, self.coords, stats=stats)
+                self.assertEqual(result, (None, float('inf')))
+                self.assertEqual(stats.expanded, 0, algorithm)
+
+    def test_labels_follow_road_updates(self):
+        self.compact.add_edge("3000", "shore")
+        self.assertEqual(search_algorithms.bfs(self.compact, "0", "island")[0][-3:], ["3000", "shore", "island"])
+        self.compact.remove_edge("3000", "shore")
+        stats = search_algorithms.SearchStats()
+        self.assertEqual(search_algorithms.bfs(self.compact, "0", "island", stats=stats), (None, float('inf')))
+        self.assertEqual(stats.expanded, 0)
+
+    def test_same_component_and_dict_graphs_still_searched(self):
+        self.assertEqual(search_algorithms.bfs(self.compact, "island", "shore"), (["island", "shore"], 1))
+        self.assertEqual(search_algorithms.bfs(self.compact, "Atlantis", "Atlantis"), (["Atlantis"], 0))
+
+        stats = search_algorithms.SearchStats()
+        search_algorithms.bfs(self.graph, "0", "island", stats=stats)
+        self.assertEqual(stats.expanded, 3001)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+
+    def test_hooks_see_every_expansion_and_push(self):
+        searches = [
+            lambda s: search_algorithms.bfs(self.graph, "Anthony", "Topeka", stats=s),
+            lambda s: search_algorithms.dfs(self.graph, "Anthony", "Topeka", stats=s),
+            lambda s: search_algorithms.id_dfs(self.graph, "Anthony", "Topeka", stats=s),
+            lambda s: search_algorithms.best_first_search(self.graph, "Anthony", "Topeka", self.coords, stats=s),
+            lambda s: search_algorithms.a_star_search(self.graph, "Anthony", "Topeka", self.coords, stats=s),
+            lambda s: search_algorithms.ida_star_search(self.graph, "Anthony", "Topeka", self.coords, stats=s),
+            lambda s: search_algorithms.sma_star_search(self.graph, "Anthony", "Topeka", self.coords, stats=s),
+            lambda s: search_algorithms.bidirectional_bfs(self.graph, "Anthony", "Topeka", stats=s),
+            lambda s: search_algorithms.bidirectional_a_star_search(self.graph, "Anthony", "Topeka",
+                                                                     self.coords, stats=s),
+        ]
+        for search in searches:
+            expanded, pushed = [], []
+            stats = search_algorithms.SearchStats(on_expand=expanded.append, on_push=pushed.append)
+            path, _ = search(stats)
+            self.assertIsNotNone(path)
+            self.assertEqual(len(expanded), stats.expanded)
+            self.assertEqual(len(pushed), stats.generated)
+            self.assertLessEqual(set(expanded), set(self.graph))
+            self.assertGreater(stats.peak_frontier, 0)
+            self.assertGreater(stats.phase_times["search"], 0.0)
+
+            # Without hooks the counters come out the same
+            plain = search_algorithms.SearchStats()
+            search(plain)
+            self.assertEqual((plain.expanded, plain.generated), (stats.expanded, stats.generated))
+
+    def test_heuristic_evaluations(self):
+        stats = search_algorithms.SearchStats()
+        search_algorithms.a_star_search(self.graph, "Anthony", "Topeka", self.coords, stats=stats)
+        self.assertGreaterEqual(stats.heuristic_evaluations, stats.generated)
+
+        stats = search_algorithms.SearchStats()
+        search_algorithms.bfs(self.graph, "Anthony", "Topeka", stats=stats)
+        self.assertEqual(stats.heuristic_evaluations, 0)
+
+    def test_reexpansions(self):
+        stats = search_algorithms.SearchStats()
+        search_algorithms.id_dfs(self.graph, "Anthony", "Topeka", stats=stats)
+        self.assertGreater(len(stats.iterations), 1)
+        self.assertGreater(stats.reexpanded, 0)
+        self.assertLess(stats.reexpanded, stats.expanded)
+
+        stats = search_algorithms.SearchStats()
+        search_algorithms.a_star_search(self.graph, "Anthony", "Topeka", self.coords, stats=stats)
+        self.assertEqual(stats.reexpanded, 0)
+
+    def test_lookup_phase_on_compact_graph(self):
+        compact = graph_setup.build_compact_graph(self.graph, self.coords)
+        expanded = []
+        stats = search_algorithms.SearchStats(on_expand=expanded.append)
+        path, _ = search_algorithms.a_star_search(compact, "Anthony", "Topeka", None, stats=stats)
+        self.assertEqual(path[0], "Anthony")
+        self.assertIn("lookup", stats.phase_times)
+        self.assertIn("search", stats.phase_times)
+        self.assertTrue(all(isinstance(node, int) for node in expanded))
+
+
 if __name__ == "__main__":
     unittest.main()
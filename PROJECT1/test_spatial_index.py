@@ -0,0 +1,65 @@
+import unittest
+import math
+import random
+import graph_setup
+import spatial_index
+import benchmark
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = graph_setup.load_adjacencies("Adjacencies.txt")
+        cls.coords = graph_setup.load_coordinates("coordinates.csv")
+        cls.index = spatial_index.build_spatial_index(cls.graph, cls.coords)
+
+    def brute_force(self, graph, lat, lon):
+        lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+        return sorted((graph_setup.haversine_radians(lat_rad, lon_rad, graph.lat_rad[v], graph.lon_rad[v]),
+                       graph.names[v]) for v in range(len(graph)))
+
+    def test_city_location_snaps_to_itself(self):
+        for city in self.graph:
+            if city in self.coords:
+                name, distance = self.index.nearest(*self.coords[city])[0]
+                self.assertEqual(name, city)
+                self.assertAlmostEqual(distance, 0.0, places=6)
+
+    def test_matches_linear_scan(self):
+        graph = benchmark.random_geometric_graph(3000, seed=2)
+        index = spatial_index.build_spatial_index(graph)
+        rng = random.Random(4)
+        for _ in range(50):
+            lat, lon = rng.uniform(36.5, 40.5), rng.uniform(-102.5, -94)
+            expected = self.brute_force(graph, lat, lon)
+
+            found = index.nearest(lat, lon, k=5)
+            self.assertEqual([name for name, _ in found], [name for _, name in expected[:5]])
+            for (_, distance), (expected_distance, _) in zip(found, expected):
+                self.assertAlmostEqual(distance, expected_distance, places=6)
+
+            radius = rng.uniform(0, 30)
+            within = index.within(lat, lon, radius)
+            self.assertEqual({name for name, _ in within},
+                             {name for distance, name in expected if distance <= radius})
+            self.assertEqual(within, sorted(within, key=lambda pair: pair[1]))
+
+    def test_edge_cases(self):
+        self.assertEqual(len(self.index.nearest(38.0, -97.0, k=1000)), len(self.index))
+        self.assertEqual(self.index.nearest(38.0, -97.0, k=0), [])
+        self.assertEqual(self.index.within(38.0, -97.0, -1), [])
+        self.assertIsNone(spatial_index.SpatialIndex([], [], []).snap(38.0, -97.0))
+        # Cities without coordinates are not indexed
+        index = spatial_index.SpatialIndex(["A", "B"], [37.0, math.nan], [-97.0, math.nan])
+        self.assertEqual(index.nearest(0.0, 0.0, k=2), [("A", index.nearest(0.0, 0.0)[0][1])])
+
+    def test_parse_point(self):
+        self.assertEqual(spatial_index.parse_point("37.2, -97.5"), (37.2, -97.5))
+        self.assertEqual(spatial_index.parse_point("37.2 -97.5"), (37.2, -97.5))
+        for text in ("Anthony", "37.2", "91,0", "1,2,3", "north,west"):
+            self.assertIsNone(spatial_index.parse_point(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -148,6 +148,22 @@ class TestUserInterfaceDeep(unittest.TestCase):
         self.assertIn("Goodbye!", output)
 
 
+    @patch("sys.stdout", new_callable=io.StringIO)
+    @patch("builtins.input")
+    def test_main_snaps_coordinates_to_nearest_city(self, mock_input, mock_stdout):
+        """
+        Scenario: start and goal given as GPS points near Anthony and Salina.
+        """
+        mock_input.side_effect = ["37.16, -98.03", "38.84,-97.61", "1", "n", "n"]
+
+        user_interface.main()
+        output = mock_stdout.getvalue()
+
+        self.assertIn("to Anthony (", output)
+        self.assertIn("to Salina (", output)
+        self.assertIn("Running BFS from Anthony to Salina", output)
+
+
     @patch("sys.stdout", new_callable=io.StringIO)
     @patch("builtins.input")
     def test_main_invalid_method_then_correct(self, mock_input, mock_stdout):
@@ -155,7 +171,7 @@ class TestUserInterfaceDeep(unittest.TestCase):
         Scenario:
          1) Start=Anthony
          2) Goal=Salina
-         3) Enter method => '9' (invalid)
+         3) Enter method => '0' (invalid)
          4) Then correct it => '1' => BFS
          5) Another method => 'n'
          6) New route => 'n' => exit
@@ -163,7 +179,7 @@ class TestUserInterfaceDeep(unittest.TestCase):
         mock_input.side_effect = [
             "Anthony",
             "Salina",
-            "9",     # invalid choice
+            "0",     # invalid choice
             "1",     # BFS
             "n",
             "n"
@@ -177,5 +193,63 @@ class TestUserInterfaceDeep(unittest.TestCase):
         self.assertIn("Path found:", output)
         self.assertIn("Goodbye!", output)
 
+    @patch("sys.stdout", new_callable=io.StringIO)
+    @patch("builtins.input")
+    def test_main_bidirectional_methods(self, mock_input, mock_stdout):
+        """
+        Scenario:
+         1) Start=Anthony, Goal=Salina
+         2) Method = '6' (Bidirectional BFS), another method => 'y'
+         3) Method = '7' (Bidirectional A*), another method => 'n'
+         4) New route => 'n' => exit
+        """
+        mock_input.side_effect = [
+            "Anthony",
+            "Salina",
+            "6",
+            "y",
+            "7",
+            "n",
+            "n"
+        ]
+
+        user_interface.main()
+        output = mock_stdout.getvalue()
+
+        self.assertIn("Running Bidirectional BFS from Anthony to Salina", output)
+        self.assertIn("Running Bidirectional A* Search from Anthony to Salina", output)
+        self.assertNotIn("No path found.", output)
+        self.assertIn("Total distance:", output)
+        self.assertIn("Goodbye!", output)
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    @patch("builtins.input")
+    def test_main_memory_bounded_methods(self, mock_input, mock_stdout):
+        """
+        Scenario:
+         1) Start=Anthony, Goal=Salina
+         2) Method = '8' (IDA*), another method => 'y'
+         3) Method = '9' (SMA*), another method => 'n'
+         4) New route => 'n' => exit
+        """
+        mock_input.side_effect = [
+            "Anthony",
+            "Salina",
+            "8",
+            "y",
+            "9",
+            "n",
+            "n"
+        ]
+
+        user_interface.main()
+        output = mock_stdout.getvalue()
+
+        self.assertIn("Running IDA* Search from Anthony to Salina", output)
+        self.assertIn("Running SMA* Search from Anthony to Salina", output)
+        self.assertNotIn("No path found.", output)
+        self.assertIn("Memory used:", output)
+        self.assertIn("Goodbye!", output)
+
 if __name__ == "__main__":
     unittest.main()
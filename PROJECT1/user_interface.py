@@ -2,6 +2,7 @@ import time
 import tracemalloc
 import graph_setup
 import search_algorithms
+import spatial_index
 
 def main():
     """
@@ -13,23 +14,26 @@ def main():
     """
 
     # --- Load city data once at startup ---
+    # (a CompactGraph is labeled with its components, so unreachable goals are rejected at once)
     coordinates = graph_setup.load_coordinates("coordinates.csv")
-    graph = graph_setup.load_adjacencies("Adjacencies.txt")
+    graph = graph_setup.build_compact_graph(graph_setup.load_adjacencies("Adjacencies.txt"), coordinates)
+    cities = set(graph.keys())
+    index = spatial_index.build_spatial_index(graph, coordinates)
+    print("Available cities:", ", ".join(graph.keys()))
+    print("(A 'latitude,longitude' point is snapped to the nearest city.)")
 
     while True:
         # --- Ask user for start & goal one time ---
-        cities = list(graph.keys())
-        print("Available cities:", ", ".join(cities))
 
-        start = input("Enter the starting city: ")
-        while start not in cities:
+        start = resolve_city(input("Enter the starting city: "), cities, index)
+        while start is None:
             print("Invalid city. Try again.")
-            start = input("Enter the starting city: ")
+            start = resolve_city(input("Enter the starting city: "), cities, index)
 
-        goal = input("Enter the goal city: ")
-        while goal not in cities:
+        goal = resolve_city(input("Enter the goal city: "), cities, index)
+        while goal is None:
             print("Invalid city. Try again.")
-            goal = input("Enter the goal city: ")
+            goal = resolve_city(input("Enter the goal city: "), cities, index)
 
         # --- Let user pick multiple methods for the same route ---
         while True:
@@ -39,9 +43,13 @@ def main():
             print("3. Iterative Deepening DFS (ID-DFS)")
             print("4. Best-First Search")
             print("5. A* Search")
+            print("6. Bidirectional BFS")
+            print("7. Bidirectional A* Search")
+            print("8. IDA* Search")
+            print("9. SMA* Search")
 
             choice = input("Enter the number of your chosen method: ")
-            while choice not in ["1", "2", "3", "4", "5"]:
+            while choice not in ["1", "2", "3", "4", "5", "6", "7", "8", "9"]:
                 print("Invalid choice. Try again.")
                 choice = input("Enter the number of your chosen method: ")
 
@@ -54,14 +62,27 @@ def main():
                 search_fn = search_algorithms.dfs
             elif choice == "3":
                 method_name = "ID-DFS"
-                def search_fn(g, s, d, max_time=5.0):
-                    return search_algorithms.id_dfs(g, s, d, max_depth=10, max_time=max_time)
+                def search_fn(g, s, d, max_time=5.0, stats=None, deadline=None):
+                    return search_algorithms.id_dfs(g, s, d, max_depth=10, max_time=max_time, stats=stats,
+                                                    deadline=deadline)
             elif choice == "4":
                 method_name = "Best-First Search"
                 search_fn = search_algorithms.best_first_search
-            else:
+            elif choice == "5":
                 method_name = "A* Search"
                 search_fn = search_algorithms.a_star_search
+            elif choice == "6":
+                method_name = "Bidirectional BFS"
+                search_fn = search_algorithms.bidirectional_bfs
+            elif choice == "7":
+                method_name = "Bidirectional A* Search"
+                search_fn = search_algorithms.bidirectional_a_star_search
+            elif choice == "8":
+                method_name = "IDA* Search"
+                search_fn = search_algorithms.ida_star_search
+            else:
+                method_name = "SMA* Search"
+                search_fn = search_algorithms.sma_star_search
 
             # Perform the search
             display_results(start, goal, method_name, search_fn, graph, coordinates)
@@ -78,6 +99,25 @@ def main():
             break
 
 
+def resolve_city(text, cities, index):
+    """
+    Returns the city named by 'text', or the city nearest to it when it is a
+    "lat,lon" point, or None if it is neither.
+    """
+    text = text.strip()
+    if text in cities:
+        return text
+    point = spatial_index.parse_point(text)
+    if point is None:
+        return None
+    found = index.nearest(*point)
+    if not found:
+        return None
+    city, distance = found[0]
+    print(f"Snapped ({point[0]}, {point[1]}) to {city} ({distance:.2f} km away).")
+    return city
+
+
 def display_results(start, goal, method_name, search_method, graph, coordinates):
     """
     Run the chosen search method, print path/time/memory/distance.
@@ -87,12 +127,16 @@ def display_results(start, goal, method_name, search_method, graph, coordinates)
 
     tracemalloc.start()
     start_time = time.perf_counter()
+    deadline = search_algorithms.Deadline(5.0)
+    stats = search_algorithms.SearchStats()
 
     # Distinguish whether we pass coordinates or not
-    if search_method in [search_algorithms.best_first_search, search_algorithms.a_star_search]:
-        path, cost = search_method(graph, start, goal, coordinates, max_time=5.0)
+    if search_method in [search_algorithms.best_first_search, search_algorithms.a_star_search,
+                         search_algorithms.bidirectional_a_star_search, search_algorithms.ida_star_search,
+                         search_algorithms.sma_star_search]:
+        path, cost = search_method(graph, start, goal, coordinates, stats=stats, deadline=deadline)
     else:
-        path, cost = search_method(graph, start, goal, max_time=5.0)
+        path, cost = search_method(graph, start, goal, stats=stats, deadline=deadline)
 
     end_time = time.perf_counter()
     memory_used = tracemalloc.get_traced_memory()[1] / 1024
@@ -102,11 +146,7 @@ def display_results(start, goal, method_name, search_method, graph, coordinates)
         print("Path found:", " -> ".join(path))
 
         # Calculate real distance from consecutive city pairs
-        total_distance = 0.0
-        for i in range(len(path) - 1):
-            city_a = path[i]
-            city_b = path[i + 1]
-            total_distance += graph_setup.haversine_distance(city_a, city_b, coordinates)
+        total_distance = graph_setup.path_distance(path, coordinates)
 
         print(f"Total distance: {total_distance:.2f} km")
 
@@ -114,5 +154,11 @@ def display_results(start, goal, method_name, search_method, graph, coordinates)
         elapsed_ms = elapsed_seconds * 1000
         print(f"Time taken: {elapsed_seconds:.6f} s ({elapsed_ms:.3f} ms)")
         print(f"Memory used: {memory_used:.2f} KB")
+        print(f"Nodes expanded: {stats.expanded} (generated {stats.generated}, "
+              f"peak frontier {stats.peak_frontier})")
+        if stats.heuristic_evaluations:
+            print(f"Heuristic evaluations: {stats.heuristic_evaluations}")
+    elif deadline.timed_out:
+        print(f"Search timed out after {deadline.max_time} s.")
     else:
         print("No path found.")